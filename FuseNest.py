@@ -3,9 +3,13 @@
 
 import adsk.core, adsk.fusion, adsk.cam, traceback
 import math
-import re
-from xml.dom import minidom
-import time, threading
+import multiprocessing
+import json
+import os
+import threading
+import time
+
+from .nestlib import apiprofile, cache, curves, duplicates, feasibility, outline, rectpack, simplify, svgresult, timing
 
 # Global set of event handlers to keep them referenced for the duration of the command
 _handlers = []
@@ -19,6 +23,67 @@ TOOLBAR_PANELS = ["SolidModifyPanel"]
 
 SVG_UNIT_FACTOR = 100
 
+# Maximum deviation of line segments from approximated curves, in cm
+# Scales with the spacing between parts, which absorbs the deviation
+CHORD_TOLERANCE = 0.002
+CHORD_TOLERANCE_MAX = 0.02
+CHORD_TOLERANCE_SPACING_FACTOR = 0.1
+
+# Maximum growth of outlines by removing vertices before nesting, in cm
+# Outlines only grow, so part of the spacing is used up but parts never overlap
+SIMPLIFY_TOLERANCE = 0.001
+SIMPLIFY_TOLERANCE_MAX = 0.05
+SIMPLIFY_TOLERANCE_SPACING_FACTOR = 0.2
+
+# Maximum number of characters sent to the palette in a single message
+PALETTE_CHUNK_SIZE = 256 * 1024
+
+# Format of the outlines sent to the palette
+# Packed polygons skip writing and parsing SVG path data on both sides
+PAYLOAD_SVG = "importSVG"
+PAYLOAD_POLYGONS = "importPolygons"
+PALETTE_PAYLOAD = PAYLOAD_POLYGONS
+
+# Engines that can be selected in the command dialog
+ENGINE_SVGNEST = "SVGnest"
+ENGINE_PYTHON = "Python"
+
+# Maximum deviation of outlines that are still considered identical, in cm
+DUPLICATE_TOLERANCE = 1e-4
+
+# Maximum number of no-fit polygons kept on disk
+NFP_STORE_SIZE = 10000
+
+# Minimum fraction of its bounding box a part has to cover to be packed as a rectangle
+RECTANGLE_AREA_RATIO = 0.97
+
+# Minimum number of copies of a single part that are nested in a lattice instead of with an engine
+LATTICE_MIN_COPIES = 4
+
+# Number of the slowest bodies listed in the command dialog
+SLOWEST_BODIES = 3
+
+# Run time of the Python engine in seconds, if no stop condition is set in the command dialog
+HEADLESS_TIME_LIMIT = 10
+
+# Custom event the Python engine reports its progress through from the background
+NEST_EVENT_ID = "fuseNestProgress"
+
+# Minimum time between two progress reports of the Python engine, in seconds
+NEST_PROGRESS_INTERVAL = 0.5
+
+# Number of processes placing the individuals of a generation of the Python engine, 1 places them
+# in the worker thread. More than 1 requires NEST_PYTHON, if the processes fail the run goes on in the worker thread
+NEST_WORKERS = 1
+
+# Python interpreter the processes of NEST_WORKERS are started with, e.g. the python executable
+# that comes with Fusion360. Fusion360 itself can't be started as one. Set when the add-in starts
+NEST_PYTHON = None
+
+# Counts the Fusion360 API calls of the outline conversion per function and body,
+# written to api_profile.txt in the add-in directory. Slows the conversion down
+API_PROFILE = False
+
 # Initial persistence Dict
 pers = {
     "VISheetWidth": 50,
@@ -26,11 +91,49 @@ pers = {
     "VISpacing": 0,
     "VISheetOffsetX": 0,
     "VISheetOffsetY": 5,
-    "ISRotations": 4
+    "ISRotations": 4,
+    "ISTimeLimit": 0,
+    "ISGenerations": 0,
+    "ISStall": 0,
+    "DDEngine": ENGINE_SVGNEST,
+    "BVKeep": True
 }
 
 transform_data = None
 
+# Groups of identical parts of the current nest, see duplicates.findDuplicates
+part_groups = None
+
+# Payload waiting to be sent to the palette once it is ready
+palette_stream = None
+
+# Python engine nesting in the background, see NestJob
+nest_job = None
+
+# The open command, a nest that reached a stop condition is applied through it
+nest_command = None
+
+# Set once the palette stopped on its own, its export is applied right away
+auto_apply = False
+
+# Settings and entity tokens of the bodies of the current nest, transform_data is indexed like the tokens
+nest_session = None
+
+# Sheet and fingerprint of bodies moved by the last applied nest, see rememberPlacements
+applied_nest = None
+
+# Outlines of bodies from previous runs, persisted in the add-in directory
+outline_cache = cache.OutlineCache(os.path.join(os.path.dirname(os.path.realpath(__file__)), "outline_cache.json"))
+
+# No-fit polygons computed by the palette in previous runs
+nfp_store = cache.NfpStore(os.path.join(os.path.dirname(os.path.realpath(__file__)), "nfp_cache.json"), NFP_STORE_SIZE, NFP_STORE_SIZE)
+
+# Timing of every stage of a nest, appended to a JSON lines file in the add-in directory
+run_log = timing.RunLog(os.path.join(os.path.dirname(os.path.realpath(__file__)), "nest_log.jsonl"))
+
+# API calls of the outline conversion, only recorded if API_PROFILE is set
+api_profiler = apiprofile.ApiProfiler(API_PROFILE)
+
 # Fires when the CommandDefinition gets executed.
 # Responsible for adding commandInputs to the command &
 # registering the other command handlers.
@@ -41,10 +144,12 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
         try:
             global transform_data 
             global pers
+            global nest_command
             transform_data = None
 
             # Get the command that was created.
             cmd = adsk.core.Command.cast(args.command)
+            nest_command = cmd
 
             # Registers the CommandDestryHandler
             onExecute = CommandExecuteHandler()
@@ -56,6 +161,11 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             cmd.inputChanged.add(onInputChanged)
             _handlers.append(onInputChanged)     
 
+            # Registers the CommandDestroyHandler
+            onDestroy = CommandDestroyHandler()
+            cmd.destroy.add(onDestroy)
+            _handlers.append(onDestroy)
+
                 
             # Get the CommandInputs collection associated with the command.
             inputs = cmd.commandInputs
@@ -85,10 +195,35 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             isRotations.tooltip = "Number of possible rotations"
             isRotations.tooltipDescription ="How many rotations to try.\nTrying more rotations will take longer to find a good result, but is necessary for some shapes\n\nRecommendations:\n2    -  Perfectly circular, square or hexagonal\n4    -  Rectangular\n8+ -  Odd/Organic shapes or mixed"
 
+            isTimeLimit = inputs.addIntegerSpinnerCommandInput("ISTimeLimit", "Time Limit (s)", 0, 999999, 10, pers["ISTimeLimit"])
+            isTimeLimit.tooltip = "Stops nesting after this many seconds, 0 for no limit"
+            isTimeLimit.tooltipDescription = "Once a stop condition is reached, the best result is applied without pressing \"Apply Nest\" and \"OK\""
+
+            isGenerations = inputs.addIntegerSpinnerCommandInput("ISGenerations", "Max Generations", 0, 999999, 10, pers["ISGenerations"])
+            isGenerations.tooltip = "Stops nesting after this many generations, 0 for no limit"
+            isGenerations.tooltipDescription = "Once a stop condition is reached, the best result is applied without pressing \"Apply Nest\" and \"OK\""
+
+            isStall = inputs.addIntegerSpinnerCommandInput("ISStall", "Stop Without Improvement", 0, 999999, 10, pers["ISStall"])
+            isStall.tooltip = "Stops nesting after this many generations in a row without a better result, 0 to keep going"
+            isStall.tooltipDescription = "Once a stop condition is reached, the best result is applied without pressing \"Apply Nest\" and \"OK\""
+
+            ddEngine = inputs.addDropDownCommandInput("DDEngine", "Engine", adsk.core.DropDownStyles.TextListDropDownStyle)
+            ddEngine.listItems.add(ENGINE_SVGNEST, pers["DDEngine"] == ENGINE_SVGNEST)
+            ddEngine.listItems.add(ENGINE_PYTHON, pers["DDEngine"] == ENGINE_PYTHON)
+            ddEngine.tooltip = "Nesting engine"
+            ddEngine.tooltipDescription = "SVGnest - Interactive nesting in a separate window\nPython - Nests in the background without opening a window, requires NumPy"
+
+            bvKeep = inputs.addBoolValueInput("BVKeep", "Keep Placed Parts", True, "", pers["BVKeep"])
+            bvKeep.tooltip = "Only nest parts that were not placed before"
+            bvKeep.tooltipDescription = "Bodies placed by the previous nest stay where they are, new bodies are placed around them with the Python engine. Changing the sheet size, spacing or offsets nests all bodies again"
+
             bvNest = inputs.addBoolValueInput("BVNest", "    Start Nesting    ", False)
             bvNest.isFullWidth = True
             bvNest.tooltip = "Start nesting process"
 
+            tbStatus = inputs.addTextBoxCommandInput("TBStatus", "Status", "", 2, True)
+            tbStatus.isVisible = False
+
             root = adsk.core.Application.get().activeProduct.rootComponent
             for i in root.bRepBodies:
                 siBodies.addSelection(i)
@@ -110,67 +245,39 @@ class CommandExecuteHandler(adsk.core.CommandEventHandler):
     def notify(self, args):
         try:
             global transform_data
+
+            # A nest still running in the background stops after its current generation,
+            # its best result is applied once the job reports back, see NestEventHandler
+            if(nest_job is not None and nest_job.inputs is not None):
+                nest_job.applyWhenDone()
+                return
+
             if(transform_data):
                 selections = []
 
                 for i in range(args.command.commandInputs.itemById("SIBodies").selectionCount):
                     selections.append(args.command.commandInputs.itemById("SIBodies").selection(i).entity)
 
-                first_move = None
-                last_move = None
-
-                root = adsk.core.Application.get().activeProduct.rootComponent
-                des = adsk.core.Application.get().activeDocument.design
-
-                offset_x = 0
-                offset_y = 0
-                
-                if(args.command.commandInputs.itemById("VISheetOffsetX").value > 0):
-                    offset_x = args.command.commandInputs.itemById("VISheetWidth").value + args.command.commandInputs.itemById("VISheetOffsetX").value
-                elif(args.command.commandInputs.itemById("VISheetOffsetX").value < 0):
-                    offset_x = -args.command.commandInputs.itemById("VISheetWidth").value + args.command.commandInputs.itemById("VISheetOffsetX").value
-
-                if(args.command.commandInputs.itemById("VISheetOffsetY").value > 0):
-                    offset_y = args.command.commandInputs.itemById("VISheetHeight").value + args.command.commandInputs.itemById("VISheetOffsetY").value
-                elif(args.command.commandInputs.itemById("VISheetOffsetY").value < 0):
-                    offset_y = -args.command.commandInputs.itemById("VISheetHeight").value + args.command.commandInputs.itemById("VISheetOffsetY").value
-
-
-                
-                for i, t in transform_data:
-                    mat1 = adsk.core.Matrix3D.create()
-                    mat1.translation = adsk.core.Vector3D.create(t[0] +  offset_x * t[3], -t[1] - offset_y * t[3], 0)
-
-                    mat2 = adsk.core.Matrix3D.create()
-                    mat2.setToRotation(
-                        math.radians(-t[2]),
-                        adsk.core.Vector3D.create(0,0,1),
-                        adsk.core.Point3D.create(0,0,0)
-                    )
+                applyPlacements(transform_data, selections, getSheetOffsets(args.command.commandInputs))
 
-                    mat2.transformBy(mat1)
+                # The next nest keeps these bodies where they are now
+                rememberPlacements(selections, transform_data, getNestSettings(args.command.commandInputs))
+        except:
+            print(traceback.format_exc())
 
-                    if(selections[i].parentComponent == root):
-                        oc = adsk.core.ObjectCollection.create()
-                        oc.add(selections[i])
 
-                        move_input = root.features.moveFeatures.createInput(oc, mat2)
-                        
-                        if(first_move is None):
-                            first_move = root.features.moveFeatures.add(move_input)
-                            last_move = first_move
-                        else:
-                            last_move = root.features.moveFeatures.add(move_input)
-                    else:
-                        trans = selections[i].assemblyContext.transform
-                        trans.transformBy(mat2)
-                        selections[i].assemblyContext.transform = trans
-                if(des.designType and des.snapshots.hasPendingSnapshot):
-                    des.snapshots.add()
-                    if(first_move):
-                        des.timeline.timelineGroups.add(first_move.timelineObject.index, last_move.timelineObject.index+1)
-                elif(first_move and not( first_move == last_move) and des.designType):
-                    des.timeline.timelineGroups.add(first_move.timelineObject.index, last_move.timelineObject.index)
+# Fires when the command dialog is closed
+# Responsible for leaving a nest running in the background on its own
+class CommandDestroyHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            global nest_job
+            global nest_command
+            if nest_job is not None and not nest_job.detach():
+                nest_job = None
+            nest_command = None
         except:
             print(traceback.format_exc())
 
@@ -185,13 +292,23 @@ class CommandInputChangedHandler(adsk.core.InputChangedEventHandler):
             if(args.input.id == "BVNest"):
 
                 global pers
+                global transform_data
+                global palette_stream
+                global part_groups
+                global nest_job
+                global nest_session
 
                 pers["VISheetWidth"] = args.inputs.itemById("VISheetWidth").value
                 pers["VISheetHeight"] = args.inputs.itemById("VISheetHeight").value
                 pers["VISpacing"] = args.inputs.itemById("VISpacing").value
                 pers["ISRotations"] = args.inputs.itemById("ISRotations").value
+                pers["ISTimeLimit"] = args.inputs.itemById("ISTimeLimit").value
+                pers["ISGenerations"] = args.inputs.itemById("ISGenerations").value
+                pers["ISStall"] = args.inputs.itemById("ISStall").value
                 pers["VISheetOffsetX"] = args.inputs.itemById("VISheetOffsetX").value
                 pers["VISheetOffsetY"] = args.inputs.itemById("VISheetOffsetY").value
+                pers["DDEngine"] = args.inputs.itemById("DDEngine").selectedItem.name
+                pers["BVKeep"] = args.inputs.itemById("BVKeep").value
 
                 # If there is already a palette, delete it
                 # This is mainly for debugging purposes
@@ -200,38 +317,208 @@ class CommandInputChangedHandler(adsk.core.InputChangedEventHandler):
                 if palette:
                     palette.deleteMe()
 
+                # Only one nest runs at a time
+                if nest_job is not None:
+                    nest_job.cancel()
+                    nest_job = None
+
+                # Placements that were not applied yet, bodies that stay selected keep them
+                pending = transform_data
+                transform_data = None
+
                 global SVG_UNIT_FACTOR
             
                 root = adsk.core.Application.get().activeProduct.rootComponent
             
 
+                run_log.start(
+                    sheet=[pers["VISheetWidth"], pers["VISheetHeight"]],
+                    spacing=pers["VISpacing"],
+                    rotations=pers["ISRotations"],
+                    engine=pers["DDEngine"]
+                )
+
+                api_profiler.reset()
+
                 # Getting selections now, as creating sketches clears em
-                selections = []                
-                for i in range(args.inputs.itemById("SIBodies").selectionCount):
-                    selections.append(args.inputs.itemById("SIBodies").selection(i).entity)
+                with run_log.span("selection") as span:
+                    selections = []
+                    for i in range(args.inputs.itemById("SIBodies").selectionCount):
+                        selections.append(args.inputs.itemById("SIBodies").selection(i).entity)
+                    span["bodies"] = len(selections)
+
+                parts = []
+                fingerprints = []
+
+                tolerance = getChordTolerance(args.inputs.itemById("VISpacing").value)
+
+                for i, s in enumerate(selections):
+                    with run_log.span("body", index=i, name=s.name) as span:
+                        # Unchanged bodies skip the projection
+                        fingerprints.append(getBodyFingerprint(s))
+                        fingerprint = fingerprints[-1] + [tolerance, outline.FORMAT_VERSION]
+                        cached = outline_cache.get(s.entityToken, fingerprint)
+
+                        if cached is not None:
+                            part = outline.Part.fromDict(cached, i)
+                            span["source"] = "cache"
+                        else:
+                            # Reads the outline from a planar face if possible,
+                            # projecting the body into a sketch is a lot slower
+                            with run_log.span("bodyToPart", index=i), api_profiler.body(i, s.name):
+                                part = bodyToPart(api_profiler.wrap(s), i, tolerance)
+                            span["source"] = "face"
 
-                paths = []
+                            if part is None:
+                                with run_log.span("projection", index=i):
+                                    sketch = root.sketches.add(root.xYConstructionPlane)
+                                    sketch.project(s)
+                                with run_log.span("sketchToPart", index=i), api_profiler.body(i, s.name):
+                                    part = sketchToPart(api_profiler.wrap(sketch), i, tolerance)
+                                sketch.deleteMe()
+                                span["source"] = "sketch"
 
-                for s in selections:
-                    sketch = root.sketches.add(root.xYConstructionPlane)
-                    sketch.project(s)
-                    paths.append(sketchToSVGPaths(sketch))
-                    sketch.deleteMe()
-
-                svg = buildSVGFromPaths(paths, args.inputs.itemById("VISheetWidth").value, args.inputs.itemById("VISheetHeight").value)
-
-                dataToSend = "{};{};{};{};{}".format(
-                    svg,
-                    args.inputs.itemById("VISpacing").value * SVG_UNIT_FACTOR,
-                    args.inputs.itemById("ISRotations").value,
-                    True,
-                    True     
-                )
+                            if api_profiler.enabled:
+                                span["apiCalls"] = api_profiler.calls(i)
+
+                            outline_cache.put(s.entityToken, fingerprint, part.toDict())
+
+                        span["vertices"] = simplify.vertexCount([part])
+
+                    parts.append(part)
+
+                outline_cache.save()
+
+                if api_profiler.enabled:
+                    with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "api_profile.txt"), "w") as f:
+                        f.write(api_profiler.report())
 
                 # Re-selects all components, as they get lost during the previous steps
                 for s in selections:
                     args.inputs.itemById("SIBodies").addSelection(s)
 
+                # Bodies placed by the previous nest stay where they are, only the others are nested around them
+                kept = {}
+                if(args.inputs.itemById("BVKeep").value and hasPythonEngine()):
+                    kept = getKeptPlacements(selections, fingerprints, args.inputs, pending)
+
+                fixed = [(parts[i], t) for i, (t, _) in kept.items()]
+                parts = [p for p in parts if p.index not in kept]
+
+                nest_session = {
+                    "settings": getNestSettings(args.inputs),
+                    "tokens": [s.entityToken for s in selections]
+                }
+
+                # Identical parts are only nested once, with a quantity
+                with run_log.span("duplicates", parts=len(parts)) as span:
+                    part_groups = duplicates.findDuplicates(parts, DUPLICATE_TOLERANCE * SVG_UNIT_FACTOR, tolerance * SVG_UNIT_FACTOR)
+                    quantities = {g[0][0]: len(g) for g in part_groups}
+                    byIndex = {p.index: p for p in parts}
+                    parts = [byIndex[g[0][0]] for g in part_groups]
+                    span["unique"] = len(parts)
+
+                # Dense outlines slow down every no-fit polygon, redundant vertices are removed first
+                with run_log.span("simplify") as span:
+                    simplifyTolerance = getSimplifyTolerance(args.inputs.itemById("VISpacing").value)
+                    vertices = simplify.vertexCount(parts)
+                    parts = [simplify.simplifyPart(p, simplifyTolerance * SVG_UNIT_FACTOR) for p in parts]
+                    fixed = [(simplify.simplifyPart(p, simplifyTolerance * SVG_UNIT_FACTOR), t) for p, t in fixed]
+                    span["before"] = vertices
+                    span["after"] = simplify.vertexCount(parts)
+                summary = "Simplified outlines from {} to {} vertices".format(vertices, span["after"])
+
+                slowest = run_log.slowest("body", SLOWEST_BODIES)
+                if slowest:
+                    summary += "\nSlowest bodies: " + ", ".join("{} {:.2f} s".format(r["name"], r["duration"]) for r in slowest)
+
+                # Rotations at which a part can't fit the sheet are never tried
+                with run_log.span("feasibility"):
+                    allowedRotations = getAllowedRotations(parts, args.inputs, tolerance)
+
+                unfit = [p.index for p in parts if not allowedRotations[p.index]]
+                if unfit:
+                    parts = [p for p in parts if allowedRotations[p.index]]
+                    summary += "\n{} don't fit the sheet at any rotation".format(", ".join(selections[i].name for i in unfit))
+
+                status = args.inputs.itemById("TBStatus")
+                status.isVisible = True
+                status.text = summary
+
+                if not parts:
+                    return
+
+                # Only the Python engine places parts around fixed ones
+                if kept:
+                    nest_job = nestHeadless(parts, args.inputs, part_groups, summary, allowedRotations, fixed, kept, selections)
+                    return
+
+                # Rectangular panels are packed directly, without the palette
+                with run_log.span("rectangles"):
+                    transforms = packRectangles(parts, args.inputs, part_groups, summary, tolerance)
+                if transforms is not None:
+                    transform_data = transforms
+                    return
+
+                # Many copies of a single part are nested in a repeating pattern
+                with run_log.span("lattice"):
+                    transforms = nestLattice(parts, args.inputs, part_groups, summary, allowedRotations, tolerance)
+                if transforms is not None:
+                    transform_data = transforms
+                    return
+
+                if(pers["DDEngine"] == ENGINE_PYTHON):
+                    nest_job = nestHeadless(parts, args.inputs, part_groups, summary, allowedRotations, selections=selections)
+                    return
+
+                with run_log.span("payload", format=PALETTE_PAYLOAD) as span:
+                    # Shapes are identified by hashes in the persistent no-fit polygon store
+                    salt = "{}:{}".format(PALETTE_PAYLOAD, tolerance)
+                    hashes = {p.index: p.shapeHash(salt) for p in parts}
+                    binHash = "sheet:{:.6f}x{:.6f}".format(
+                        args.inputs.itemById("VISheetWidth").value * SVG_UNIT_FACTOR,
+                        args.inputs.itemById("VISheetHeight").value * SVG_UNIT_FACTOR
+                    )
+                    nfps = {
+                        "bin": binHash,
+                        "entries": nfp_store.select(set(hashes.values()) | {binHash})
+                    }
+                    nfp_store.save()
+
+                    if(PALETTE_PAYLOAD == PAYLOAD_POLYGONS):
+                        payload = outline.buildPolygonPayload(
+                            parts,
+                            args.inputs.itemById("VISheetWidth").value,
+                            args.inputs.itemById("VISheetHeight").value,
+                            SVG_UNIT_FACTOR,
+                            tolerance * SVG_UNIT_FACTOR,
+                            quantities,
+                            hashes,
+                            allowedRotations
+                        )
+                        payload["spacing"] = args.inputs.itemById("VISpacing").value * SVG_UNIT_FACTOR
+                        payload["rotations"] = args.inputs.itemById("ISRotations").value
+                        payload["useHoles"] = str(True)
+                        payload["exploreConcave"] = str(True)
+                        payload["nfp"] = nfps
+                        payload["stop"] = getStopConditions(args.inputs)
+
+                        dataToSend = json.dumps(payload, separators=(",", ":"))
+                    else:
+                        svg = buildSVGFromParts(parts, args.inputs.itemById("VISheetWidth").value, args.inputs.itemById("VISheetHeight").value, quantities, hashes, allowedRotations)
+
+                        dataToSend = "{};{};{};{};{};{};{}".format(
+                            svg,
+                            args.inputs.itemById("VISpacing").value * SVG_UNIT_FACTOR,
+                            args.inputs.itemById("ISRotations").value,
+                            True,
+                            True,
+                            json.dumps(nfps, separators=(",", ":")),
+                            json.dumps(getStopConditions(args.inputs), separators=(",", ":"))
+                        )
+
+                    span["bytes"] = len(dataToSend)
+
 
                 palette = ui.palettes.add('paletteSVGNest', '2D Nest', 'SVGnest/index.html', True, True, True, 1500, 1000, True)
 
@@ -248,8 +535,8 @@ class CommandInputChangedHandler(adsk.core.InputChangedEventHandler):
                 palette.incomingFromHTML.add(onHTMLEvent)   
                 _handlers.append(onHTMLEvent)
 
-                # Sends data to palette after it had time to load
-                threading.Timer(4, sendDataToPalette, [palette, dataToSend]).start()
+                # Data is sent once the palette reports that it is ready
+                palette_stream = PaletteStream(PALETTE_PAYLOAD, dataToSend)
 
         except:
             print(traceback.format_exc())
@@ -278,616 +565,1165 @@ class PaletteHTMLEventHandler(adsk.core.HTMLEventHandler):
         super().__init__()
     def notify(self, args):
         try:
-            if(args.action == "exportSVG"):
+            global palette_stream
+            global auto_apply
+
+            ui = adsk.core.Application.get().userInterface
+
+            if(args.action == "ready"):
+                run_log.event("paletteReady")
+                if palette_stream:
+                    palette_stream.start(ui.palettes.itemById('paletteSVGNest'))
+
+            elif(args.action == "chunkAck"):
+                ack = json.loads(args.data)
+                if palette_stream and palette_stream.action == ack["action"]:
+                    palette_stream.acknowledge(ui.palettes.itemById('paletteSVGNest'), ack["index"])
+
+            elif(args.action == "iteration"):
+                # The palette reports every improved placement
+                run_log.event("iteration", **json.loads(args.data))
+
+            elif(args.action == "autoStop"):
+                # A stop condition was reached, the export that follows is applied right away
+                run_log.event("autoStop", **json.loads(args.data))
+                auto_apply = True
+
+            elif(args.action == "nfpStore"):
+                nfp_store.update(json.loads(args.data))
+                nfp_store.save()
+
+            elif(args.action == "exportSVG"):
                 global transform_data
-                transform_data =  getTransformsFromSVG(args.data)
+                run_log.event("exportSVG", bytes=len(args.data))
+                with run_log.span("parseSVG"):
+                    transform_data =  getTransformsFromSVG(args.data, part_groups)
+
+                palette_stream = None
 
-                ui = adsk.core.Application.get().userInterface
                 palette = ui.palettes.itemById('paletteSVGNest')
                 if palette:
                     palette.deleteMe()
 
+                if auto_apply:
+                    auto_apply = False
+                    applyNest()
+
         except:
             print(traceback.format_exc())
 
 
-def sendDataToPalette(palette, data):
-    """Sends data string to pallet
+class PaletteStream():
+    """Sends a data string to a palette in ordered chunks
+
+    Each chunk is only sent after the palette acknowledged the previous one,
+    so large payloads never exceed the size of a single message.
 
     Args:
-        palette: (Palette) Palette to send data to
-        data: (String) Data string to send to pallete
+        action: (String) Action the palette handles once all chunks arrived
+        data: (String) Data string to send
+        chunkSize: (int) Maximum number of characters per chunk
     """
-    if palette:
-        palette.sendInfoToHTML("importSVG", data)
 
+    def __init__(self, action, data, chunkSize=PALETTE_CHUNK_SIZE):
+        self.action = action
+        self.chunks = [data[i:i+chunkSize] for i in range(0, len(data), chunkSize)] or [""]
+        self.sent = 0
+
+    def start(self, palette):
+        """Sends the first chunk, restarting the transfer if the palette got reloaded
+
+        Args:
+            palette: (Palette) Palette to send data to
+        """
+        self.sent = 0
+        self.sendNext(palette)
 
-def buildSVGFromPaths(paths, width=50, height=25):
-    """Constructs a full svg fle from paths
+    def acknowledge(self, palette, index):
+        """Sends the next chunk after the palette received the previous one
+
+        Args:
+            palette: (Palette) Palette to send data to
+            index: (int) Index of the acknowledged chunk
+        """
+        if(index == self.sent - 1):
+            self.sendNext(palette)
+
+    def sendNext(self, palette):
+        """Sends the next chunk
+
+        Args:
+            palette: (Palette) Palette to send data to
+
+        Returns:
+            bool: False if all chunks have been sent already
+        """
+        if(self.sent >= len(self.chunks)):
+            run_log.event("payloadSent", chunks=len(self.chunks))
+            return False
+
+        sendDataToPalette(palette, json.dumps({
+            "index": self.sent,
+            "count": len(self.chunks),
+            "data": self.chunks[self.sent]
+        }), self.action + "Chunk")
+
+        self.sent += 1
+        return True
+
+
+class NestJob():
+    """Runs the Python engine in a worker thread
+
+    Settings are read from the command inputs when the job is created, the
+    worker itself never calls the Fusion360 API. Progress, the records of the
+    run log and the end of the run are handed to the UI thread through a
+    custom event, see NestEventHandler.
+
+    The job outlives the command dialog if its result is going to be applied,
+    either because OK was pressed or once it reaches a stop condition. The
+    bodies and sheet settings to apply it with are taken when it is created.
 
     Args:
-        paths: (String[][]) SVG path data
-        width: (float) Width ouf bounding rectangle
-        height: (float) Height of bounding rectangle
+        engine: (module) nestlib.engine, imported by the caller as it requires NumPy
+        parts: (outline.Part[]) Part outlines
+        inputs: (CommandInputs) Inputs of the command
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        summary: (str) Line shown above the result, e.g. statistics of earlier stages
+        allowedRotations: ({int: [(int, int)]}) Rotations per part index, see getAllowedRotations
+        fixed: ([(outline.Part, float[])]) Outlines that keep their place, with transform data (x, y, r, sheet)
+        kept: ({int: (float[], bool)}) Placements of the bodies of the fixed outlines, see getKeptPlacements
+        selections: ([BRepBody]) Selected bodies, indexed like the parts
+    """
+
+    _count = 0
+
+    def __init__(self, engine, parts, inputs, groups=None, summary=None, allowedRotations=None, fixed=None, kept=None, selections=None):
+        global SVG_UNIT_FACTOR
+
+        NestJob._count += 1
+        self.id = NestJob._count
+
+        self.engine = engine
+        self.parts = parts
+        self.inputs = inputs
+        self.groups = groups
+        self.summary = summary
+        self.allowedRotations = allowedRotations
+        self.fixed = fixed
+        self.kept = kept
+        self.settings = (
+            inputs.itemById("VISheetWidth").value,
+            inputs.itemById("VISheetHeight").value,
+            inputs.itemById("VISpacing").value,
+            inputs.itemById("ISRotations").value,
+            SVG_UNIT_FACTOR
+        )
+        self.stop = getStopConditions(inputs)
+        self.selections = selections
+        self.offsets = getSheetOffsets(inputs)
+        self.nestSettings = getNestSettings(inputs)
+        self.quantities = {g[0][0]: len(g) for g in groups} if groups else None
+        self.total = sum(self.quantities.values()) if groups else len(parts)
+
+        self.app = adsk.core.Application.get()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.cancelled = False
+        self.transforms = None
+        self.error = None
+        self.stopped = None
+        self.apply = False
+        self._nester = None
+        self._lastReport = 0
+
+        # Run log records of the worker, written on the UI thread with the next report
+        self._records = []
+
+    def start(self):
+        """Starts the worker thread"""
+        self.thread.start()
+
+    def cancel(self):
+        """Stops the engine after the current generation, keeping the best result so far"""
+        self.cancelled = True
+
+    def applyWhenDone(self):
+        """Stops the engine after the current generation and applies its best result once it reports back"""
+        self.apply = True
+        self.cancel()
+
+    def detach(self):
+        """Called when the command dialog closes, its inputs can't be used anymore
+
+        Returns:
+            bool: True if the job keeps running to apply its result, otherwise it is cancelled
+        """
+
+        self.inputs = None
+        if(self.apply or self.autoApply()):
+            return True
+
+        self.cancel()
+        return False
+
+    def autoApply(self):
+        """True if the run ends at a stop condition of the command dialog, rather than the default time limit
+
+        Returns:
+            bool: True if the result is applied once the run ends
+        """
+        return any(v is not None for v in self.stop.values())
+
+    def run(self):
+        try:
+            self.transforms = self.engine.nestParts(
+                self.parts,
+                *self.settings,
+                generations=self.stop["generations"],
+                timeLimit=self.stop["timeLimit"] if self.autoApply() else HEADLESS_TIME_LIMIT,
+                callback=self.progress,
+                quantities=self.quantities,
+                allowedRotations=self.allowedRotations,
+                fixed=self.fixed,
+                stall=self.stop["stall"],
+                workers=self.workers()
+            )
+            self.stopped = self._nester.stopped if self._nester else None
+        except:
+            self.error = traceback.format_exc()
+
+        self.report(done=True)
+
+    def workers(self):
+        """Number of processes placing the individuals, see NEST_WORKERS
+
+        Returns:
+            int: NEST_WORKERS if NEST_PYTHON is set, otherwise 1
+        """
+
+        if(NEST_WORKERS <= 1 or NEST_PYTHON is None):
+            return 1
+
+        return NEST_WORKERS
+
+    def progress(self, nester):
+        """Engine callback, reports the best result at most every NEST_PROGRESS_INTERVAL seconds
+
+        Args:
+            nester: (engine.Nester) The running engine
+
+        Returns:
+            bool: False once the job got cancelled
+        """
+
+        best = nester.best
+        self._nester = nester
+        self._records.append({
+            "generation": nester.generations,
+            "utilization": round(best.utilization, 6) if best else None,
+            "start": round(run_log.elapsed(), 6)
+        })
+
+        now = time.time()
+        if(best is not None and now - self._lastReport >= NEST_PROGRESS_INTERVAL):
+            self._lastReport = now
+            self.report(
+                generation=nester.generations,
+                placed=sum(len(sheet) for sheet in best.sheets),
+                sheets=len(best.sheets),
+                utilization=best.utilization
+            )
+
+        return not self.cancelled
+
+    def report(self, **info):
+        info["job"] = self.id
+        info["records"], self._records = self._records, []
+        self.app.fireCustomEvent(NEST_EVENT_ID, json.dumps(info))
+
+
+# Fires when the Python engine reports progress from the background
+# Responsible for showing it and taking over the result on the UI thread
+class NestEventHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            global nest_job
+            global transform_data
+
+            info = json.loads(args.additionalInfo)
+
+            # Reports of cancelled jobs may still be queued
+            job = nest_job
+            if job is None or job.id != info["job"]:
+                return
+
+            for record in info["records"]:
+                run_log.event("generation", **record)
+
+            if(not info.get("done")):
+                # The command dialog was closed, there is nothing to show progress in
+                if job.inputs is None:
+                    return
+
+                status = job.inputs.itemById("TBStatus")
+                status.text = "Generation {}: placed {} of {} parts on {} sheet(s), {:.1%} utilization".format(
+                    info["generation"], info["placed"], job.total, info["sheets"], info["utilization"]
+                )
+                if job.summary:
+                    status.text = job.summary + "\n" + status.text
+                return
+
+            nest_job = None
+
+            if job.error:
+                print(job.error)
+                if job.inputs is not None:
+                    job.inputs.itemById("TBStatus").text = "The Python engine failed, see the text commands window for details"
+                return
+
+            run_log.event("engine", bodies=job.total, stopped=job.stopped)
+            transforms = reportPlacements(job.transforms, job.inputs, job.parts, job.groups, job.summary, job.kept)
+
+            if(not job.apply and not (job.autoApply() and job.stopped in ("generations", "time", "stall"))):
+                if job.inputs is not None:
+                    transform_data = transforms
+                return
+
+            # A stop condition was reached with the dialog still open
+            if(not job.apply and job.inputs is not None):
+                transform_data = transforms
+                applyNest()
+                return
+
+            # OK was pressed or the dialog was closed, bodies may have been deleted since
+            transforms = [(i, t) for i, t in transforms if job.selections[i].isValid]
+            applyPlacements(transforms, job.selections, job.offsets)
+            rememberPlacements(job.selections, transforms, job.nestSettings)
+        except:
+            print(traceback.format_exc())
+
+
+def nestHeadless(parts, inputs, groups=None, summary=None, allowedRotations=None, fixed=None, kept=None, selections=None):
+    """Starts nesting parts with the Python engine in the background
+
+    Progress and the result are shown in the status box, see NestJob.
+
+    Args:
+        parts: (outline.Part[]) Part outlines
+        inputs: (CommandInputs) Inputs of the command
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        summary: (str) Line shown above the result, e.g. statistics of earlier stages
+        allowedRotations: ({int: [(int, int)]}) Rotations per part index, see getAllowedRotations
+        fixed: ([(outline.Part, float[])]) Outlines that keep their place, with transform data (x, y, r, sheet)
+        kept: ({int: (float[], bool)}) Placements of the bodies of the fixed outlines, see getKeptPlacements
+        selections: ([BRepBody]) Selected bodies, indexed like the parts
 
     Returns:
-        [string]: full svg
+        NestJob: The running job, None if the engine is not available
+    """
 
+    status = inputs.itemById("TBStatus")
+    status.isVisible = True
+
+    try:
+        from .nestlib import engine
+    except ImportError:
+        status.text = "The Python engine requires NumPy to be installed in Fusion360's Python environment"
+        return None
+
+    job = NestJob(engine, parts, inputs, groups, summary, allowedRotations, fixed, kept, selections)
+    job.start()
+
+    status.text = "Nesting in the background, press OK to apply the best result so far"
+    if job.autoApply():
+        status.text += "\nThe dialog can be closed, the result is applied once a stop condition is reached"
+    if summary:
+        status.text = summary + "\n" + status.text
+
+    return job
+
+
+def packRectangles(parts, inputs, groups=None, summary=None, tolerance=CHORD_TOLERANCE):
+    """Packs parts as rectangles if all of them are, and reports the result in the status box
+
+    Args:
+        parts: (outline.Part[]) Part outlines
+        inputs: (CommandInputs) Inputs of the command
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        summary: (str) Line shown above the result, e.g. statistics of earlier stages
+        tolerance: (float) Chord tolerance the outlines were built with
+
+    Returns:
+        [(int, float[])]: List of index and transform data (x, y, r, sheet), None if not all parts are rectangles
     """
+
     global SVG_UNIT_FACTOR
 
-    rtn = ""
+    transforms = rectpack.nestRectangles(
+        parts,
+        inputs.itemById("VISheetWidth").value,
+        inputs.itemById("VISheetHeight").value,
+        inputs.itemById("VISpacing").value,
+        inputs.itemById("ISRotations").value,
+        SVG_UNIT_FACTOR,
+        quantities={g[0][0]: len(g) for g in groups} if groups else None,
+        tolerance=tolerance * SVG_UNIT_FACTOR,
+        areaRatio=RECTANGLE_AREA_RATIO
+    )
 
+    if transforms is None:
+        return None
 
-    rtn += r"<svg version='1.1' xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {0} {1}' width='{0}px' height='{1}px'> ".format(width*SVG_UNIT_FACTOR, height*SVG_UNIT_FACTOR)
+    return reportPlacements(transforms, inputs, parts, groups, summary)
 
-    rtn += r"<rect width='{}' height='{}' stroke='black' stroke-width='2' fill-opacity='0'/> ".format(width*SVG_UNIT_FACTOR, height*SVG_UNIT_FACTOR)
 
-    for i, p in enumerate(paths):
-        for j in p:
-            rtn += r"<path d='{}' id='{}' stroke='black' fill='green' stroke-width='2' fill-opacity='0.5'/> ".format(j, i)
+def nestLattice(parts, inputs, groups=None, summary=None, allowedRotations=None, tolerance=CHORD_TOLERANCE):
+    """Nests copies of a single part in a lattice and reports the result in the status box
 
-    rtn += r"</svg>"
+    Args:
+        parts: (outline.Part[]) Part outlines
+        inputs: (CommandInputs) Inputs of the command
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        summary: (str) Line shown above the result, e.g. statistics of earlier stages
+        allowedRotations: ({int: [(int, int)]}) Rotations per part index, see getAllowedRotations
+        tolerance: (float) Chord tolerance the outlines were built with
 
-    return rtn
+    Returns:
+        [(int, float[])]: List of index and transform data (x, y, r, sheet),
+            None if the parts are not copies of a single part or NumPy is missing
+    """
 
+    global SVG_UNIT_FACTOR
 
-def getTransformsFromSVG(svg):
-    """Imports SVG result from svgnest and extracts transform data
+    if(len(parts) != 1):
+        return None
+
+    count = next((len(g) for g in groups if g[0][0] == parts[0].index), 1) if groups else 1
+    if(count < LATTICE_MIN_COPIES):
+        return None
+
+    try:
+        from .nestlib import lattice
+    except ImportError:
+        return None
+
+    transforms = lattice.nestLattice(
+        parts[0],
+        count,
+        inputs.itemById("VISheetWidth").value,
+        inputs.itemById("VISheetHeight").value,
+        inputs.itemById("VISpacing").value,
+        inputs.itemById("ISRotations").value,
+        SVG_UNIT_FACTOR,
+        tolerance=tolerance * SVG_UNIT_FACTOR,
+        allowedRotations=allowedRotations.get(parts[0].index) if allowedRotations else None
+    )
+
+    if transforms is None:
+        return None
+
+    return reportPlacements(transforms, inputs, parts, groups, summary)
+
+
+def reportPlacements(transforms, inputs, parts, groups=None, summary=None, kept=None):
+    """Maps placements back onto all copies and shows how many parts were placed
 
     Args:
-        svg: (String) SVG data
+        transforms: ([(int, float[])]) List of index and transform data (x, y, r, sheet), one entry per placed copy
+        inputs: (CommandInputs) Inputs of the command, None if the dialog was closed
+        parts: (outline.Part[]) Nested part outlines
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        summary: (str) Line shown above the result, e.g. statistics of earlier stages
+        kept: ({int: (float[], bool)}) Bodies that kept their place, see getKeptPlacements
 
     Returns:
-        [zip]: zip of index and transform data (x, y, r)
+        [(int, float[])]: List of body index and transform data (x, y, r, sheet)
     """
 
     global SVG_UNIT_FACTOR
 
-    # Wraps svg data into single root node
-    svg = "<g>{}</g>".format(svg)
+    count = len(parts)
+    if groups:
+        transforms = duplicates.expandPlacements(transforms, groups, SVG_UNIT_FACTOR)
+        count = sum(len(g) for g in groups)
 
-    dom = minidom.parseString(svg)
+    if inputs is not None:
+        status = inputs.itemById("TBStatus")
+        status.isVisible = True
 
-    ids = []
-    transforms = []
+        sheets = max([t[3] for _, t in transforms] + [t[3] for t, _ in (kept or {}).values()], default=-1) + 1
+        status.text = "Placed {} of {} parts on {} sheet(s), press OK to apply".format(len(transforms), count, sheets)
+        if kept:
+            status.text = "{} parts kept their place\n{}".format(len(kept), status.text)
+        if summary:
+            status.text = summary + "\n" + status.text
 
-    p = re.compile(r'[\(\s]-?\d*\.{0,1}\d+')
+    # Bodies of a nest that was not applied yet still have to be moved
+    if kept:
+        transforms = transforms + [(i, t) for i, (t, applied) in kept.items() if not applied]
 
-    for sheetNumber, s in enumerate(dom.firstChild.childNodes):
-        for e in s.getElementsByTagName('path'):
-            if not(int(e.getAttribute('id')) in ids):
-                ids.append(int(e.getAttribute('id')))
-                
-                # Gets the transform atributes as string
-                transformTag = (e.parentNode.getAttribute('transform'))
+    return transforms
 
-                # Converts string to list of floats via regex
-                # Adds sheet number to the end
-                transforms.append([float(i[1:]) for i in p.findall(transformTag)] + [sheetNumber] )
-            
-    # X, Y, rotation, sheet number
-    transformsScaled = [ [t[0]/SVG_UNIT_FACTOR, t[1]/SVG_UNIT_FACTOR, t[2], t[3]] for t in transforms]
 
-    return zip(ids, transformsScaled)
-    
+def applyPlacements(transforms, selections, offsets):
+    """Moves bodies onto their place on the sheets
+
+    Args:
+        transforms: ([(int, float[])]) List of body index and transform data (x, y, r, sheet)
+        selections: ([BRepBody]) Bodies, indexed like the transform data
+        offsets: ((float, float)) Distance between sheets, see getSheetOffsets
+    """
 
-def sketchToSVGPaths(sketch):
-    """Converts a Sketch into a SVG Path date
+    first_move = None
+    last_move = None
+
+    root = adsk.core.Application.get().activeProduct.rootComponent
+    des = adsk.core.Application.get().activeDocument.design
+
+    offset_x, offset_y = offsets
+
+    moves = []
+    occurrences = {}
+
+    for t, indices in groupByTransform(transforms):
+        mat1 = adsk.core.Matrix3D.create()
+        mat1.translation = adsk.core.Vector3D.create(t[0] +  offset_x * t[3], -t[1] - offset_y * t[3], 0)
+
+        mat2 = adsk.core.Matrix3D.create()
+        mat2.setToRotation(
+            math.radians(-t[2]),
+            adsk.core.Vector3D.create(0,0,1),
+            adsk.core.Point3D.create(0,0,0)
+        )
+
+        mat2.transformBy(mat1)
+
+        # Bodies of the root component sharing a transform are moved by a single feature
+        oc = adsk.core.ObjectCollection.create()
+
+        for i in indices:
+            if(selections[i].parentComponent == root):
+                oc.add(selections[i])
+            else:
+                # An occurrence is only moved once, even if several of its bodies are selected
+                occurrences.setdefault(selections[i].assemblyContext.entityToken, (selections[i].assemblyContext, mat2))
+
+        if(oc.count):
+            moves.append((oc, mat2))
+
+    with run_log.span("apply", bodies=len(transforms), features=len(moves), occurrences=len(occurrences)):
+        # Recomputes once after all features were added, only parametric designs compute
+        if(des.designType):
+            des.isComputeDeferred = True
+        try:
+            for oc, mat in moves:
+                move_input = root.features.moveFeatures.createInput(oc, mat)
+                last_move = root.features.moveFeatures.add(move_input)
+                if(first_move is None):
+                    first_move = last_move
+
+            for occurrence, mat in occurrences.values():
+                trans = occurrence.transform
+                trans.transformBy(mat)
+                occurrence.transform = trans
+        finally:
+            if(des.designType):
+                des.isComputeDeferred = False
+
+        if(des.designType and des.snapshots.hasPendingSnapshot):
+            des.snapshots.add()
+            if(first_move):
+                des.timeline.timelineGroups.add(first_move.timelineObject.index, last_move.timelineObject.index+1)
+        elif(first_move and not( first_move == last_move) and des.designType):
+            des.timeline.timelineGroups.add(first_move.timelineObject.index, last_move.timelineObject.index)
+
+
+def getStopConditions(inputs):
+    """Conditions that end a nest and apply its best result
 
     Args:
-        sketch: (Sketch) Sketch to convert
+        inputs: (CommandInputs) Inputs of the command
 
     Returns:
-        [str]: Array of SVG paths
+        dict: timeLimit in seconds, generations and stall (generations without a better result), None if not set
     """
 
-    rtn = ""
+    return {
+        "timeLimit": inputs.itemById("ISTimeLimit").value or None,
+        "generations": inputs.itemById("ISGenerations").value or None,
+        "stall": inputs.itemById("ISStall").value or None
+    }
 
-    sortedProfiles = sorted(sketch.profiles, key=lambda x: len(x.profileLoops), reverse=True)
 
-    """for p in sketch.profiles:
-        for pl in p.profileLoops:
+def applyNest():
+    """Applies transform_data as if OK was pressed, used once a stop condition is reached"""
+
+    global nest_command
+
+    if nest_command is not None:
+        nest_command.doExecute(True)
+
 
-            if(pl.isOuter):
-                rtn.append(loopToSVGPath(pl))
-                break
+def getNestSettings(inputs):
+    """Settings that invalidate the placements of a previous nest when changed
+
+    Args:
+        inputs: (CommandInputs) Inputs of the command
+
+    Returns:
+        list: Sheet width and height, spacing and sheet offsets
     """
+    return [inputs.itemById(i).value for i in ("VISheetWidth", "VISheetHeight", "VISpacing", "VISheetOffsetX", "VISheetOffsetY")]
 
 
-    for pl in sortedProfiles[0].profileLoops:
-        # Outer should be clockwise
-        # Inner should be counterclockwise
-        if(pl.isOuter != isLoopClockwise(pl)):
-            rtn += loopToSVGPath(pl, True)
-        else:
-            rtn += loopToSVGPath(pl, False)
+def getSheetOffsets(inputs):
+    """Distance between the origins of neighbouring sheets
+
+    Args:
+        inputs: (CommandInputs) Inputs of the command
+
+    Returns:
+        (float, float): Offset in x and y, 0 if sheets are not laid out in that direction
+    """
 
-    return [rtn]
+    offset_x = 0
+    offset_y = 0
 
+    if(inputs.itemById("VISheetOffsetX").value > 0):
+        offset_x = inputs.itemById("VISheetWidth").value + inputs.itemById("VISheetOffsetX").value
+    elif(inputs.itemById("VISheetOffsetX").value < 0):
+        offset_x = -inputs.itemById("VISheetWidth").value + inputs.itemById("VISheetOffsetX").value
 
-def loopToSVGPath(loop, reverse = False):
-    """Converts a ProfileLoop into a SVG Path date
+    if(inputs.itemById("VISheetOffsetY").value > 0):
+        offset_y = inputs.itemById("VISheetHeight").value + inputs.itemById("VISheetOffsetY").value
+    elif(inputs.itemById("VISheetOffsetY").value < 0):
+        offset_y = -inputs.itemById("VISheetHeight").value + inputs.itemById("VISheetOffsetY").value
+
+    return offset_x, offset_y
+
+
+def getKeptPlacements(selections, fingerprints, inputs, pending=None):
+    """Placements of bodies that don't need to be nested again
+
+    Bodies moved by the last applied nest stay where they are, unless they or
+    the sheet settings changed since. Bodies of a nest that was not applied
+    yet keep their pending placement. Placements are only kept if there are
+    other bodies to nest around them, nesting the same bodies again is a
+    retry for a better result.
 
     Args:
-        loop: (ProfileLoop) Loop to convert
-        reverse: (Bool) Invert direction
+        selections: ([BRepBody]) Selected bodies
+        fingerprints: ([list]) Fingerprint of each body, see getBodyFingerprint
+        inputs: (CommandInputs) Inputs of the command
+        pending: ([(int, float[])]) Transform data of the current nest that was not applied yet, indexed like nest_session
 
     Returns:
-        str: SVG Path data
+        {int: (float[], bool)}: Transform data (x, y, r, sheet) and True if the body is in place already, by body index
     """
-    
-    global SVG_UNIT_FACTOR
 
-    rtn = ""
+    global nest_session
+    global applied_nest
 
-    profileCurves = [i for i in loop.profileCurves]
+    settings = getNestSettings(inputs)
+    kept = {}
 
-    if(reverse):
-        profileCurves.reverse()
+    if(applied_nest is not None and applied_nest["settings"] == settings):
+        offset_x, offset_y = getSheetOffsets(inputs)
+        for i, s in enumerate(selections):
+            record = applied_nest["bodies"].get(s.entityToken)
+            if(record is not None and record["fingerprint"] == fingerprints[i]):
+                # Bodies were moved onto their sheet, which lies offset from the first one
+                sheet = record["sheet"]
+                kept[i] = ([-offset_x * sheet, -offset_y * sheet, 0, sheet], True)
 
-    flip = getWhatCurvesToFlip(profileCurves)
+    if(pending and nest_session is not None and nest_session["settings"] == settings):
+        indices = {s.entityToken: i for i, s in enumerate(selections)}
+        for index, t in pending:
+            i = indices.get(nest_session["tokens"][index])
+            if i is not None:
+                kept[i] = (t, False)
 
-    if(reverse and len(flip) == 1):
-        flip = [not(i) for i in flip]
+    # Nothing was added or changed, all bodies are nested again
+    if(len(kept) == len(selections)):
+        return {}
 
+    return kept
 
-    for c, f in zip(profileCurves, flip):
-        rtn += curveToPathSegment(
-            c,
-            1/SVG_UNIT_FACTOR,
-            f,
-            not rtn
-        )
-    return rtn
 
+def rememberPlacements(selections, transforms, settings):
+    """Records the sheet and fingerprint of bodies after applying a nest, see getKeptPlacements
+
+    Args:
+        selections: ([BRepBody]) Selected bodies
+        transforms: ([(int, float[])]) Applied transform data (x, y, r, sheet) by body index
+        settings: (list) Settings the nest ran with, see getNestSettings
+    """
+
+    global applied_nest
 
-def curveToPathSegment(curve, scale=1, invert=False, moveTo=False):
-    """Converts a ProfileCurve into a SVG Path date segment
+    previous = applied_nest["bodies"] if applied_nest is not None and applied_nest["settings"] == settings else {}
+    sheets = {i: t[3] for i, t in transforms}
+
+    bodies = {}
+    for i, s in enumerate(selections):
+        fingerprint = getBodyFingerprint(s)
+        if i in sheets:
+            bodies[s.entityToken] = {"sheet": sheets[i], "fingerprint": fingerprint}
+        elif(s.entityToken in previous and previous[s.entityToken]["fingerprint"] == fingerprint):
+            bodies[s.entityToken] = previous[s.entityToken]
+
+    applied_nest = {"settings": settings, "bodies": bodies}
+
+
+def hasPythonEngine():
+    """Checks if the Python engine can run, it requires NumPy
+
+    Returns:
+        bool: True if it is available
+    """
+
+    try:
+        from .nestlib import engine
+    except ImportError:
+        return False
+    return True
+
+
+def groupByTransform(transforms, digits=9):
+    """Groups bodies that are moved by the same transform
 
     Args:
-        curve: (ProfileCurve) The curve object to be converted
-        scale: (float) How many units are per SVG unit
-        invert: (bool) Swaps curve's startPoint and endPoint
-        moveTo: (bool) Moves to the startPoint before conversion
+        transforms: ([(int, float[])]) List of index and transform data (x, y, r, sheet)
+        digits: (int) Decimal places transforms are compared at
 
     Returns:
-        str: Segment of SVG Path data.
+        [(float[], int[])]: Transform data and the indices of all bodies using it
+    """
+
+    groups = {}
+
+    for i, t in transforms:
+        key = tuple(round(v, digits) for v in t)
+        if key not in groups:
+            groups[key] = (t, [])
+        groups[key][1].append(i)
 
+    return list(groups.values())
+
+
+def sendDataToPalette(palette, data, action="importSVG"):
+    """Sends data string to pallet
+
+    Args:
+        palette: (Palette) Palette to send data to
+        data: (String) Data string to send to pallete
+        action: (String) Action the palette should perform with the data
     """
+    if palette:
+        palette.sendInfoToHTML(action, data)
 
-    rtn = ""
 
+def getBodyFingerprint(body):
+    """Summarizes the geometry of a body to detect changes since it was cached
 
-    if(curve.geometry.objectType == "adsk::core::Line3D"):
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.startPoint.x / scale,
-                    -curve.geometry.startPoint.y / scale
-                )
+    Args:
+        body: (BRepBody) The body
 
-            rtn += "L{0:.6f} {1:.6f} ".format(
-                curve.geometry.endPoint.x / scale,
-                -curve.geometry.endPoint.y / scale)
+    Returns:
+        list: Volume, bounding box and face count
+    """
 
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.endPoint.x / scale,
-                    -curve.geometry.endPoint.y / scale
-                )
+    bb = body.boundingBox
 
-            rtn += "L{0:.6f} {1:.6f} ".format(
-                curve.geometry.startPoint.x / scale,
-                -curve.geometry.startPoint.y / scale)
-    
-    elif(curve.geometry.objectType == "adsk::core::Arc3D"):
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.startPoint.x / scale,
-                    -curve.geometry.startPoint.y / scale
-                )
+    return [
+        round(body.volume, 9),
+        [round(v, 9) for v in bb.minPoint.asArray()],
+        [round(v, 9) for v in bb.maxPoint.asArray()],
+        body.faces.count
+    ]
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                0,
-                curve.geometry.endPoint.x / scale,
-                -curve.geometry.endPoint.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.endPoint.x / scale,
-                    -curve.geometry.endPoint.y / scale
-                )
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                1,
-                curve.geometry.startPoint.x / scale,
-                -curve.geometry.startPoint.y / scale
-            )
-    
-    elif(curve.geometry.objectType == "adsk::core::Circle3D"):
-        sp = curve.geometry.center.copy()
-        sp.translateBy(adsk.core.Vector3D.create(curve.geometry.radius, 0, 0))
+def buildSVGFromParts(parts, width=50, height=25, quantities=None, hashes=None, rotations=None):
+    """Constructs a full svg fle from part outlines
 
-        ep = curve.geometry.center.copy()
-        ep.translateBy(adsk.core.Vector3D.create(0, curve.geometry.radius, 0))
+    Args:
+        parts: (outline.Part[]) Part outlines, their index is used as path id
+        width: (float) Width ouf bounding rectangle
+        height: (float) Height of bounding rectangle
+        quantities: ({int: int}) Number of copies per part index, 1 if missing
+        hashes: ({int: str}) Shape hash per part index, see outline.Part.shapeHash
+        rotations: ({int: [(int, int)]}) Allowed rotations per part index, see getAllowedRotations
 
-        if(not invert):
+    Returns:
+        [string]: full svg
 
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
+    """
+    global SVG_UNIT_FACTOR
 
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                1,
-                1,
-                ep.x / scale,
-                -ep.y / scale
-            )
+    return outline.buildSVG(parts, width, height, SVG_UNIT_FACTOR, quantities, hashes, rotations)
 
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                0,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
 
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
+def getAllowedRotations(parts, inputs, tolerance=CHORD_TOLERANCE):
+    """Finds the rotations at which each part can fit the sheet
 
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                0,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
+    Args:
+        parts: (outline.Part[]) Part outlines
+        inputs: (CommandInputs) Inputs of the command
+        tolerance: (float) Chord tolerance the outlines were built with
 
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                1,
-                0,
-                sp.x / scale,
-                -sp.y / scale
-            )
+    Returns:
+        {int: [(int, int)]}: Ranges of rotation indices per part index, empty if a part fits at no rotation.
+            See feasibility.fittingRotations
+    """
+
+    global SVG_UNIT_FACTOR
+
+    rtn = {}
+    for p in parts:
+        polygon = p.outerPolygon(tolerance * SVG_UNIT_FACTOR)
+        rtn[p.index] = feasibility.fittingRotations(
+            polygon or [],
+            inputs.itemById("ISRotations").value,
+            inputs.itemById("VISheetWidth").value * SVG_UNIT_FACTOR,
+            inputs.itemById("VISheetHeight").value * SVG_UNIT_FACTOR,
+            inputs.itemById("VISpacing").value * SVG_UNIT_FACTOR
+        )
+    return rtn
+
+
+def getTransformsFromSVG(svg, groups=None):
+    """Imports SVG result from svgnest and extracts transform data
+
+    Args:
+        svg: (String) SVG data
+        groups: ([[(int, float, float, float)]]) Identical parts, placements of copies are mapped to all bodies of a group
 
+    Returns:
+        [(int, float[])]: List of index and transform data (x, y, r, sheet)
+    """
+
+    global SVG_UNIT_FACTOR
+
+    transforms = svgresult.readPlacements(svg, SVG_UNIT_FACTOR)
+
+    if groups:
+        transforms = duplicates.expandPlacements(transforms, groups, SVG_UNIT_FACTOR)
+
+    return transforms
     
-    elif(curve.geometry.objectType == "adsk::core::Ellipse3D"):
-        sp = curve.geometry.center.copy()
-        la = curve.geometry.majorAxis.copy()
-        la.normalize()
-        la.scaleBy(curve.geometry.majorRadius)
-        sp.translateBy(la)
-
-        ep = curve.geometry.center.copy()
-        sa = adsk.core.Vector3D.crossProduct(curve.geometry.majorAxis, adsk.core.Vector3D.create(0,0,1))
-        sa.normalize()
-        sa.scaleBy(curve.geometry.minorRadius)
-        ep.translateBy(sa)
-        
-        angle = -math.degrees(math.atan2(la.y, la.x))
 
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
+def sketchToPart(sketch, index=0, tolerance=CHORD_TOLERANCE):
+    """Converts a Sketch into a part outline
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                1,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
+    Args:
+        sketch: (Sketch) Sketch to convert
+        index: (int) Index of the body in the selection
+        tolerance: (float) Chord tolerance for curves approximated by line segments
 
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                0,
-                0,
-                sp.x / scale,
-                -sp.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
+    Returns:
+        outline.Part: Outline of the part
+    """
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                0,
-                1,
-                ep.x / scale,
-                -ep.y / scale
-            )
+    sortedProfiles = sorted(sketch.profiles, key=lambda x: len(x.profileLoops), reverse=True)
 
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                1,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
+    return loopsToPart(sortedProfiles[0].profileLoops, index, tolerance)
 
 
-    elif(curve.geometry.objectType == "adsk::core::EllipticalArc3D"):
-        angle = -math.degrees(math.atan2(curve.geometry.majorAxis.y, curve.geometry.majorAxis.x))
+def bodyToPart(body, index=0, tolerance=CHORD_TOLERANCE):
+    """Converts the outline of a body into a part outline without creating a sketch
 
-        _, sp, ep = curve.geometry.evaluator.getEndPoints()
+    Args:
+        body: (BRepBody) Body to convert
+        index: (int) Index of the body in the selection
+        tolerance: (float) Chord tolerance for curves approximated by line segments
 
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
+    Returns:
+        outline.Part: Outline of the part, None if the body has no face describing its outline
+    """
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    ep.x / scale,
-                    -ep.y / scale
-                )
+    face = getOutlineFace(body)
+    if face is None:
+        return None
 
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
+    return loopsToPart(face.loops, index, tolerance)
 
-    elif(curve.geometry.objectType == "adsk::core::NurbsCurve3D"):
-        # Aproximates nurbs with straight line segments
 
-        ev = curve.geometry.evaluator
-        _, sp, ep = ev.getParameterExtents()
+def loopsToPart(loops, index=0, tolerance=CHORD_TOLERANCE):
+    """Converts the loops of a profile or face into a part outline
 
-        # List of segments, initially subdivided into two segments
-        s = [sp, lerp(sp, ep, 0.5), ep]
-        
-        # Maxiumum angle two neighboring segments can have 
-        maxAngle = math.radians(10)
+    Args:
+        loops: (ProfileLoops | BRepLoops) Loops to convert
+        index: (int) Index of the body in the selection
+        tolerance: (float) Chord tolerance for curves approximated by line segments
 
-        # Minimum length of segment
-        minLength = 0.05
+    Returns:
+        outline.Part: Outline of the part
+    """
 
-        i = 0
-        while(i < len(s)-1):
-            _, t = ev.getTangents(s)
-            _, p = ev.getPointsAtParameters(s)
+    global SVG_UNIT_FACTOR
 
-            # If the angle to the next segment is small enough, move one
-            if( t[i].angleTo( t[i+1]) < maxAngle or p[i].distanceTo(p[i+1]) < minLength):
-                i += 1
-            # Otherwise subdivide the next segment into two
-            else:
-                s.insert(i+1, lerp( s[i], s[i+1], 0.5))
+    part = outline.Part(index)
 
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    p[0].x / scale,
-                    -p[0].y / scale
-                )
-            for i in p[1:]:
-                rtn += "L{0:.6f} {1:.6f} ".format(
-                    i.x / scale,
-                    -i.y / scale
-                )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    p[-1].x / scale,
-                    -p[-1].y / scale
-                )
-            for i in reversed(p[:-1]):
-                rtn += "L{0:.6f} {1:.6f} ".format(
-                    i.x / scale,
-                    -i.y / scale
-                )
+    for l in loops:
+        # Outer should be clockwise
+        # Inner should be counterclockwise
+        part.loops.append(curves.loopToOutline(readLoop(l, tolerance), 1/SVG_UNIT_FACTOR))
+
+    return part
 
-    else:
-        print("Warning: Unsupported curve type, could not be converted: {}".format(curve.geometryType))
-    return rtn
 
+def getOutlineFace(body, tol=1e-4):
+    """Finds a planar face parallel to the XY plane that matches the outline of a body
 
-def isLoopClockwise(loop):
-    """Determins if a ProfileLoop is clockwise
+    Only faces spanning the full XY extent of the body are considered. Of those
+    the one with the largest area is picked, as blind pockets and counterbores
+    reduce the area of a face without being part of the outline.
 
     Args:
-        loop: (ProfileLoop) The loop to check
+        body: (BRepBody) The body
+        tol: (float) Tolerance for normal and extent comparisons
 
     Returns:
-        bool: True if clockwise.
+        BRepFace: The face, None if there is no suitable face
     """
 
-    # If if it has only one segment it is clockwise by definition
-    if(len(loop.profileCurves) == 1):
-        return False;
+    bodyBox = body.boundingBox
+    best = None
 
-    # https://stackoverflow.com/questions/1165647/how-to-determine-if-a-list-of-polygon-points-are-in-clockwise-order
-    res = 0
+    for face in body.faces:
+        if(face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType):
+            continue
 
-    sp = [getStartPoint(i.geometry) for i in loop.profileCurves]
-    ep = [getEndPoint(i.geometry) for i in loop.profileCurves]
-    
+        normal = face.geometry.normal
+        if(abs(normal.x) > tol or abs(normal.y) > tol):
+            continue
 
-    # range(len()) one of the deally sins of python
-    for s, e in zip(sp, ep):
-        res += (e.x - s.x) * (e.y + s.y)
+        faceBox = face.boundingBox
+        if(not (
+            math.isclose(faceBox.minPoint.x, bodyBox.minPoint.x, abs_tol=tol) and
+            math.isclose(faceBox.minPoint.y, bodyBox.minPoint.y, abs_tol=tol) and
+            math.isclose(faceBox.maxPoint.x, bodyBox.maxPoint.x, abs_tol=tol) and
+            math.isclose(faceBox.maxPoint.y, bodyBox.maxPoint.y, abs_tol=tol)
+        )):
+            continue
 
-    return res > 0
+        if(best is None or face.area > best.area):
+            best = face
 
+    return best
 
-def getWhatCurvesToFlip(curves):
-    """Determins which ProfileCurves need their startPoint and endPoint flipped to line up end to end
+
+def getLoopCurves(loop):
+    """Gets the curves of a ProfileLoop or BRepLoop in order
 
     Args:
-        curves: (ProfileCurves) The List of points to check agains
+        loop: (ProfileLoop | BRepLoop) The loop
 
     Returns:
-        bool[]: List of bools of equal length to curves.
+        [ProfileCurve | BRepEdge]: Curves, each providing a geometry attribute
     """
 
-    if(len(curves)==1):
-        return [False]
-    else:
-        rtn = []
-
-        for i in range(len(curves)):
-            if(i==0):
-                rtn.append(
-                    isPointInList(
-                        getStartPoint(curves[i].geometry),
-                        [getStartPoint(curves[1].geometry), getEndPoint(curves[1].geometry)]
-                    )
-                )
-            else:
-                rtn.append(
-                    not isPointInList(
-                        getStartPoint(curves[i].geometry),
-                        [getStartPoint(curves[i-1].geometry), getEndPoint(curves[i-1].geometry)]
-                        )
-                )
-        return rtn
+    if(loop.objectType == "adsk::fusion::BRepLoop"):
+        return [i.edge for i in loop.coEdges]
+    return [i for i in loop.profileCurves]
 
 
-def getStartPoint(curve):
-    """Gets the start point of any Curve3D object
+def readLoop(loop, tolerance=CHORD_TOLERANCE):
+    """Reads a ProfileLoop or BRepLoop into a snapshot, reading every curve only once
 
     Args:
-        curves: (Curve3D) The curve
+        loop: (ProfileLoop | BRepLoop) The loop
+        tolerance: (float) Chord tolerance for curves approximated by line segments
 
     Returns:
-        Point3D: Start point of the curve
+        curves.CurveLoop: Snapshot of the loop
     """
+    return curves.CurveLoop([readCurve(c.geometry, tolerance) for c in getLoopCurves(loop)], loop.isOuter)
 
-    if(curve.objectType in ["adsk::core::Line3D", "adsk::core::Arc3D"]):
-        return curve.startPoint
 
-    elif(curve.objectType == "adsk::core::Circle3D"):
-        sp = curve.center.copy()
-        sp.translateBy(adsk.core.Vector3D.create(curve.radius, 0, 0))
-        return sp
+def readCurve(geometry, tolerance=CHORD_TOLERANCE):
+    """Reads the geometry of a curve into a snapshot
+
+    Args:
+        geometry: (Curve3D) Geometry of a ProfileCurve or BRepEdge
+        tolerance: (float) Chord tolerance for curves approximated by line segments
+
+    Returns:
+        curves.Curve: Snapshot of the curve
+    """
+
+    kind = geometry.objectType
+
+    if(kind == "adsk::core::Line3D"):
+        sp = geometry.startPoint
+        ep = geometry.endPoint
+        return curves.Curve(curves.LINE, (sp.x, sp.y), (ep.x, ep.y))
+
+    elif(kind == "adsk::core::Arc3D"):
+        sp = geometry.startPoint
+        ep = geometry.endPoint
+        r = geometry.radius
+
+        # Arcs of B-Rep edges may run clockwise around the Z axis
+        return curves.Curve(
+            curves.ARC,
+            (sp.x, sp.y),
+            (ep.x, ep.y),
+            (r, r),
+            sweep=geometry.endAngle - geometry.startAngle,
+            clockwise=geometry.normal.z < 0
+        )
+
+    elif(kind == "adsk::core::Circle3D"):
+        center = geometry.center
+        cx, cy = center.x, center.y
+        r = geometry.radius
+
+        sp = (cx + r, cy)
+        return curves.Curve(curves.CIRCLE, sp, sp, (r, r), points=[(cx, cy + r)])
+
+    elif(kind == "adsk::core::Ellipse3D"):
+        center = geometry.center
+        axis = geometry.majorAxis
+        ax, ay, az = axis.x, axis.y, axis.z
+        major = geometry.majorRadius
+        minor = geometry.minorRadius
+
+        # Ends of the major axis and of the minor axis, turned clockwise from it
+        length = math.sqrt(ax * ax + ay * ay + az * az)
+        sp = (center.x + ax / length * major, center.y + ay / length * major)
+        length = math.hypot(ax, ay)
+        ep = (center.x + ay / length * minor, center.y - ax / length * minor)
+
+        return curves.Curve(curves.ELLIPSE, sp, sp, (major, minor), -math.degrees(math.atan2(ay, ax)), points=[ep])
+
+    elif(kind == "adsk::core::EllipticalArc3D"):
+        _, sp, ep = geometry.evaluator.getEndPoints()
+        axis = geometry.majorAxis
+
+        return curves.Curve(
+            curves.ELLIPTICAL_ARC,
+            (sp.x, sp.y),
+            (ep.x, ep.y),
+            (geometry.majorRadius, geometry.minorRadius),
+            -math.degrees(math.atan2(axis.y, axis.x)),
+            geometry.endAngle - geometry.startAngle,
+            geometry.normal.z < 0
+        )
+
+    elif(kind == "adsk::core::NurbsCurve3D"):
+        # Aproximates nurbs with straight line segments
+        points = tessellateCurve(geometry.evaluator, tolerance)
+        return curves.Curve(curves.POLYLINE, points[0], points[-1], points=points)
 
-    elif(curve.objectType == "adsk::core::Ellipse3D"):
-        sp = curve.center.copy()
-        la = curve.majorAxis.copy()
-        la.normalize()
-        la.scaleBy(curve.majorRadius)
-        sp.translateBy(la)
-        return sp
+    # Unsupported curves still connect the loop, but are left out of the path
+    _, sp, ep = geometry.evaluator.getEndPoints()
+    return curves.Curve(kind, (sp.x, sp.y), (ep.x, ep.y))
 
-    elif(curve.objectType in ["adsk::core::EllipticalArc3D", "adsk::core::NurbsCurve3D"]):
-        _, sp, ep = curve.evaluator.getEndPoints()
-        return sp
 
+def tessellateCurve(evaluator, tolerance=CHORD_TOLERANCE, initialSegments=4, maxPasses=16):
+    """Approximates a curve with line segments that stay within a chord tolerance
 
-def getEndPoint(curve):
-    """Gets the end point of any Curve3D object
+    Segments are split at their parameter midpoint until the midpoint is within
+    tolerance of the chord. Every parameter is evaluated only once and all
+    midpoints of a refinement pass are evaluated in a single API call.
 
     Args:
-        curves: (Curve3D) The curve
+        evaluator: (CurveEvaluator3D) Evaluator of the curve
+        tolerance: (float) Maximum distance between curve and segments
+        initialSegments: (int) Number of uniform segments to start with
+        maxPasses: (int) Maximum number of refinement passes
 
     Returns:
-        Point3D: End point of the curve
+        [(float, float)]: Points along the curve, including start and end point
     """
 
-    if(curve.objectType in ["adsk::core::Line3D", "adsk::core::Arc3D"]):
-        return curve.endPoint
+    _, sp, ep = evaluator.getParameterExtents()
 
-    elif(curve.objectType == "adsk::core::Circle3D"):
-        ep = curve.center.copy()
-        ep.translateBy(adsk.core.Vector3D.create(curve.radius, 0, 0))
-        return ep
+    params = [lerp(sp, ep, i/initialSegments) for i in range(initialSegments+1)]
+    _, p = evaluator.getPointsAtParameters(params)
+    points = [(i.x, i.y) for i in p]
 
-    elif(curve.objectType == "adsk::core::Ellipse3D"):
-        ep = curve.center.copy()
-        la = curve.majorAxis.copy()
-        la.normalize()
-        la.scaleBy(curve.majorRadius)
-        ep.translateBy(la)
-        return ep
+    # Indices of segments that still need to be checked
+    pending = list(range(initialSegments))
 
-    elif(curve.objectType in ["adsk::core::EllipticalArc3D", "adsk::core::NurbsCurve3D"]):
-        _, sp, ep = curve.evaluator.getEndPoints()
-        return ep
+    for _ in range(maxPasses):
+        if(not pending):
+            break
 
+        mids = [lerp(params[i], params[i+1], 0.5) for i in pending]
+        _, p = evaluator.getPointsAtParameters(mids)
 
-def isPointInList(point, pointList, tol=1e-4):
-    """Determins if a Point3D is almost-equal to a Point3D in a list
+        split = {}
+        for i, m, mp in zip(pending, mids, p):
+            if(chordDeviation(points[i], points[i+1], (mp.x, mp.y)) > tolerance):
+                split[i] = (m, (mp.x, mp.y))
+
+        # Rebuilds the lists in one pass instead of inserting into them
+        newParams = []
+        newPoints = []
+        pending = []
+        for i in range(len(params)):
+            newParams.append(params[i])
+            newPoints.append(points[i])
+            if(i in split):
+                pending.append(len(newParams)-1)
+                pending.append(len(newParams))
+                newParams.append(split[i][0])
+                newPoints.append(split[i][1])
+
+        params = newParams
+        points = newPoints
+
+    return points
+
+
+def chordDeviation(a, b, p):
+    """Distance of a point from the chord between two points
 
     Args:
-        point: (Point3D) The Point to be checked
-        pointList: (Point3D[]) The List of points to check agains
-        tol: (float) Tollerance for almost-equality
+        a: ((float, float)) Start of the chord
+        b: ((float, float)) End of the chord
+        p: ((float, float)) Point
 
     Returns:
-        bool: True if almost equal to any Point in list
+        float: Distance
     """
 
-    for i in pointList:
-        if(isPointEqual(point, i, tol)):
-            return True
-    return False
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    length = math.hypot(dx, dy)
+
+    if(length == 0):
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+
+    return abs(dx * (p[1] - a[1]) - dy * (p[0] - a[0])) / length
+
+
+def getChordTolerance(spacing):
+    """Tolerance for approximating curves, derived from the spacing between parts
+
+    Args:
+        spacing: (float) Spacing between parts
+
+    Returns:
+        float: Chord tolerance
+    """
+    return min(max(spacing * CHORD_TOLERANCE_SPACING_FACTOR, CHORD_TOLERANCE), CHORD_TOLERANCE_MAX)
 
 
-def isPointEqual(point1, point2, tol=1e-4):
-    """Determins if a Point3D is almost-equal to a Point3D in a list
+def getSimplifyTolerance(spacing):
+    """Maximum growth of outlines when removing vertices, derived from the spacing between parts
 
     Args:
-        point1: (Point3D) The Point to be checked
-        point2: (Point3D) The Points to check agains
-        tol: (float) Tollerance for almost-equality
+        spacing: (float) Spacing between parts
 
     Returns:
-        bool: True if almost equal to point
+        float: Simplification tolerance
     """
-    return math.isclose(point1.x, point2.x, rel_tol=tol) and math.isclose(point1.y, point2.y, rel_tol=tol) and math.isclose(point1.z, point2.z, rel_tol=tol)
+    return min(max(spacing * SIMPLIFY_TOLERANCE_SPACING_FACTOR, SIMPLIFY_TOLERANCE), SIMPLIFY_TOLERANCE_MAX)
 
 
 def lerp(a, b, i):
@@ -904,9 +1740,17 @@ def lerp(a, b, i):
     return a + (b-a)*i
 
 
+def setWorkerExecutable():
+    """Starts the processes of NEST_WORKERS with NEST_PYTHON, done once when the add-in starts"""
+
+    if(NEST_WORKERS > 1 and NEST_PYTHON is not None):
+        multiprocessing.set_executable(NEST_PYTHON)
+
+
 def run(context):
     try:
-        
+        setWorkerExecutable()
+
         app = adsk.core.Application.get()
         ui = app.userInterface
         
@@ -926,6 +1770,12 @@ def run(context):
         onCommandCreated = CommandCreatedHandler()
         cmdDef.commandCreated.add(onCommandCreated)
         _handlers.append(onCommandCreated)
+
+        # The Python engine reports from a worker thread through this event
+        nestEvent = app.registerCustomEvent(NEST_EVENT_ID)
+        onNestEvent = NestEventHandler()
+        nestEvent.add(onNestEvent)
+        _handlers.append(onNestEvent)
     except:
         print(traceback.format_exc())
 
@@ -943,6 +1793,12 @@ def stop(context):
             
         #Deletes the commandDefinition
         ui.commandDefinitions.itemById(COMMAND_ID).deleteMe()
+
+        global nest_job
+        if nest_job is not None:
+            nest_job.cancel()
+            nest_job = None
+        app.unregisterCustomEvent(NEST_EVENT_ID)
             
             
             
@@ -25,6 +25,13 @@
 		var binPolygon = null;
 		var binBounds = null;
 		var nfpCache = {};
+		
+		// no-fit polygons persisted by fusion, keyed by persistentKey
+		var nfpStore = {};
+		// no-fit polygons computed since the last takenfpstore
+		var nfpStoreNew = {};
+		var binHash = null;
+		
 		var config = {
 			clipperScale: 10000000,
 			curveTolerance: 0.3, 
@@ -74,6 +81,172 @@
 			return svg;
 		}
 		
+		// loads pre-flattened polygons instead of parsing svg, see buildPolygonPayload in nestlib/outline.py
+		// data: {width, height, parts: [{id, quantity, hash, rotations, polygons: [base64 float32 x,y arrays]}]}
+		this.loadpolygons = function(data){
+			this.stop();
+			
+			bin = null;
+			binPolygon = null;
+			tree = null;
+			
+			var ns = 'http://www.w3.org/2000/svg';
+			
+			svg = document.createElementNS(ns, 'svg');
+			svg.setAttribute('viewBox', '0 0 '+data.width+' '+data.height);
+			svg.setAttribute('width', data.width + 'px');
+			svg.setAttribute('height', data.height + 'px');
+			
+			this.style = null;
+			
+			// the first element is the sheet
+			var rect = document.createElementNS(ns, 'rect');
+			rect.setAttribute('width', data.width);
+			rect.setAttribute('height', data.height);
+			rect.setAttribute('stroke', 'black');
+			rect.setAttribute('stroke-width', '2');
+			rect.setAttribute('fill-opacity', '0');
+			svg.appendChild(rect);
+			
+			for(var i=0; i<data.parts.length; i++){
+				var part = data.parts[i];
+				
+				for(var copy=0; copy<(part.quantity || 1); copy++){
+					for(var j=0; j<part.polygons.length; j++){
+						var coords = decodeFloats(part.polygons[j]);
+						var polygon = [];
+						var points = [];
+						
+						for(var k=0; k+1<coords.length; k+=2){
+							polygon.push({x: coords[k], y: coords[k+1]});
+							points.push(coords[k] + ',' + coords[k+1]);
+						}
+						
+						var element = document.createElementNS(ns, 'polygon');
+						element.setAttribute('points', points.join(' '));
+						element.setAttribute('id', part.id);
+						element.setAttribute('data-copy', copy);
+						if(part.hash){
+							element.setAttribute('data-hash', part.hash);
+						}
+						if(part.rotations !== null && part.rotations !== undefined){
+							element.setAttribute('data-rotations', part.rotations);
+						}
+						element.setAttribute('stroke', 'black');
+						element.setAttribute('fill', 'green');
+						element.setAttribute('stroke-width', '2');
+						element.setAttribute('fill-opacity', '0.5');
+						
+						// picked up by getParts, so the points attribute is never parsed
+						element.polygon = polygon;
+						
+						svg.appendChild(element);
+					}
+				}
+			}
+			
+			tree = this.getParts(svg.childNodes);
+			
+			return svg;
+		}
+		
+		// reads "start-end start-end" ranges of rotation indices, null if all rotations are allowed
+		function getRotationRanges(attribute){
+			if(attribute === null || attribute === undefined){
+				return null;
+			}
+			
+			var ranges = [];
+			var items = attribute.split(' ');
+			for(var i=0; i<items.length; i++){
+				if(items[i]){
+					var range = items[i].split('-');
+					ranges.push([parseInt(range[0]), parseInt(range[1])]);
+				}
+			}
+			return ranges;
+		}
+		
+		function decodeFloats(data){
+			var binary = atob(data);
+			var bytes = new Uint8Array(binary.length);
+			for(var i=0; i<binary.length; i++){
+				bytes[i] = binary.charCodeAt(i);
+			}
+			return new Float32Array(bytes.buffer);
+		}
+		
+		// data: {bin: shape hash of the sheet, entries: {key: [[x0, y0, x1, y1, ...], ...]}}
+		this.setnfpstore = function(data){
+			nfpStore = (data && data.entries) || {};
+			binHash = (data && data.bin) || null;
+			nfpStoreNew = {};
+		}
+		
+		// returns the no-fit polygons computed since the last call, so fusion can persist them
+		this.takenfpstore = function(){
+			var rtn = nfpStoreNew;
+			nfpStoreNew = {};
+			return rtn;
+		}
+		
+		function persistentKey(A, B, key){
+			if(!A.hash || !B.hash){
+				return null;
+			}
+			return [A.hash, key.Arotation, B.hash, key.Brotation, key.inside ? 1 : 0, config.spacing, config.exploreConcave ? 1 : 0, config.useHoles ? 1 : 0].join(':');
+		}
+		
+		// stored nfps are relative to the bounds of A and B instead of A's position and B's first point,
+		// so they stay valid when the parts are moved or their points start elsewhere
+		function persistentOffset(A, B, key){
+			var a = GeometryUtil.getPolygonBounds(rotatePolygon(A, key.Arotation));
+			var rotatedB = rotatePolygon(B, key.Brotation);
+			var b = GeometryUtil.getPolygonBounds(rotatedB);
+			return {x: a.x + rotatedB[0].x - b.x, y: a.y + rotatedB[0].y - b.y};
+		}
+		
+		function loadStoredNfp(A, B, key){
+			var pkey = persistentKey(A, B, key);
+			var stored = pkey ? nfpStore[pkey] : null;
+			if(!stored){
+				return null;
+			}
+			
+			var offset = persistentOffset(A, B, key);
+			var nfp = [];
+			for(var i=0; i<stored.length; i++){
+				var polygon = [];
+				for(var j=0; j+1<stored[i].length; j+=2){
+					polygon.push({x: stored[i][j] + offset.x, y: stored[i][j+1] + offset.y});
+				}
+				nfp.push(polygon);
+			}
+			
+			nfpCache[JSON.stringify(key)] = nfp;
+			return nfp;
+		}
+		
+		function storeNfp(A, B, key, nfp){
+			var pkey = persistentKey(A, B, key);
+			if(!pkey){
+				return;
+			}
+			
+			var offset = persistentOffset(A, B, key);
+			var flat = [];
+			for(var i=0; i<nfp.length; i++){
+				var polygon = [];
+				for(var j=0; j<nfp[i].length; j++){
+					polygon.push(nfp[i][j].x - offset.x, nfp[i][j].y - offset.y);
+				}
+				flat.push(polygon);
+			}
+			
+			nfpStore[pkey] = flat;
+			nfpStoreNew[pkey] = {shapes: [A.hash, B.hash], nfp: flat};
+		}
+		
 		this.setbin = function(element){
 			if(!svg){
 				return;
@@ -137,6 +310,16 @@
 			// build tree without bin
 			tree = this.getParts(parts.slice(0));
 			
+			// shape hashes identify parts in the persistent nfp store
+			for(i=0; i<tree.length; i++){
+				tree[i].hash = parts[tree[i].source].getAttribute('data-hash');
+			}
+			
+			// rotations that can fit the sheet, precomputed by nestlib/feasibility.py
+			for(i=0; i<tree.length; i++){
+				tree[i].rotations = getRotationRanges(parts[tree[i].source].getAttribute('data-rotations'));
+			}
+			
 			offsetTree(tree, 0.5*config.spacing, this.polygonOffset.bind(this));
 
 			// offset tree recursively
@@ -172,6 +355,7 @@
 			}
 						
 			binPolygon.id = -1;
+			binPolygon.hash = binHash;
 			
 			// put bin on origin
 			var xbinmax = binPolygon[0].x;
@@ -295,24 +479,32 @@
 			var nfpPairs = [];
 			var key;
 			var newCache = {};
+			var cached;
+			
+			// polygons by id, to persist the generated nfps
+			var polygons = {};
+			polygons[binPolygon.id] = binPolygon;
 			
 			for(i=0; i<placelist.length; i++){
 				var part = placelist[i];
+				polygons[part.id] = part;
 				key = {A: binPolygon.id, B: part.id, inside: true, Arotation: 0, Brotation: rotations[i]};
-				if(!nfpCache[JSON.stringify(key)]){
+				cached = nfpCache[JSON.stringify(key)] || loadStoredNfp(binPolygon, part, key);
+				if(!cached){
 					nfpPairs.push({A: binPolygon, B: part, key: key});
 				}
 				else{
-					newCache[JSON.stringify(key)] = nfpCache[JSON.stringify(key)]
+					newCache[JSON.stringify(key)] = cached;
 				}
 				for(j=0; j<i; j++){
 					var placed = placelist[j];
 					key = {A: placed.id, B: part.id, inside: false, Arotation: rotations[j], Brotation: rotations[i]};
-					if(!nfpCache[JSON.stringify(key)]){
+					cached = nfpCache[JSON.stringify(key)] || loadStoredNfp(placed, part, key);
+					if(!cached){
 						nfpPairs.push({A: placed, B: part, key: key});
 					}
 					else{
-						newCache[JSON.stringify(key)] = nfpCache[JSON.stringify(key)]
+						newCache[JSON.stringify(key)] = cached;
 					}
 				}
 			}
@@ -521,6 +713,7 @@
 							// a null nfp means the nfp could not be generated, either because the parts simply don't fit or an error in the nfp algo
 							var key = JSON.stringify(Nfp.key);
 							nfpCache[key] = Nfp.value;
+							storeNfp(polygons[Nfp.key.A], polygons[Nfp.key.B], Nfp.key, Nfp.value);
 						}
 					}
 				}
@@ -592,7 +785,7 @@
 			
 			var numChildren = paths.length;
 			for(i=0; i<numChildren; i++){
-				var poly = SvgParser.polygonify(paths[i]);
+				var poly = paths[i].polygon ? paths[i].polygon.slice(0) : SvgParser.polygonify(paths[i]);
 				poly = this.cleanPolygon(poly);
 				
 				// todo: warn user if poly could not be processed and is excluded from the nest
@@ -832,6 +1025,10 @@
 	// returns a random angle of insertion
 	GeneticAlgorithm.prototype.randomAngle = function(part){
 		
+		if(part.rotations){
+			return this.randomAngleInRanges(part);
+		}
+		
 		var angleList = [];
 		for(var i=0; i<Math.max(this.config.rotations,1); i++){
 			angleList.push(i*(360/this.config.rotations));
@@ -861,6 +1058,31 @@
 		return 0;
 	}
 	
+	// same as randomAngle, but only picks from the precomputed ranges of rotations that can fit the bin
+	// a few random picks are tried, so large rotation counts don't build and shuffle a list of all angles
+	GeneticAlgorithm.prototype.randomAngleInRanges = function(part){
+		var total = 0;
+		for(var i=0; i<part.rotations.length; i++){
+			total += part.rotations[i][1] - part.rotations[i][0];
+		}
+		
+		for(var attempt=0; attempt<Math.min(total, 16); attempt++){
+			var n = Math.floor(Math.random()*total);
+			for(i=0; n >= part.rotations[i][1] - part.rotations[i][0]; i++){
+				n -= part.rotations[i][1] - part.rotations[i][0];
+			}
+			
+			var angle = (part.rotations[i][0] + n)*(360/this.config.rotations);
+			var rotatedPart = GeometryUtil.rotatePolygon(part, angle);
+			
+			if(rotatedPart.width < this.binBounds.width && rotatedPart.height < this.binBounds.height){
+				return angle;
+			}
+		}
+		
+		return 0;
+	}
+	
 	// returns a mutated individual with the given mutation rate
 	GeneticAlgorithm.prototype.mutate = function(individual){
 		var clone = {placement: individual.placement.slice(0), rotation: individual.rotation.slice(0)};
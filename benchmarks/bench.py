@@ -0,0 +1,300 @@
+"""Benchmarks of the outline conversion outside of Fusion360
+
+Runs the conversion functions of FuseNest.py against a fake adsk module
+with synthetic parts of increasing size. Results are written to a JSON
+file, and can be compared with the results of another version:
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --compare benchmarks/results/<commit>.json
+
+The number of adsk API calls per conversion is recorded as well, as each
+of them is a roundtrip into Fusion360 that the fake module doesn't cost.
+If NumPy is installed, one generation of the Python engine is timed with
+1, 2, 4 and 8 worker processes, as far as there are CPUs for them.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import types
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+sys.path.insert(0, os.path.join(HERE, "fakeadsk"))
+sys.path.insert(0, HERE)
+
+import corpus  # noqa: E402
+
+
+# Results slower than this factor compared to the baseline are flagged
+REGRESSION_FACTOR = 1.2
+
+# Numbers of worker processes the Python engine is benchmarked with, as far as there are CPUs for them
+ENGINE_WORKERS = (1, 2, 4, 8)
+
+
+def loadAddin():
+    """Imports FuseNest.py as part of a package, as Fusion360 does
+
+    Returns:
+        module: The add-in module
+    """
+
+    package = types.ModuleType("FuseNestBench")
+    package.__path__ = [ROOT]
+    sys.modules["FuseNestBench"] = package
+    return importlib.import_module("FuseNestBench.FuseNest")
+
+
+def measure(function, repeat=3):
+    """Best run time of a function
+
+    Args:
+        function: (callable) Function without arguments
+        repeat: (int) Number of runs
+
+    Returns:
+        float: Run time in seconds
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmarks(fn, quick=False):
+    """Yields the benchmarks as name, size and function
+
+    Args:
+        fn: (module) The add-in module
+        quick: (bool) Only run the smallest sizes
+    """
+
+    from FuseNestBench.nestlib import curves, outline
+
+    vertexCounts = (16, 128) if quick else (16, 128, 1024, 8192)
+    partCounts = (10, 100) if quick else (10, 100, 1000)
+
+    for n in vertexCounts:
+        loop = corpus.polygonLoop(n)
+        snapshot = fn.readLoop(loop)
+        yield "readLoop", n, lambda: fn.readLoop(loop)
+        shuffled = list(snapshot.curves)
+        random.Random(n).shuffle(shuffled)
+        yield "chainCurves", n, lambda: curves.chainCurves(snapshot.curves)
+        yield "chainCurves[shuffled]", n, lambda: curves.chainCurves(shuffled)
+        yield "loopToOutline", n, lambda: curves.loopToOutline(fn.readLoop(loop), 1 / fn.SVG_UNIT_FACTOR)
+
+        splines = corpus.splineLoop(max(1, n // 16))
+        yield "loopToOutline[nurbs]", n, lambda: curves.loopToOutline(fn.readLoop(splines), 1 / fn.SVG_UNIT_FACTOR)
+
+        sketch = corpus.sketch(n)
+        yield "sketchToPart", n, lambda: fn.sketchToPart(sketch)
+
+    # Every curve type on its own, 1000 curves per run
+    rounded = corpus.roundedRectangleLoop(3, 2, 0.5)
+    samples = {
+        "line": rounded.profileCurves[1],
+        "arc": rounded.profileCurves[0],
+        "circle": corpus.circleLoop(1).profileCurves[0],
+        "ellipse": corpus.ellipseLoop(1, 0.5).profileCurves[0],
+        "ellipticalArc": corpus.ellipticalArcLoop(1, 0.5).profileCurves[0],
+        "nurbs": corpus.splineLoop(4).profileCurves[0]
+    }
+    for name, curve in samples.items():
+        def convert(curve=curve):
+            loop = outline.Loop()
+            for _ in range(1000):
+                curves.curveToPathSegment(fn.readCurve(curve.geometry), loop, 1 / fn.SVG_UNIT_FACTOR, False, True)
+        yield "curveToPathSegment[{}]".format(name), 1000, convert
+
+    for n in partCounts:
+        parts = [fn.sketchToPart(corpus.sketch(64, i), i) for i in range(n)]
+        yield "buildSVGFromParts", n, lambda: fn.buildSVGFromParts(parts)
+        yield "buildPolygonPayload", n, lambda: outline.buildPolygonPayload(parts, 50, 25, fn.SVG_UNIT_FACTOR)
+
+        export = corpus.nestExport(n)
+        yield "getTransformsFromSVG", n, lambda: fn.getTransformsFromSVG(export)
+
+    yield from engineScaling(quick)
+
+
+def engineScaling(quick=False):
+    """Yields one generation of the Python engine per number of worker processes
+
+    The no-fit polygons are computed by a few generations beforehand, so
+    only the placement of the individuals is measured, which is what the
+    workers share. Worker counts above the number of CPUs are left out.
+
+    Args:
+        quick: (bool) Only run the smallest job
+    """
+
+    try:
+        from FuseNestBench.nestlib import engine, geometry, outline
+    except ImportError:
+        print("NumPy is not installed, skipping the engine benchmarks")
+        return
+
+    partCount = 20 if quick else 200
+    rng = random.Random(5)
+    parts = []
+    for i in range(partCount):
+        if(i % 2):
+            w, h = rng.uniform(50, 300), rng.uniform(50, 200)
+            path = "M0 0 L{0} 0 L{0} {1} L0 {1} Z".format(w, h)
+        else:
+            s = rng.uniform(100, 300)
+            path = "M0 0 L{0} 0 L{0} {1} L{1} {1} L{1} {0} L0 {0} Z".format(s, s / 3)
+        parts.append(outline.partFromPathData(path, i))
+    polygons = [geometry.toArray(p.outerPolygon(0.3)) for p in parts]
+
+    cpus = os.cpu_count() or 1
+    for workers in sorted({w for w in ENGINE_WORKERS if w <= cpus} | {cpus}):
+        nester = engine.Nester(polygons, 6000, 4000, 10, 4, seed=3, workers=workers, populationSize=max(ENGINE_WORKERS))
+        for _ in range(2):
+            nester.step()
+        yield "Nester.step[workers={}]".format(workers), partCount, nester.step
+        nester.close()
+
+
+def apiCalls(fn, quick=False):
+    """Counts the adsk API calls of converting sketches of increasing size
+
+    Args:
+        fn: (module) The add-in module
+        quick: (bool) Only run the smallest sizes
+
+    Returns:
+        (dict, ApiProfiler): Calls per benchmark and size, profiler holding the calls of all of them
+    """
+
+    from FuseNestBench.nestlib import apiprofile
+
+    profiler = apiprofile.ApiProfiler()
+    results = {}
+
+    for n in (16, 128) if quick else (16, 128, 1024):
+        name = "sketchToPart[{}]".format(n)
+        with profiler.body(name):
+            fn.sketchToPart(profiler.wrap(corpus.sketch(n)))
+        results.setdefault("sketchToPart", {})[str(n)] = profiler.calls(name)
+
+    return results, profiler
+
+
+def gitVersion():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline):
+    """Prints the change of every benchmark against a baseline
+
+    Args:
+        results: (dict) Results of this run
+        baseline: (dict) Results of a previous run
+
+    Returns:
+        int: Number of regressions
+    """
+
+    regressions = 0
+    print("\nCompared to {}:".format(baseline["meta"]["version"]))
+
+    for name, sizes in results["results"].items():
+        for size, seconds in sizes.items():
+            before = baseline["results"].get(name, {}).get(size)
+            if not before:
+                continue
+
+            factor = seconds / before
+            flag = ""
+            if(factor > REGRESSION_FACTOR):
+                flag = "  SLOWER"
+                regressions += 1
+            print("{:<36} {:>6} {:>10.2f}x{}".format(name, size, factor, flag))
+
+    # Call counts are exact, any increase is a regression
+    for name, sizes in results.get("apiCalls", {}).items():
+        for size, calls in sizes.items():
+            before = baseline.get("apiCalls", {}).get(name, {}).get(size)
+            if before is None:
+                continue
+
+            flag = ""
+            if(calls > before):
+                flag = "  MORE CALLS"
+                regressions += 1
+            print("{:<36} {:>6} {:>6} -> {:<6} API calls{}".format(name, size, before, calls, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="only run the smallest sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the fastest is kept")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="result file of a previous run to compare with")
+    parser.add_argument("--api-report", choices=("calls", "seconds", "function", "member", "body"), help="print the API calls per function, sorted by this column")
+    args = parser.parse_args(argv)
+
+    fn = loadAddin()
+
+    version = gitVersion()
+    results = {
+        "meta": {
+            "version": version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": {}
+    }
+
+    for name, size, function in benchmarks(fn, args.quick):
+        seconds = measure(function, args.repeat)
+        results["results"].setdefault(name, {})[str(size)] = seconds
+        print("{:<36} {:>6} {:>12.6f}s".format(name, size, seconds))
+
+    calls, profiler = apiCalls(fn, args.quick)
+    results["apiCalls"] = calls
+    for name, sizes in calls.items():
+        for size, count in sizes.items():
+            print("{:<36} {:>6} {:>8} API calls".format(name, size, count))
+
+    if args.api_report:
+        print("\n" + profiler.report(args.api_report))
+
+    output = args.output or os.path.join(HERE, "results", version + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print("\nResults written to {}".format(output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Synthetic parts for the benchmarks
+
+Parts are built from the fake adsk geometry classes in the same shape
+Fusion360 hands them to the add-in: profile loops of unordered curves,
+some of them running backwards.
+"""
+
+import math
+import random
+
+import adsk.core
+import adsk.fusion
+
+
+def _point(x, y):
+    return adsk.core.Point3D.create(x, y, 0)
+
+
+def _line(a, b, rng):
+    # Fusion360 does not orient the curves of a loop consistently
+    if(rng.random() < 0.5):
+        a, b = b, a
+    return adsk.fusion.ProfileCurve(adsk.core.Line3D.create(_point(*a), _point(*b)))
+
+
+def polygonLoop(vertices, radius=10, center=(0, 0), isOuter=True, rng=None):
+    """Wavy polygon made of line segments, like a dense DXF import
+
+    Args:
+        vertices: (int) Number of vertices
+        radius: (float) Mean radius in cm
+        center: ((float, float)) Center in cm
+        isOuter: (bool) True for the outer loop of a profile
+        rng: (random.Random) Random number generator
+
+    Returns:
+        adsk.fusion.ProfileLoop: The loop
+    """
+
+    rng = rng or random.Random(0)
+    points = []
+    for i in range(vertices):
+        a = 2 * math.pi * i / vertices
+        r = radius * (1 + 0.1 * math.sin(5 * a))
+        points.append((center[0] + r * math.cos(a), center[1] + r * math.sin(a)))
+
+    return adsk.fusion.ProfileLoop([_line(points[i - 1], points[i], rng) for i in range(vertices)], isOuter)
+
+
+def roundedRectangleLoop(width, height, radius, center=(0, 0), isOuter=True, rng=None):
+    """Rectangle with arcs in the corners
+
+    Args:
+        width: (float) Width in cm
+        height: (float) Height in cm
+        radius: (float) Corner radius in cm
+        center: ((float, float)) Center in cm
+        isOuter: (bool) True for the outer loop of a profile
+        rng: (random.Random) Random number generator
+
+    Returns:
+        adsk.fusion.ProfileLoop: The loop
+    """
+
+    rng = rng or random.Random(0)
+    cx, cy = center
+    w, h = width / 2 - radius, height / 2 - radius
+    up = adsk.core.Vector3D.create(0, 0, 1)
+    xAxis = adsk.core.Vector3D.create(1, 0, 0)
+
+    curves = []
+    for i, (sx, sy) in enumerate(((1, 1), (-1, 1), (-1, -1), (1, -1))):
+        corner = _point(cx + sx * w, cy + sy * h)
+        start = i * math.pi / 2
+        curves.append(adsk.fusion.ProfileCurve(adsk.core.Arc3D.createByCenter(corner, up, xAxis, radius, start, start + math.pi / 2)))
+
+        # Edge from the end of this arc to the start of the next one
+        nx, ny = ((-1, 1), (-1, -1), (1, -1), (1, 1))[i]
+        a = (cx + sx * w + radius * math.cos(start + math.pi / 2), cy + sy * h + radius * math.sin(start + math.pi / 2))
+        b = (cx + nx * w + radius * math.cos(start + math.pi / 2), cy + ny * h + radius * math.sin(start + math.pi / 2))
+        curves.append(_line(a, b, rng))
+
+    return adsk.fusion.ProfileLoop(curves, isOuter)
+
+
+def splineLoop(segments, radius=10, center=(0, 0), isOuter=True):
+    """Closed loop of splines
+
+    Args:
+        segments: (int) Number of splines
+        radius: (float) Mean radius in cm
+        center: ((float, float)) Center in cm
+        isOuter: (bool) True for the outer loop of a profile
+
+    Returns:
+        adsk.fusion.ProfileLoop: The loop
+    """
+
+    def curve(i):
+        def f(t):
+            a = 2 * math.pi * (i + t) / segments
+            r = radius * (1 + 0.15 * math.sin(7 * a))
+            return (center[0] + r * math.cos(a), center[1] + r * math.sin(a))
+        return adsk.fusion.ProfileCurve(adsk.core.NurbsCurve3D.createFromFunction(f))
+
+    return adsk.fusion.ProfileLoop([curve(i) for i in range(segments)], isOuter)
+
+
+def circleLoop(radius, center=(0, 0), isOuter=False):
+    up = adsk.core.Vector3D.create(0, 0, 1)
+    return adsk.fusion.ProfileLoop([adsk.fusion.ProfileCurve(adsk.core.Circle3D.createByCenter(_point(*center), up, radius))], isOuter)
+
+
+def ellipseLoop(majorRadius, minorRadius, center=(0, 0), isOuter=False):
+    up = adsk.core.Vector3D.create(0, 0, 1)
+    axis = adsk.core.Vector3D.create(1, 1, 0)
+    return adsk.fusion.ProfileLoop([adsk.fusion.ProfileCurve(adsk.core.Ellipse3D.create(_point(*center), up, axis, majorRadius, minorRadius))], isOuter)
+
+
+def ellipticalArcLoop(majorRadius, minorRadius, center=(0, 0), isOuter=False, rng=None):
+    """Half ellipse closed by a line"""
+
+    rng = rng or random.Random(0)
+    up = adsk.core.Vector3D.create(0, 0, 1)
+    axis = adsk.core.Vector3D.create(1, 0, 0)
+    arc = adsk.core.EllipticalArc3D.createByCenter(_point(*center), up, axis, majorRadius, minorRadius, 0, math.pi)
+    _, sp, ep = arc.evaluator.getEndPoints()
+    return adsk.fusion.ProfileLoop([adsk.fusion.ProfileCurve(arc), _line((ep.x, ep.y), (sp.x, sp.y), rng)], isOuter)
+
+
+def sketch(vertices, seed=0):
+    """Sketch of a part with a dense outline and holes of every curve type
+
+    Args:
+        vertices: (int) Number of vertices of the outer loop, half of them line segments and half splines
+        seed: (int) Random seed
+
+    Returns:
+        adsk.fusion.Sketch: Sketch with one profile
+    """
+
+    rng = random.Random(seed)
+    loops = [
+        polygonLoop(max(3, vertices // 2), 10, rng=rng),
+        splineLoop(max(1, vertices // 16), 3, (-4, 0), False),
+        roundedRectangleLoop(3, 2, 0.5, (4, 0), False, rng),
+        circleLoop(0.8, (0, 4)),
+        ellipseLoop(1, 0.5, (0, -4)),
+        ellipticalArcLoop(1, 0.5, (4, 4), rng=rng)
+    ]
+    return adsk.fusion.Sketch([adsk.fusion.Profile(loops)])
+
+
+def nestExport(parts, perSheet=50, seed=0):
+    """Inner SVG of an SVGnest export placing parts with ids 0 to parts - 1
+
+    Args:
+        parts: (int) Number of parts
+        perSheet: (int) Number of parts per sheet
+        seed: (int) Random seed
+
+    Returns:
+        str: SVG elements, one group per sheet
+    """
+
+    rng = random.Random(seed)
+    out = []
+    for sheet in range(0, parts, perSheet):
+        out.append("<g transform='translate(0 {})'>".format(sheet // perSheet * 3000))
+        out.append("<rect width='5000' height='3000'/>")
+        for i in range(sheet, min(sheet + perSheet, parts)):
+            out.append("<g transform='translate({:.6f} {:.6f}) rotate({})'>".format(rng.uniform(0, 5000), rng.uniform(0, 3000), rng.choice((0, 90, 180, 270))))
+            out.append("<path d='M0 0 L100 0 L100 100 L0 100 Z' id='{}' data-copy='0'/>".format(i))
+            out.append("</g>")
+        out.append("</g>")
+    return "".join(out)
@@ -0,0 +1 @@
+"""Minimal stand-in for the Fusion360 API, just enough to run the outline conversion outside of Fusion360"""
@@ -0,0 +1,10 @@
+"""Stand-in for adsk.cam, FuseNest only imports it"""
+
+
+class _Stub(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def __getattr__(name):
+    return _Stub
@@ -0,0 +1,219 @@
+"""Stand-in for adsk.core
+
+Implements the geometry classes the outline conversion reads, with the
+attributes and evaluator methods FuseNest uses. Everything else resolves
+to a stub class, so the event handlers of the add-in can be defined.
+"""
+
+import math
+
+
+class _Stub(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def __getattr__(name):
+    return _Stub
+
+
+class SurfaceTypes(object):
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+
+
+class Point3D(object):
+    objectType = "adsk::core::Point3D"
+
+    def __init__(self, x=0, y=0, z=0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x=0, y=0, z=0):
+        return Point3D(x, y, z)
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def translateBy(self, vector):
+        self.x += vector.x
+        self.y += vector.y
+        self.z += vector.z
+        return True
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+
+class Vector3D(Point3D):
+    objectType = "adsk::core::Vector3D"
+
+    @staticmethod
+    def create(x=0, y=0, z=0):
+        return Vector3D(x, y, z)
+
+    def crossProduct(self, vector):
+        a, b = self, vector
+        return Vector3D(a.y * b.z - a.z * b.y, a.z * b.x - a.x * b.z, a.x * b.y - a.y * b.x)
+
+    def copy(self):
+        return Vector3D(self.x, self.y, self.z)
+
+    @property
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalize(self):
+        l = self.length
+        self.x /= l
+        self.y /= l
+        self.z /= l
+        return True
+
+    def scaleBy(self, scale):
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return True
+
+
+class CurveEvaluator3D(object):
+    """Evaluates a curve given as a function of a parameter between 0 and 1"""
+
+    def __init__(self, function):
+        self._function = function
+
+    def getParameterExtents(self):
+        return True, 0.0, 1.0
+
+    def getPointsAtParameters(self, parameters):
+        return True, [self.getPointAtParameter(t)[1] for t in parameters]
+
+    def getPointAtParameter(self, parameter):
+        x, y = self._function(parameter)
+        return True, Point3D(x, y, 0)
+
+    def getEndPoints(self):
+        return True, self.getPointAtParameter(0.0)[1], self.getPointAtParameter(1.0)[1]
+
+
+class Line3D(object):
+    objectType = "adsk::core::Line3D"
+
+    def __init__(self, startPoint, endPoint):
+        self.startPoint = startPoint
+        self.endPoint = endPoint
+
+    @staticmethod
+    def create(startPoint, endPoint):
+        return Line3D(startPoint, endPoint)
+
+    @property
+    def evaluator(self):
+        s, e = self.startPoint, self.endPoint
+        return CurveEvaluator3D(lambda t: (s.x + (e.x - s.x) * t, s.y + (e.y - s.y) * t))
+
+
+class Arc3D(object):
+    objectType = "adsk::core::Arc3D"
+
+    def __init__(self, center, normal, radius, startAngle, endAngle):
+        self.center = center
+        self.normal = normal
+        self.radius = radius
+        self.startAngle = startAngle
+        self.endAngle = endAngle
+
+    @staticmethod
+    def createByCenter(center, normal, referenceVector, radius, startAngle, endAngle):
+        offset = math.atan2(referenceVector.y, referenceVector.x)
+        return Arc3D(center, normal, radius, startAngle + offset, endAngle + offset)
+
+    def _point(self, angle):
+        # Angles run clockwise if the normal points down
+        if(self.normal.z < 0):
+            angle = -angle
+        return Point3D(self.center.x + self.radius * math.cos(angle), self.center.y + self.radius * math.sin(angle), 0)
+
+    @property
+    def startPoint(self):
+        return self._point(self.startAngle)
+
+    @property
+    def endPoint(self):
+        return self._point(self.endAngle)
+
+    @property
+    def evaluator(self):
+        return CurveEvaluator3D(lambda t: (lambda p: (p.x, p.y))(self._point(self.startAngle + (self.endAngle - self.startAngle) * t)))
+
+
+class Circle3D(object):
+    objectType = "adsk::core::Circle3D"
+
+    def __init__(self, center, normal, radius):
+        self.center = center
+        self.normal = normal
+        self.radius = radius
+
+    @staticmethod
+    def createByCenter(center, normal, radius):
+        return Circle3D(center, normal, radius)
+
+
+class Ellipse3D(object):
+    objectType = "adsk::core::Ellipse3D"
+
+    def __init__(self, center, normal, majorAxis, majorRadius, minorRadius):
+        self.center = center
+        self.normal = normal
+        self.majorAxis = majorAxis
+        self.majorRadius = majorRadius
+        self.minorRadius = minorRadius
+
+    @staticmethod
+    def create(center, normal, majorAxis, majorRadius, minorRadius):
+        return Ellipse3D(center, normal, majorAxis, majorRadius, minorRadius)
+
+
+class EllipticalArc3D(Ellipse3D):
+    objectType = "adsk::core::EllipticalArc3D"
+
+    def __init__(self, center, normal, majorAxis, majorRadius, minorRadius, startAngle, endAngle):
+        super().__init__(center, normal, majorAxis, majorRadius, minorRadius)
+        self.startAngle = startAngle
+        self.endAngle = endAngle
+
+    @staticmethod
+    def createByCenter(center, normal, majorAxis, majorRadius, minorRadius, startAngle, endAngle):
+        return EllipticalArc3D(center, normal, majorAxis, majorRadius, minorRadius, startAngle, endAngle)
+
+    def _point(self, angle):
+        if(self.normal.z < 0):
+            angle = -angle
+        rotation = math.atan2(self.majorAxis.y, self.majorAxis.x)
+        x = self.majorRadius * math.cos(angle)
+        y = self.minorRadius * math.sin(angle)
+        return (
+            self.center.x + x * math.cos(rotation) - y * math.sin(rotation),
+            self.center.y + x * math.sin(rotation) + y * math.cos(rotation)
+        )
+
+    @property
+    def evaluator(self):
+        return CurveEvaluator3D(lambda t: self._point(self.startAngle + (self.endAngle - self.startAngle) * t))
+
+
+class NurbsCurve3D(object):
+    """Spline given by a function of a parameter between 0 and 1 instead of control points"""
+
+    objectType = "adsk::core::NurbsCurve3D"
+
+    def __init__(self, function):
+        self.evaluator = CurveEvaluator3D(function)
+
+    @staticmethod
+    def createFromFunction(function):
+        return NurbsCurve3D(function)
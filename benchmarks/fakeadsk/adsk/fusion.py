@@ -0,0 +1,46 @@
+"""Stand-in for adsk.fusion
+
+Sketch profiles are plain containers around adsk.core curves.
+"""
+
+
+class _Stub(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def __getattr__(name):
+    return _Stub
+
+
+class ProfileCurve(object):
+    objectType = "adsk::fusion::ProfileCurve"
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+
+    @property
+    def geometryType(self):
+        return type(self.geometry).__name__
+
+
+class ProfileLoop(object):
+    objectType = "adsk::fusion::ProfileLoop"
+
+    def __init__(self, profileCurves, isOuter=True):
+        self.profileCurves = profileCurves
+        self.isOuter = isOuter
+
+
+class Profile(object):
+    objectType = "adsk::fusion::Profile"
+
+    def __init__(self, profileLoops):
+        self.profileLoops = profileLoops
+
+
+class Sketch(object):
+    objectType = "adsk::fusion::Sketch"
+
+    def __init__(self, profiles):
+        self.profiles = profiles
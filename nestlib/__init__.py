@@ -0,0 +1,7 @@
+"""Fusion independent nesting helpers used by FuseNest
+
+Nothing in this package imports adsk, so every module can be used and
+profiled outside of Fusion360. Modules that need NumPy (engine, geometry, batch)
+are imported lazily by the add-in, as NumPy is not part of the Python
+distribution shipped with Fusion360.
+"""
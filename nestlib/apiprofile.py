@@ -0,0 +1,263 @@
+"""Counts Fusion360 API calls of the outline conversion
+
+Every property read and method call on an adsk object is a roundtrip into
+Fusion360. Objects wrapped by ApiProfiler.wrap record each of them, with
+the time it took, under the function that made the call and the body
+being converted. Objects returned by a wrapped object are wrapped as well,
+so wrapping the body or sketch is enough to profile a whole conversion.
+
+Profiling slows the conversion down and is meant for development only.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class ApiProfiler(object):
+    """Collects call counts and times of wrapped adsk objects
+
+    Args:
+        enabled: (bool) False makes wrap return objects unchanged, so callers don't need to check
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.current = None
+        self.stats = {}
+        self.names = {}
+
+    def reset(self):
+        """Drops all recorded calls"""
+        self.current = None
+        self.stats = {}
+        self.names = {}
+
+    @contextmanager
+    def body(self, key, name=None):
+        """Attributes the calls of a block of code to a body
+
+        Args:
+            key: (object) Identifies the body, e.g. its index in the selection, as body names are not unique
+            name: (str) Name of the body shown in reports
+        """
+
+        if name is not None:
+            self.names[key] = name
+
+        previous = self.current
+        self.current = key
+        try:
+            yield
+        finally:
+            self.current = previous
+
+    def wrap(self, obj):
+        """Wraps an adsk object, so accessing it is recorded
+
+        Args:
+            obj: (object) Object to wrap
+
+        Returns:
+            object: The wrapped object, obj itself if profiling is disabled
+        """
+
+        if not self.enabled:
+            return obj
+        return _wrapValue(self, obj)
+
+    def record(self, function, member, seconds):
+        """Records a single API call
+
+        Args:
+            function: (str) Name of the calling function
+            member: (str) Property or method that was accessed
+            seconds: (float) Duration of the call
+        """
+
+        key = (self.current, function, member)
+        entry = self.stats.get(key)
+        if entry is None:
+            self.stats[key] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def calls(self, body=None):
+        """Number of recorded calls
+
+        Args:
+            body: (object) Only count calls of the body with this key, None for all bodies
+
+        Returns:
+            int: Number of calls
+        """
+        return sum(v[0] for k, v in self.stats.items() if body is None or k[0] == body)
+
+    def rows(self, groupBy=("function", "member"), sortBy="calls"):
+        """Recorded calls summed up by some of body, function and member
+
+        Args:
+            groupBy: ((str)) Fields to group by, any of "body", "function" and "member"
+            sortBy: (str) "calls" or "seconds" to sort descending, or one of the groupBy fields
+
+        Returns:
+            [dict]: One row per group with the groupBy fields, calls and seconds
+        """
+
+        fields = ("body", "function", "member")
+        groups = {}
+        for key, (calls, seconds) in self.stats.items():
+            values = dict(zip(fields, key))
+            group = tuple(values[f] for f in groupBy)
+            row = groups.setdefault(group, dict(zip(groupBy, group), calls=0, seconds=0.0))
+            row["calls"] += calls
+            row["seconds"] += seconds
+
+        # Bodies are grouped by their key and shown with their name
+        for row in groups.values():
+            if "body" in row and row["body"] in self.names:
+                row["body"] = "{} ({})".format(self.names[row["body"]], row["body"])
+
+        if sortBy in ("calls", "seconds"):
+            return sorted(groups.values(), key=lambda r: (-r[sortBy], str(r)))
+        return sorted(groups.values(), key=lambda r: (str(r[sortBy]), -r["calls"]))
+
+    def report(self, sortBy="calls", limit=None):
+        """Formats the recorded calls as text tables, per function and member and per body
+
+        Args:
+            sortBy: (str) See rows
+            limit: (int) Maximum number of rows per table
+
+        Returns:
+            str: The report
+        """
+
+        out = ["{} API calls, {:.3f} s".format(self.calls(), sum(v[1] for v in self.stats.values()))]
+
+        for groupBy in (("function", "member"), ("body",)):
+            order = sortBy if sortBy in ("calls", "seconds") + groupBy else "calls"
+            rows = self.rows(groupBy, order)[:limit]
+
+            widths = [max([len(f)] + [len(str(r[f])) for r in rows]) for f in groupBy]
+            out.append("")
+            out.append("  ".join(f.ljust(w) for f, w in zip(groupBy, widths)) + "  {:>10}  {:>10}".format("calls", "seconds"))
+            for r in rows:
+                out.append("  ".join(str(r[f]).ljust(w) for f, w in zip(groupBy, widths)) + "  {:>10}  {:>10.6f}".format(r["calls"], r["seconds"]))
+
+        return "\n".join(out) + "\n"
+
+
+class _ApiProxy(object):
+    """Stand-in for an adsk object that records every access"""
+
+    __slots__ = ("_target", "_profiler")
+
+    def __init__(self, target, profiler):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def __getattr__(self, name):
+        start = time.perf_counter()
+        value = getattr(self._target, name)
+        elapsed = time.perf_counter() - start
+
+        # Methods are only a roundtrip once they are called
+        if callable(value) and not isinstance(value, type):
+            return _ApiMethod(value, name, self._profiler)
+
+        self._profiler.record(_caller(), name, elapsed)
+        return _wrapValue(self._profiler, value)
+
+    def __setattr__(self, name, value):
+        start = time.perf_counter()
+        setattr(self._target, name, _unwrap(value))
+        self._profiler.record(_caller(), name, time.perf_counter() - start)
+
+    def __iter__(self):
+        iterator = iter(self._target)
+        while(True):
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self._profiler.record(_caller(), "__iter__", time.perf_counter() - start)
+            yield _wrapValue(self._profiler, item)
+
+    def __len__(self):
+        start = time.perf_counter()
+        length = len(self._target)
+        self._profiler.record(_caller(), "__len__", time.perf_counter() - start)
+        return length
+
+    def __getitem__(self, index):
+        start = time.perf_counter()
+        item = self._target[index]
+        self._profiler.record(_caller(), "__getitem__", time.perf_counter() - start)
+        return _wrapValue(self._profiler, item)
+
+    def __bool__(self):
+        return bool(self._target)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __ne__(self, other):
+        return self._target != _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return "<profiled {!r}>".format(self._target)
+
+
+class _ApiMethod(object):
+    """Method of a wrapped object, records every call"""
+
+    __slots__ = ("_method", "_name", "_profiler")
+
+    def __init__(self, method, name, profiler):
+        self._method = method
+        self._name = name
+        self._profiler = profiler
+
+    def __call__(self, *args, **kwargs):
+        args = [_unwrap(a) for a in args]
+        kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+
+        start = time.perf_counter()
+        value = self._method(*args, **kwargs)
+        self._profiler.record(_caller(), self._name + "()", time.perf_counter() - start)
+
+        return _wrapValue(self._profiler, value)
+
+
+def _isApiObject(value):
+    return type(value).__module__.split(".")[0] == "adsk"
+
+
+def _wrapValue(profiler, value):
+    if isinstance(value, (tuple, list)):
+        return type(value)(_wrapValue(profiler, v) for v in value)
+    if isinstance(value, _ApiProxy) or not _isApiObject(value):
+        return value
+    return _ApiProxy(value, profiler)
+
+
+def _unwrap(value):
+    if isinstance(value, _ApiProxy):
+        return value._target
+    if isinstance(value, (tuple, list)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+def _caller():
+    # Comprehensions and lambdas are attributed to the function they are part of
+    frame = sys._getframe(2)
+    while frame.f_back is not None and frame.f_code.co_name.startswith("<") and frame.f_code.co_name != "<module>":
+        frame = frame.f_back
+    return frame.f_code.co_name
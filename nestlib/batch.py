@@ -0,0 +1,419 @@
+"""Nests outline files from the command line, outside of Fusion360
+
+Every input is a job: an SVG file as built by outline.buildSVG, a DXF
+file, an outline cache (outline_cache.json) or a directory of such files.
+Jobs run concurrently in worker processes, each with a time limit, and
+their placements are written to <output>/<job>.json in the shape
+getTransformsFromSVG returns them:
+
+    python -m nestlib.batch parts.svg plates/ --width 50 --height 30 --timeout 60
+
+Run it from the add-in directory. Requires NumPy, see nestlib.engine.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+import xml.etree.ElementTree as ET
+
+from . import duplicates, dxf, engine, outline, simplify
+
+
+# SVG units per model unit, as in FuseNest.py
+SVG_UNIT_FACTOR = 100
+
+# Tolerances in model units, as in FuseNest.py for a spacing of 0
+CHORD_TOLERANCE = 0.002
+SIMPLIFY_TOLERANCE = 0.001
+DUPLICATE_TOLERANCE = 1e-4
+
+# Seconds a job may run past its time limit to finish its current generation before it is killed
+TIMEOUT_GRACE = 10
+
+# Seconds between checks of the running jobs
+POLL_INTERVAL = 0.1
+
+# File types read from directories
+EXTENSIONS = (".svg", ".dxf", ".json")
+
+
+def readJob(path, unitFactor=SVG_UNIT_FACTOR, tolerance=CHORD_TOLERANCE):
+    """Reads the parts of a job
+
+    Args:
+        path: (str) SVG, DXF or outline cache file, or a directory of them
+        unitFactor: (float) SVG units per model unit
+        tolerance: (float) Chord tolerance for curves approximated by line segments, in model units
+
+    Returns:
+        ([outline.Part], {int: int}, [str], (float, float)): Parts with consecutive indices, number of
+            copies per part index, source of every part index and the sheet size of the first SVG
+            in model units, None if there is none
+    """
+
+    files = [path]
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(EXTENSIONS))
+
+    parts = []
+    quantities = {}
+    sources = []
+    sheet = None
+
+    for f in files:
+        extension = os.path.splitext(f)[1].lower()
+        if(extension == ".dxf"):
+            read = [(p, 1, "{}#{}".format(f, i)) for i, p in enumerate(dxf.readDXF(f, len(parts), tolerance, unitFactor))]
+        elif(extension == ".json"):
+            read = readOutlineStore(f, len(parts))
+        else:
+            read, size = readSVG(f, len(parts), unitFactor)
+            sheet = sheet or size
+
+        for part, count, source in read:
+            part.index = len(parts)
+            parts.append(part)
+            sources.append(source)
+            if(count > 1):
+                quantities[part.index] = count
+
+    return parts, quantities, sources, sheet
+
+
+def readSVG(path, firstIndex=0, unitFactor=SVG_UNIT_FACTOR):
+    """Reads the paths of an SVG file as parts
+
+    Paths sharing an id are copies of the same part, a rect is the sheet.
+    Paths have to use absolute commands, see outline.partFromPathData.
+
+    Args:
+        path: (str) SVG file
+        firstIndex: (int) Index of the first part
+        unitFactor: (float) SVG units per model unit
+
+    Returns:
+        ([(outline.Part, int, str)], (float, float)): Parts with their number of copies and source,
+            and the size of the sheet in model units, None if there is no rect
+    """
+
+    rtn = []
+    byId = {}
+    sheet = None
+
+    # Open elements, read ones are removed from their parent so none are kept
+    stack = []
+    for event, element in ET.iterparse(path, ("start", "end")):
+        if(event == "start"):
+            stack.append(element)
+            continue
+        stack.pop()
+
+        tag = element.tag.rpartition("}")[2]
+
+        if(tag == "rect" and sheet is None):
+            sheet = (float(element.get("width")) / unitFactor, float(element.get("height")) / unitFactor)
+
+        elif(tag == "path" and element.get("d")):
+            id = element.get("id")
+            if(id is not None and id in byId):
+                byId[id][1] += 1
+            else:
+                entry = [outline.partFromPathData(element.get("d"), firstIndex + len(rtn)), 1, "{}#{}".format(path, id if id is not None else len(rtn))]
+                rtn.append(entry)
+                if id is not None:
+                    byId[id] = entry
+
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+
+    return [tuple(e) for e in rtn], sheet
+
+
+def readOutlineStore(path, firstIndex=0):
+    """Reads the outlines of a cache file written by cache.OutlineCache
+
+    Args:
+        path: (str) outline_cache.json
+        firstIndex: (int) Index of the first part
+
+    Returns:
+        [(outline.Part, int, str)]: Parts with their number of copies and source
+    """
+
+    with open(path) as f:
+        store = json.load(f)
+
+    return [
+        (outline.Part.fromDict(entry["value"], firstIndex + i), 1, "{}#{}".format(path, key))
+        for i, (key, entry) in enumerate(sorted(store.items()))
+    ]
+
+
+def nestJob(job):
+    """Reads and nests the parts of a job
+
+    Args:
+        job: (dict) name, path, width, height, spacing, rotations, timeout, generations, stall, seed and workers,
+            see main for their meaning
+
+    Returns:
+        dict: Summary of the job with its transforms, see runJobs
+    """
+
+    start = time.time()
+    result = {"name": job["name"], "path": job["path"], "status": "ok", "parts": 0, "placed": 0, "sheets": 0, "utilization": 0.0}
+
+    try:
+        parts, quantities, sources, sheet = readJob(job["path"])
+        width = job["width"] or (sheet[0] if sheet else None)
+        height = job["height"] or (sheet[1] if sheet else None)
+        if width is None or height is None:
+            raise ValueError("No sheet size given and no sheet in the input")
+
+        result["parts"] = sum(quantities.get(p.index, 1) for p in parts)
+        result["sources"] = sources
+
+        # Identical parts are nested once with a quantity, as in the add-in
+        groups = duplicates.findDuplicates(parts, DUPLICATE_TOLERANCE * SVG_UNIT_FACTOR, CHORD_TOLERANCE * SVG_UNIT_FACTOR)
+        counts = {g[0][0]: sum(quantities.get(i[0], 1) for i in g) for g in groups}
+        byIndex = {p.index: p for p in parts}
+        unique = [simplify.simplifyPart(byIndex[g[0][0]], SIMPLIFY_TOLERANCE * SVG_UNIT_FACTOR) for g in groups]
+
+        state = {}
+
+        def progress(nester):
+            state["nester"] = nester
+
+        transforms = engine.nestParts(
+            unique,
+            width,
+            height,
+            job["spacing"],
+            job["rotations"],
+            SVG_UNIT_FACTOR,
+            generations=job["generations"],
+            timeLimit=job["timeout"],
+            callback=progress,
+            seed=job["seed"],
+            quantities=counts,
+            stall=job["stall"],
+            workers=job.get("workers", 1)
+        )
+        transforms = expandCopies(transforms, groups, quantities)
+
+        best = state["nester"].best if "nester" in state else None
+        result["transforms"] = transforms
+        result["placed"] = len(transforms)
+        result["sheets"] = max([t[3] for _, t in transforms], default=-1) + 1
+        result["utilization"] = best.utilization if best else 0.0
+        result["stopped"] = state["nester"].stopped if "nester" in state else None
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+        result["traceback"] = traceback.format_exc()
+
+    result["seconds"] = time.time() - start
+    return result
+
+
+def expandCopies(transforms, groups, quantities):
+    """Maps placements of nested copies back onto parts and the copies of their SVG paths
+
+    Args:
+        transforms: ([(int, float[])]) Placements of the represented parts, one entry per copy
+        groups: ([[(int, float, float, float)]]) Identical parts, see duplicates.findDuplicates
+        quantities: ({int: int}) Number of copies per part index of the input
+
+    Returns:
+        [(int, float[])]: List of part index and transform data (x, y, r, sheet), copies of a path repeat its index
+    """
+
+    # Every copy of a path is a member of its group of its own
+    expanded = [[m for m in g for _ in range(quantities.get(m[0], 1))] for g in groups]
+    return duplicates.expandPlacements(transforms, expanded, SVG_UNIT_FACTOR)
+
+
+def runJobs(jobs, workers=None, report=None):
+    """Runs jobs in worker processes, at most workers at a time
+
+    Every job gets a process of its own, so a job that overruns its time
+    limit by more than TIMEOUT_GRACE can be killed without affecting the
+    others.
+
+    Args:
+        jobs: ([dict]) Jobs, see nestJob
+        workers: (int) Maximum number of concurrent jobs, the number of CPUs if None
+        report: (callable) report(result) called as soon as a job finished
+
+    Returns:
+        [dict]: Result of every job in the order of jobs, with name, path, status ("ok", "failed" or "killed"),
+            parts, placed, sheets, utilization, seconds and transforms
+    """
+
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(jobs)
+    finished = multiprocessing.Queue()
+    waiting = list(range(len(jobs)))
+    running = {}
+
+    def done(i, result):
+        results[i] = result
+        if report is not None:
+            report(result)
+
+    while(waiting or running):
+        while(waiting and len(running) < workers):
+            i = waiting.pop(0)
+            # Not a daemon, jobs may start processes of their own, see engine.ParallelEvaluator
+            process = multiprocessing.Process(target=_worker, args=(i, jobs[i], finished))
+            process.start()
+            running[i] = (process, time.time())
+
+        try:
+            i, result = finished.get(timeout=POLL_INTERVAL)
+            # Jobs that were killed right after finishing are already concluded
+            if i in running:
+                running.pop(i)[0].join()
+                done(i, result)
+        except queue.Empty:
+            pass
+
+        now = time.time()
+        for i, (process, start) in list(running.items()):
+            timeout = jobs[i]["timeout"]
+            killed = timeout is not None and now - start > timeout + TIMEOUT_GRACE
+            if killed:
+                process.terminate()
+            elif(process.is_alive() or process.exitcode == 0):
+                # Results of processes that exited normally are still on their way
+                continue
+
+            process.join()
+            del running[i]
+            done(i, {
+                "name": jobs[i]["name"],
+                "path": jobs[i]["path"],
+                "status": "killed" if killed else "failed",
+                "error": "Time limit exceeded" if killed else "Exit code {}".format(process.exitcode),
+                "parts": 0,
+                "placed": 0,
+                "sheets": 0,
+                "utilization": 0.0,
+                "seconds": now - start
+            })
+
+    return results
+
+
+def _worker(i, job, finished):
+    finished.put((i, nestJob(job)))
+
+
+def writeResult(result, directory):
+    """Writes the placements of a job to <directory>/<name>.json
+
+    Args:
+        result: (dict) Result of a job, see runJobs
+        directory: (str) Output directory
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, result["name"] + ".json"), "w") as f:
+        json.dump({k: v for k, v in result.items() if k != "traceback"}, f, indent=1)
+
+
+def formatSummary(results):
+    """Formats the results of all jobs as a text table
+
+    Args:
+        results: ([dict]) Results, see runJobs
+
+    Returns:
+        str: The table
+    """
+
+    out = ["{:<24} {:>8} {:>8} {:>6} {:>11} {:>9}  {}".format("job", "parts", "placed", "sheets", "utilization", "seconds", "status")]
+    for r in results:
+        out.append("{:<24} {:>8} {:>8} {:>6} {:>10.1%} {:>9.2f}  {}".format(
+            r["name"], r["parts"], r["placed"], r["sheets"], r["utilization"], r["seconds"],
+            r["status"] if r["status"] == "ok" else "{} ({})".format(r["status"], r.get("error"))
+        ))
+    return "\n".join(out) + "\n"
+
+
+def jobName(path, taken):
+    """Unique name of a job, from the name of its input
+
+    Args:
+        path: (str) Input of the job
+        taken: (set) Names of the other jobs, the new name is added to it
+
+    Returns:
+        str: Name
+    """
+
+    base = os.path.splitext(os.path.basename(os.path.normpath(path)))[0] or "job"
+    name = base
+    n = 1
+    while(name in taken):
+        n += 1
+        name = "{}-{}".format(base, n)
+    taken.add(name)
+    return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="SVG, DXF or outline cache files, or directories of them, one job each")
+    parser.add_argument("--width", type=float, help="sheet width in cm, read from the SVG if missing")
+    parser.add_argument("--height", type=float, help="sheet height in cm, read from the SVG if missing")
+    parser.add_argument("--spacing", type=float, default=0, help="spacing between parts in cm")
+    parser.add_argument("--rotations", type=int, default=4, help="number of rotations to try")
+    parser.add_argument("--timeout", type=float, default=60, help="time limit per job in seconds, 0 for none")
+    parser.add_argument("--generations", type=int, help="maximum number of generations per job")
+    parser.add_argument("--stall", type=int, help="stop a job after this many generations without a better result")
+    parser.add_argument("--seed", type=int, help="random seed, for reproducible runs")
+    parser.add_argument("--workers", type=int, help="number of jobs running at a time, defaults to the number of CPUs")
+    parser.add_argument("--job-workers", type=int, default=1, help="processes placing the parts of each job, for a few large jobs")
+    parser.add_argument("--output", default="nest_results", help="directory the placements and summary.json are written to")
+    args = parser.parse_args(argv)
+
+    if not args.timeout and args.generations is None and args.stall is None:
+        parser.error("a job needs a --timeout, --generations or --stall to end")
+
+    taken = set()
+    jobs = [{
+        "name": jobName(path, taken),
+        "path": path,
+        "width": args.width,
+        "height": args.height,
+        "spacing": args.spacing,
+        "rotations": args.rotations,
+        "timeout": args.timeout or None,
+        "generations": args.generations,
+        "stall": args.stall,
+        "seed": args.seed,
+        "workers": args.job_workers
+    } for path in args.inputs]
+
+    def report(result):
+        writeResult(result, args.output)
+        print("{} {} in {:.2f} s".format(result["name"], result["status"], result["seconds"]), file=sys.stderr)
+
+    results = runJobs(jobs, args.workers, report)
+
+    with open(os.path.join(args.output, "summary.json"), "w") as f:
+        json.dump([{k: v for k, v in r.items() if k not in ("transforms", "sources", "traceback")} for r in results], f, indent=1)
+
+    print(formatSummary(results))
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Two tier caches for body outlines and no-fit polygons
+
+Entries are kept in an in-memory LRU and backed by a JSON file, so they
+survive restarts of Fusion360. Outlines are keyed by the identity of a body
+and only returned if the stored geometry fingerprint still matches.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class OutlineCache(object):
+    """In-memory LRU in front of a persistent on-disk store
+
+    Args:
+        path: (str) JSON file of the persistent store, None to only cache in memory
+        maxEntries: (int) Maximum number of entries kept in memory
+        maxStoredEntries: (int) Maximum number of entries kept on disk
+    """
+
+    def __init__(self, path=None, maxEntries=1000, maxStoredEntries=10000):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.maxStoredEntries = maxStoredEntries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._store = None
+        self._dirty = False
+
+    def get(self, key, fingerprint):
+        """Looks up a cached value
+
+        Args:
+            key: (str) Identity of the body, e.g. its entity token
+            fingerprint: (list) Geometry fingerprint the value was stored with
+
+        Returns:
+            Cached value or None if there is no matching entry
+        """
+
+        fingerprint = _normalize(fingerprint)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._loadStore().get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        else:
+            self._entries.move_to_end(key)
+
+        if entry is None or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+
+        entry["used"] = time.time()
+        self.hits += 1
+        return entry["value"]
+
+    def put(self, key, fingerprint, value):
+        """Stores a value in memory and in the persistent store
+
+        Args:
+            key: (str) Identity of the body, e.g. its entity token
+            fingerprint: (list) Geometry fingerprint, has to be JSON serializable
+            value: Value to cache, has to be JSON serializable
+        """
+
+        entry = {"fingerprint": _normalize(fingerprint), "value": value, "used": time.time()}
+        self._remember(key, entry)
+        self._loadStore()[key] = entry
+        self._dirty = True
+
+    def clear(self):
+        """Removes all entries from memory and disk"""
+
+        self._entries.clear()
+        self._store = {}
+        self._dirty = True
+        self.save()
+
+    def save(self):
+        """Writes the persistent store to disk if it changed, evicting the least recently used entries"""
+
+        if not self._dirty or self.path is None:
+            return
+
+        store = self._loadStore()
+        if len(store) > self.maxStoredEntries:
+            keep = sorted(store.items(), key=lambda i: i[1]["used"], reverse=True)[:self.maxStoredEntries]
+            self._store = store = dict(keep)
+
+        # Writes to a temporary file first, so a crash can't leave a corrupt store behind
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(store, f)
+        os.replace(tmp, self.path)
+
+        self._dirty = False
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxEntries:
+            self._entries.popitem(last=False)
+
+    def _loadStore(self):
+        if self._store is None:
+            self._store = {}
+            if self.path is not None and os.path.exists(self.path):
+                try:
+                    with open(self.path) as f:
+                        self._store = json.load(f)
+                except (OSError, ValueError):
+                    # A broken store is discarded and rebuilt
+                    self._store = {}
+
+            # Entries beyond a lowered limit are evicted with the next save
+            if(len(self._store) > self.maxStoredEntries):
+                self._dirty = True
+        return self._store
+
+
+class NfpStore(OutlineCache):
+    """Persistent store of no-fit polygons computed by the palette
+
+    Keys are built by the palette. Every value records the shape hashes of
+    both polygons, so the entries of a nest can be selected without
+    knowing how the keys are built.
+
+    Args:
+        path: (str) JSON file of the persistent store, None to only cache in memory
+        maxEntries: (int) Maximum number of entries kept in memory
+        maxStoredEntries: (int) Maximum number of entries kept on disk
+    """
+
+    def select(self, hashes):
+        """Collects the no-fit polygons between shapes of a nest
+
+        Args:
+            hashes: (set) Shape hashes of the parts and the sheet
+
+        Returns:
+            dict: Key to no-fit polygon, as stored by update
+        """
+
+        now = time.time()
+        rtn = {}
+
+        for key, entry in self._loadStore().items():
+            if all(h in hashes for h in entry["value"]["shapes"]):
+                # Selected entries count as used, so they survive eviction. The time
+                # alone doesn't need a write, it is stored with the next added entries
+                entry["used"] = now
+                rtn[key] = entry["value"]["nfp"]
+
+        return rtn
+
+    def update(self, entries):
+        """Adds no-fit polygons computed by the palette, keys that are already stored are skipped
+
+        Args:
+            entries: (dict) Key to {"shapes": [hashA, hashB], "nfp": [[x0, y0, x1, y1, ...], ...]}
+        """
+
+        store = self._loadStore()
+        for key, value in entries.items():
+            if key not in store:
+                self.put(key, None, value)
+
+
+def _normalize(fingerprint):
+    # Fingerprints are compared after a JSON round trip, so tuples and lists are equal
+    return json.loads(json.dumps(fingerprint))
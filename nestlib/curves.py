@@ -0,0 +1,277 @@
+"""Plain Python snapshots of sketch profiles and B-Rep loops
+
+Reading geometry from Fusion360 is a roundtrip per property, so every
+curve of a loop is read once into a Curve. Working out the orientation of
+a loop, which curves run backwards and the path segments all happens on
+these snapshots without touching the adsk module.
+
+Fusion360 neither returns the curves of a loop in order nor running in the
+same direction, so they are chained end to end through a grid of their end
+points first.
+
+Coordinates are in model units (cm) with the y-axis pointing up, as read
+from Fusion360.
+"""
+
+import math
+
+from . import outline, svgpath
+
+
+# Curve types
+LINE = "line"
+ARC = "arc"
+CIRCLE = "circle"
+ELLIPSE = "ellipse"
+ELLIPTICAL_ARC = "ellipticalArc"
+POLYLINE = "polyline"
+
+# Maximum distance of end points to be considered connected, in cm
+POINT_TOLERANCE = 1e-4
+
+
+class Curve(object):
+    """Snapshot of a single curve of a loop
+
+    Attributes:
+        kind: (str) Curve type, or the geometry type of curves that can't be converted
+        start: ((float, float)) Start point, the same as end for circles and ellipses
+        end: ((float, float)) End point
+        radii: ((float, float)) Radii of arcs, circles and ellipses
+        rotation: (float) Rotation of the ellipse axes in SVG degrees
+        sweep: (float) Angle spanned by arcs in radians, of the parameter of elliptical arcs
+        clockwise: (bool) True if an arc runs clockwise around the Z axis
+        points: ([(float, float)]) Points of polylines including start and end, the opposite point of circles and ellipses
+    """
+
+    __slots__ = ("kind", "start", "end", "radii", "rotation", "sweep", "clockwise", "points")
+
+    def __init__(self, kind, start, end, radii=None, rotation=0, sweep=0, clockwise=False, points=None):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.radii = radii
+        self.rotation = rotation
+        self.sweep = sweep
+        self.clockwise = clockwise
+        self.points = points
+
+    def area(self):
+        """Signed area enclosed by the curve and the chord from its end back to its start
+
+        Returns:
+            float: Area, positive counterclockwise
+        """
+
+        if(self.kind in (ARC, ELLIPTICAL_ARC)):
+            segment = self.radii[0] * self.radii[1] / 2 * (self.sweep - math.sin(self.sweep))
+            return -segment if self.clockwise else segment
+
+        # Full turns are written counterclockwise for ellipses and clockwise for circles
+        if(self.kind == ELLIPSE):
+            return math.pi * self.radii[0] * self.radii[1]
+        if(self.kind == CIRCLE):
+            return -math.pi * self.radii[0] * self.radii[1]
+
+        if(self.kind == POLYLINE):
+            return svgpath.polygonArea(self.points)
+
+        return 0.0
+
+
+class CurveLoop(object):
+    """Snapshot of a profile loop or B-Rep loop
+
+    Attributes:
+        curves: ([Curve]) Curves in the order of the loop, not all of them running in the same direction
+        isOuter: (bool) True for the outer loop of a profile
+    """
+
+    __slots__ = ("curves", "isOuter")
+
+    def __init__(self, curves, isOuter=True):
+        self.curves = curves
+        self.isOuter = isOuter
+
+
+def chainCurves(curves, tol=POINT_TOLERANCE):
+    """Orders the curves of a loop end to end, whatever order and direction they were read in
+
+    End points are hashed into a grid of the tolerance, so finding the next
+    curve only looks at the neighbouring cells of the current end point.
+    Gaps larger than the tolerance are bridged by the nearest remaining end
+    point, with a warning as the loop is not closed.
+
+    Args:
+        curves: ([Curve]) Curves of the loop
+        tol: (float) Maximum distance of connected end points
+
+    Returns:
+        ([(Curve, bool)], float): Curves in chain order, True for those running backwards, and the signed area of the loop in that direction, positive counterclockwise
+    """
+
+    if(not curves):
+        return [], 0.0
+
+    # Cell of every end point, as (curve index, True for the end point)
+    grid = {}
+    for i, c in enumerate(curves):
+        for end, p in ((False, c.start), (True, c.end)):
+            grid.setdefault((math.floor(p[0] / tol), math.floor(p[1] / tol)), []).append((i, end))
+
+    used = [False] * len(curves)
+    used[0] = True
+    chain = [(curves[0], False)]
+    point = curves[0].end
+    area = curves[0].area()
+    chord = _cross(curves[0].start, curves[0].end)
+
+    gaps = 0
+    for _ in range(len(curves) - 1):
+        match = _nearestEnd(grid, curves, used, point, tol)
+        if match is None:
+            match = min(
+                ((i, end) for i, c in enumerate(curves) if not used[i] for end in (False, True)),
+                key=lambda m: _distance(curves[m[0]].end if m[1] else curves[m[0]].start, point)
+            )
+            gaps += 1
+
+        i, backwards = match
+        c = curves[i]
+        used[i] = True
+        chain.append((c, backwards))
+
+        sp, ep = (c.end, c.start) if backwards else (c.start, c.end)
+        area += -c.area() if backwards else c.area()
+        chord += _cross(sp, ep)
+        point = ep
+
+    if(_distance(point, curves[0].start) > tol):
+        gaps += 1
+    if(gaps):
+        print("Warning: Loop is not closed, bridged {} gap(s) with straight lines".format(gaps))
+
+    # Closes the polygon of the chords
+    chord += _cross(point, curves[0].start)
+
+    return chain, area + chord / 2
+
+
+def _cross(a, b):
+    return a[0] * b[1] - a[1] * b[0]
+
+
+def _distance(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def _nearestEnd(grid, curves, used, point, tol):
+    cx = math.floor(point[0] / tol)
+    cy = math.floor(point[1] / tol)
+
+    best = None
+    bestDistance = tol
+    for x in (cx - 1, cx, cx + 1):
+        for y in (cy - 1, cy, cy + 1):
+            for i, end in grid.get((x, y), ()):
+                if used[i]:
+                    continue
+                d = _distance(curves[i].end if end else curves[i].start, point)
+                if(d <= bestDistance):
+                    best = (i, end)
+                    bestDistance = d
+    return best
+
+
+def loopToOutline(loop, scale=1):
+    """Converts a loop into an outline loop, outer loops running clockwise and inner loops counterclockwise
+
+    Args:
+        loop: (CurveLoop) Loop to convert
+        scale: (float) How many units are per SVG unit
+
+    Returns:
+        outline.Loop: Loop in SVG units
+    """
+
+    rtn = outline.Loop(loop.isOuter)
+    chain, area = chainCurves(loop.curves)
+
+    if(loop.isOuter == (area > 0)):
+        chain = [(c, not backwards) for c, backwards in reversed(chain)]
+
+    for c, backwards in chain:
+        curveToPathSegment(c, rtn, scale, backwards, not len(rtn))
+    return rtn
+
+
+def curveToPathSegment(curve, loop, scale=1, invert=False, moveTo=False):
+    """Converts a curve into a path segment and appends it to a loop
+
+    Args:
+        curve: (Curve) The curve to convert
+        loop: (outline.Loop) Loop the segment is appended to
+        scale: (float) How many units are per SVG unit
+        invert: (bool) Swaps the curve's start and end point
+        moveTo: (bool) Moves to the start point before conversion
+    """
+
+    if(curve.kind == LINE):
+        sp, ep = (curve.end, curve.start) if invert else (curve.start, curve.end)
+
+        if(moveTo):
+            loop.moveTo(sp[0] / scale, -sp[1] / scale)
+        loop.lineTo(ep[0] / scale, -ep[1] / scale)
+
+    elif(curve.kind in (ARC, ELLIPTICAL_ARC)):
+        sp, ep = (curve.end, curve.start) if invert else (curve.start, curve.end)
+
+        if(moveTo):
+            loop.moveTo(sp[0] / scale, -sp[1] / scale)
+
+        # rx ry rot large_af sweep_af x y
+        loop.arcTo(
+            curve.radii[0] / scale,
+            curve.radii[1] / scale,
+            curve.rotation,
+            curve.sweep > math.pi,
+            curve.clockwise != invert,
+            ep[0] / scale,
+            -ep[1] / scale
+        )
+
+    elif(curve.kind in (CIRCLE, ELLIPSE)):
+        sp = curve.start
+        ep = curve.points[0]
+
+        # Full turns are split into two arcs through the opposite point,
+        # circles and ellipses are read with opposite sweep directions
+        if(curve.kind == CIRCLE):
+            flags = ((0, 0), (1, 0)) if invert else ((1, 1), (0, 1))
+        else:
+            flags = ((0, 1), (1, 1)) if invert else ((1, 0), (0, 0))
+
+        if(moveTo):
+            loop.moveTo(sp[0] / scale, -sp[1] / scale)
+
+        for (large, sweep), p in zip(flags, (ep, sp)):
+            loop.arcTo(
+                curve.radii[0] / scale,
+                curve.radii[1] / scale,
+                curve.rotation,
+                large,
+                sweep,
+                p[0] / scale,
+                -p[1] / scale
+            )
+
+    elif(curve.kind == POLYLINE):
+        points = curve.points[::-1] if invert else curve.points
+
+        if(moveTo):
+            loop.moveTo(points[0][0] / scale, -points[0][1] / scale)
+        for i in points[1:]:
+            loop.lineTo(i[0] / scale, -i[1] / scale)
+
+    else:
+        print("Warning: Unsupported curve type, could not be converted: {}".format(curve.kind))
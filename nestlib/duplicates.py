@@ -0,0 +1,205 @@
+"""Finds identical parts, so every shape is only nested once
+
+Parts are compared by their flattened outlines, independent of their
+position and rotation in the design. Each group of identical parts is
+nested as a single shape with a quantity and the placements of the copies
+are mapped back onto the bodies afterwards.
+"""
+
+import math
+
+from . import svgpath
+
+
+class _Shape(object):
+    """Position and rotation independent description of a part
+
+    Args:
+        part: (outline.Part) The part
+        tolerance: (float) Curve flattening tolerance in SVG units
+    """
+
+    __slots__ = ("index", "outer", "holes", "area", "perimeter", "lengths")
+
+    def __init__(self, part, tolerance):
+        self.index = part.index
+        self.outer = part.outerPolygon(tolerance)
+        self.holes = []
+
+        if not self.outer or len(self.outer) < 3:
+            self.outer = None
+            return
+
+        # Both copies are compared in the same winding direction
+        self.area = svgpath.polygonArea(self.outer)
+        if(self.area < 0):
+            self.outer.reverse()
+            self.area = -self.area
+
+        outer = part.outer()
+        for l in part.loops:
+            if l is outer:
+                continue
+            flat = l.flatten(tolerance)
+            hole = list(zip(flat[0::2], flat[1::2]))
+            if(len(hole) > 2):
+                self.holes.append((abs(svgpath.polygonArea(hole)), _centroid(hole)))
+
+        n = len(self.outer)
+        self.lengths = [math.dist(self.outer[i], self.outer[(i + 1) % n]) for i in range(n)]
+        self.perimeter = sum(self.lengths)
+
+    def key(self, tolerance):
+        """Bucket of shapes that may be identical
+
+        Quantization is coarse compared to the tolerance, parts on either side
+        of a boundary are just not merged.
+        """
+
+        step = max(self.perimeter * tolerance * 10, 1e-9)
+        return (len(self.outer), len(self.holes), round(self.area / step), round(self.perimeter / max(len(self.outer) * tolerance * 10, 1e-9)))
+
+    def match(self, other, tolerance):
+        """Finds the transform mapping this shape onto another one
+
+        Args:
+            other: (_Shape) Shape to match
+            tolerance: (float) Maximum distance of matched vertices in SVG units
+
+        Returns:
+            (float, float, float): Rotation in degrees and translation, None if the shapes differ
+        """
+
+        n = len(self.outer)
+        if(n != len(other.outer) or len(self.holes) != len(other.holes)):
+            return None
+
+        for k in range(n):
+            # Edge lengths are compared first, they are cheap and reject most offsets
+            if any(abs(self.lengths[i] - other.lengths[(i + k) % n]) > 2 * tolerance for i in range(n)):
+                continue
+
+            a0, a1 = self.outer[0], self.outer[1 % n]
+            b0, b1 = other.outer[k], other.outer[(k + 1) % n]
+            theta = math.atan2(b1[1] - b0[1], b1[0] - b0[0]) - math.atan2(a1[1] - a0[1], a1[0] - a0[0])
+
+            cos, sin = math.cos(theta), math.sin(theta)
+            dx = b0[0] - (cos * a0[0] - sin * a0[1])
+            dy = b0[1] - (sin * a0[0] + cos * a0[1])
+
+            def transform(p):
+                return (cos * p[0] - sin * p[1] + dx, sin * p[0] + cos * p[1] + dy)
+
+            if any(math.dist(transform(p), other.outer[(i + k) % n]) > tolerance for i, p in enumerate(self.outer)):
+                continue
+
+            # Holes may be flattened differently, only their size and position are compared
+            remaining = list(other.holes)
+            for area, center in self.holes:
+                center = transform(center)
+                for j, (otherArea, otherCenter) in enumerate(remaining):
+                    if(abs(area - otherArea) <= self.perimeter * tolerance and math.dist(center, otherCenter) <= tolerance):
+                        del remaining[j]
+                        break
+                else:
+                    break
+            if remaining:
+                continue
+
+            return math.degrees(theta), dx, dy
+
+        return None
+
+
+def findDuplicates(parts, tolerance=0.01, flattenTolerance=0.3):
+    """Groups parts with the same outline, regardless of position and rotation
+
+    Args:
+        parts: ([outline.Part]) Parts to group
+        tolerance: (float) Maximum deviation of identical outlines in SVG units
+        flattenTolerance: (float) Curve flattening tolerance in SVG units
+
+    Returns:
+        [[(int, float, float, float)]]: Groups of part index, rotation in degrees and translation.
+            The first entry of a group is the part representing it, the others are
+            the transforms mapping it onto the respective copy
+    """
+
+    groups = []
+    buckets = {}
+
+    for part in parts:
+        shape = _Shape(part, flattenTolerance)
+
+        if shape.outer is None:
+            groups.append([(shape.index, 0.0, 0.0, 0.0)])
+            continue
+
+        candidates = buckets.setdefault(shape.key(tolerance), [])
+
+        for group, representative in candidates:
+            match = representative.match(shape, tolerance)
+            if match is not None:
+                group.append((shape.index,) + match)
+                break
+        else:
+            group = [(shape.index, 0.0, 0.0, 0.0)]
+            candidates.append((group, shape))
+            groups.append(group)
+
+    return groups
+
+
+def expandPlacements(placements, groups, unitFactor=1):
+    """Maps the placements of the copies of a part back to the bodies
+
+    Copies are interchangeable, so the n-th placement of a group is used for its n-th member.
+
+    Args:
+        placements: ([(int, float[])]) List of part index and transform data (x, y, r, sheet),
+            one entry per placed copy
+        groups: ([[(int, float, float, float)]]) Groups, as returned by findDuplicates
+        unitFactor: (float) SVG units per model unit of the placements
+
+    Returns:
+        [(int, float[])]: List of body index and transform data (x, y, r, sheet)
+    """
+
+    members = {g[0][0]: iter(g) for g in groups}
+
+    rtn = []
+    for index, t in placements:
+        if index not in members:
+            rtn.append((index, t))
+            continue
+
+        member = next(members[index], None)
+        if member is None:
+            continue
+
+        # The copy is mapped back onto the representative first, then placed like it
+        body, rotation, dx, dy = member
+        r = t[2] - rotation
+        cos, sin = math.cos(math.radians(r)), math.sin(math.radians(r))
+
+        rtn.append((body, [
+            t[0] - (cos * dx - sin * dy) / unitFactor,
+            t[1] - (sin * dx + cos * dy) / unitFactor,
+            round(r, 9) % 360,
+            t[3]
+        ]))
+
+    return rtn
+
+
+def _centroid(polygon):
+    area = svgpath.polygonArea(polygon)
+    if(abs(area) < 1e-12):
+        return (sum(p[0] for p in polygon) / len(polygon), sum(p[1] for p in polygon) / len(polygon))
+
+    cx = cy = 0
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        f = x1 * y2 - x2 * y1
+        cx += (x1 + x2) * f
+        cy += (y1 + y2) * f
+    return (cx / (6 * area), cy / (6 * area))
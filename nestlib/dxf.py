@@ -0,0 +1,441 @@
+"""Reads part outlines from ASCII DXF files
+
+Lines, arcs, circles, ellipses, splines and polylines of the ENTITIES
+section are read into curves snapshots, chained into loops and converted
+the same way as loops read from Fusion360. Loops that are not inside
+another loop are the outer loops of separate parts, loops inside them
+their holes.
+
+Coordinates are converted to model units (cm) using the $INSUNITS header
+variable, drawings without units are read as millimeters.
+"""
+
+import math
+
+from . import curves, outline, svgpath
+
+
+# Centimeters per drawing unit by $INSUNITS code
+UNITS = {
+    1: 2.54,
+    2: 30.48,
+    4: 0.1,
+    5: 1.0,
+    6: 100.0
+}
+
+# Drawings without units are read as millimeters
+DEFAULT_UNITS = 4
+
+# Maximum number of passes splitting spline segments until they are within tolerance
+MAX_SPLINE_PASSES = 12
+
+
+def readDXF(path, firstIndex=0, tolerance=0.002, unitFactor=100):
+    """Reads the parts of a DXF file
+
+    Args:
+        path: (str) DXF file
+        firstIndex: (int) Index of the first part, the others are numbered consecutively
+        tolerance: (float) Chord tolerance for splines in cm
+        unitFactor: (float) SVG units per model unit
+
+    Returns:
+        [outline.Part]: Parts, largest first
+    """
+
+    with open(path, errors="replace") as f:
+        return partsFromDXF(f.read(), firstIndex, tolerance, unitFactor)
+
+
+def partsFromDXF(text, firstIndex=0, tolerance=0.002, unitFactor=100):
+    """Reads the parts of DXF data, see readDXF
+
+    Args:
+        text: (str) Content of a DXF file
+
+    Returns:
+        [outline.Part]: Parts, largest first
+    """
+
+    pairs = _groupPairs(text)
+    scale = UNITS.get(_units(pairs) or DEFAULT_UNITS, UNITS[DEFAULT_UNITS])
+
+    loops = []
+    for group in _connected(readCurves(pairs, scale, tolerance)):
+        loop = curves.CurveLoop(group, True)
+        polygon = outline.Part(0, [curves.loopToOutline(loop, 1 / unitFactor)]).outerPolygon(tolerance * unitFactor)
+        loops.append((abs(svgpath.polygonArea(polygon)), polygon, loop))
+
+    # Containing loops are always larger, so every loop comes after its container
+    loops.sort(key=lambda l: -l[0])
+
+    parts = []
+    owners = []
+    for i, (area, polygon, loop) in enumerate(loops):
+        containers = [j for j in range(i) if _contains(loops[j][1], polygon[0])]
+
+        # Loops at an odd depth are holes of the innermost loop around them
+        if(len(containers) % 2):
+            loop.isOuter = False
+            part = owners[containers[-1]]
+            part.loops.append(curves.loopToOutline(loop, 1 / unitFactor))
+        else:
+            part = outline.Part(firstIndex + len(parts), [curves.loopToOutline(loop, 1 / unitFactor)])
+            parts.append(part)
+        owners.append(part)
+
+    return parts
+
+
+def readCurves(pairs, scale=1, tolerance=0.002):
+    """Reads the curves of the ENTITIES section
+
+    Args:
+        pairs: ([(int, str)]) Group codes and values, see _groupPairs
+        scale: (float) Centimeters per drawing unit
+        tolerance: (float) Chord tolerance for splines in cm
+
+    Returns:
+        [curves.Curve]: Curves in model units
+    """
+
+    rtn = []
+    polyline = None
+
+    for kind, values in _entities(pairs):
+        # Old style polylines are made of VERTEX entities up to a SEQEND
+        if(kind == "POLYLINE"):
+            polyline = (values, [])
+            continue
+        if(kind == "VERTEX" and polyline is not None):
+            polyline[1].append(values)
+            continue
+        if(kind == "SEQEND" and polyline is not None):
+            values, vertices = polyline
+            polyline = None
+            points = [(_float(v, 10), _float(v, 20), _float(v, 42)) for v in vertices]
+            read = _polyline(points, int(_float(values, 70)) & 1)
+        else:
+            read = _entity(kind, values, tolerance / scale)
+
+        if read is None:
+            continue
+
+        # Entities drawn on the back of the XY plane are mirrored in x
+        if(_float(values, 230, 1) < 0):
+            read = [_mirror(c) for c in read]
+
+        rtn.extend(_scale(c, scale) for c in read)
+
+    return rtn
+
+
+def _entity(kind, values, tolerance):
+    if(kind == "LINE"):
+        return [curves.Curve(curves.LINE, (_float(values, 10), _float(values, 20)), (_float(values, 11), _float(values, 21)))]
+
+    if(kind == "ARC"):
+        cx, cy, r = _float(values, 10), _float(values, 20), _float(values, 40)
+        a0 = math.radians(_float(values, 50))
+        a1 = math.radians(_float(values, 51))
+        return [curves.Curve(
+            curves.ARC,
+            (cx + r * math.cos(a0), cy + r * math.sin(a0)),
+            (cx + r * math.cos(a1), cy + r * math.sin(a1)),
+            (r, r),
+            sweep=(a1 - a0) % (2 * math.pi) or 2 * math.pi
+        )]
+
+    if(kind == "CIRCLE"):
+        return [_circle(_float(values, 10), _float(values, 20), _float(values, 40))]
+
+    if(kind == "ELLIPSE"):
+        return [_ellipse(values)]
+
+    if(kind == "LWPOLYLINE"):
+        points = []
+        for code, value in values:
+            if(code == 10):
+                points.append([float(value), 0.0, 0.0])
+            elif(code == 20 and points):
+                points[-1][1] = float(value)
+            elif(code == 42 and points):
+                points[-1][2] = float(value)
+        return _polyline(points, int(_float(values, 70)) & 1)
+
+    if(kind == "SPLINE"):
+        return [_spline(values, tolerance)]
+
+    if(kind not in ("POINT", "TEXT", "MTEXT", "DIMENSION", "INSERT", "HATCH")):
+        print("Warning: Unsupported DXF entity, it is left out: {}".format(kind))
+    return None
+
+
+def _ellipse(values):
+    cx, cy = _float(values, 10), _float(values, 20)
+    mx, my = _float(values, 11), _float(values, 21)
+    major = math.hypot(mx, my)
+    minor = major * _float(values, 40, 1)
+    t0 = _float(values, 41)
+    t1 = _float(values, 42, 2 * math.pi)
+    rotation = -math.degrees(math.atan2(my, mx))
+
+    def point(t):
+        # The minor axis is the major axis turned counterclockwise
+        return (
+            cx + math.cos(t) * mx - math.sin(t) * my * minor / major,
+            cy + math.cos(t) * my + math.sin(t) * mx * minor / major
+        )
+
+    sweep = (t1 - t0) % (2 * math.pi)
+    if(sweep < 1e-9):
+        return _fullEllipse(cx, cy, mx, my, minor)
+
+    return curves.Curve(curves.ELLIPTICAL_ARC, point(t0), point(t1), (major, minor), rotation, sweep)
+
+
+def _circle(cx, cy, r):
+    # Same start and opposite point as circles read from Fusion360
+    return curves.Curve(curves.CIRCLE, (cx + r, cy), (cx + r, cy), (r, r), points=[(cx, cy + r)])
+
+
+def _fullEllipse(cx, cy, mx, my, minor):
+    # Ends of the major axis and of the minor axis, turned clockwise from it, as read from Fusion360
+    major = math.hypot(mx, my)
+    sp = (cx + mx, cy + my)
+    ep = (cx + my / major * minor, cy - mx / major * minor)
+    return curves.Curve(curves.ELLIPSE, sp, sp, (major, minor), -math.degrees(math.atan2(my, mx)), points=[ep])
+
+
+def _polyline(points, closed):
+    """Curves of a polyline
+
+    Args:
+        points: ([(float, float, float)]) Vertices with the bulge of the segment that starts at them
+        closed: (bool) True if the last vertex connects back to the first one
+    """
+
+    rtn = []
+    count = len(points) if closed else len(points) - 1
+    for i in range(count):
+        x1, y1, bulge = points[i]
+        x2, y2 = points[(i + 1) % len(points)][:2]
+        if(x1 == x2 and y1 == y2):
+            continue
+
+        if(abs(bulge) < 1e-12):
+            rtn.append(curves.Curve(curves.LINE, (x1, y1), (x2, y2)))
+            continue
+
+        # The bulge is the tangent of a quarter of the arc's sweep, negative for clockwise arcs
+        sweep = 4 * math.atan(abs(bulge))
+        r = math.hypot(x2 - x1, y2 - y1) / 2 / math.sin(sweep / 2)
+        rtn.append(curves.Curve(curves.ARC, (x1, y1), (x2, y2), (r, r), sweep=sweep, clockwise=bulge < 0))
+
+    return rtn
+
+
+def _spline(values, tolerance):
+    degree = int(_float(values, 71, 3))
+    knots = [float(v) for c, v in values if c == 40]
+    weights = [float(v) for c, v in values if c == 41]
+    control = [float(v) for c, v in values if c == 10]
+    control = list(zip(control, (float(v) for c, v in values if c == 20)))
+
+    # Splines without control points are given by the points they pass through
+    if(not control):
+        fit = list(zip((float(v) for c, v in values if c == 11), (float(v) for c, v in values if c == 21)))
+        return curves.Curve(curves.POLYLINE, fit[0], fit[-1], points=fit)
+
+    if(len(weights) != len(control)):
+        weights = [1.0] * len(control)
+
+    def point(t):
+        return _deBoor(t, degree, knots, control, weights)
+
+    t0, t1 = knots[degree], knots[len(knots) - degree - 1]
+    points = _tessellate(point, t0, t1, tolerance, len(control) * 2)
+    return curves.Curve(curves.POLYLINE, points[0], points[-1], points=points)
+
+
+def _deBoor(t, degree, knots, control, weights):
+    # Span of the parameter, the last span includes its end
+    k = degree
+    while(k < len(control) - 1 and t >= knots[k + 1]):
+        k += 1
+
+    d = [(control[j][0] * weights[j], control[j][1] * weights[j], weights[j]) for j in range(k - degree, k + 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            i = j + k - degree
+            span = knots[i + degree - r + 1] - knots[i]
+            a = (t - knots[i]) / span if span else 0.0
+            d[j] = tuple((1 - a) * p + a * q for p, q in zip(d[j - 1], d[j]))
+
+    x, y, w = d[degree]
+    return (x / w, y / w)
+
+
+def _tessellate(f, t0, t1, tolerance, segments):
+    params = [t0 + (t1 - t0) * i / segments for i in range(segments + 1)]
+    points = [f(t) for t in params]
+
+    for _ in range(MAX_SPLINE_PASSES):
+        newParams = [params[0]]
+        newPoints = [points[0]]
+        split = False
+        for i in range(len(params) - 1):
+            m = (params[i] + params[i + 1]) / 2
+            mp = f(m)
+            if(_deviation(points[i], points[i + 1], mp) > tolerance):
+                newParams.append(m)
+                newPoints.append(mp)
+                split = True
+            newParams.append(params[i + 1])
+            newPoints.append(points[i + 1])
+        params, points = newParams, newPoints
+        if not split:
+            break
+
+    return points
+
+
+def _deviation(a, b, p):
+    length = math.hypot(b[0] - a[0], b[1] - a[1])
+    if(length == 0):
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    return abs((b[0] - a[0]) * (a[1] - p[1]) - (a[0] - p[0]) * (b[1] - a[1])) / length
+
+
+def _mirror(c):
+    angle = math.radians(-c.rotation)
+
+    # Full turns are rebuilt, so their opposite point stays on the side the path expects
+    if(c.kind == curves.CIRCLE):
+        return _circle(-(c.start[0] - c.radii[0]), c.start[1], c.radii[0])
+    if(c.kind == curves.ELLIPSE):
+        mx, my = c.radii[0] * math.cos(angle), c.radii[0] * math.sin(angle)
+        return _fullEllipse(-(c.start[0] - mx), c.start[1] - my, -mx, my, c.radii[1])
+
+    flip = lambda p: (-p[0], p[1])
+    return curves.Curve(
+        c.kind,
+        flip(c.start),
+        flip(c.end),
+        c.radii,
+        -math.degrees(math.atan2(math.sin(angle), -math.cos(angle))),
+        c.sweep,
+        not c.clockwise if c.kind in (curves.ARC, curves.ELLIPTICAL_ARC) else c.clockwise,
+        [flip(p) for p in c.points] if c.points else c.points
+    )
+
+
+def _scale(c, scale):
+    if(scale == 1):
+        return c
+    s = lambda p: (p[0] * scale, p[1] * scale)
+    return curves.Curve(
+        c.kind,
+        s(c.start),
+        s(c.end),
+        (c.radii[0] * scale, c.radii[1] * scale) if c.radii else c.radii,
+        c.rotation,
+        c.sweep,
+        c.clockwise,
+        [s(p) for p in c.points] if c.points else c.points
+    )
+
+
+def _connected(items, tol=curves.POINT_TOLERANCE):
+    """Groups curves whose end points touch
+
+    Args:
+        items: ([curves.Curve]) Curves
+        tol: (float) Maximum distance of touching end points
+
+    Returns:
+        [[curves.Curve]]: Groups in the order of their first curve
+    """
+
+    parent = list(range(len(items)))
+
+    def find(i):
+        while(parent[i] != i):
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    grid = {}
+    for i, c in enumerate(items):
+        for p in (c.start, c.end):
+            cx, cy = math.floor(p[0] / tol), math.floor(p[1] / tol)
+            for x in (cx - 1, cx, cx + 1):
+                for y in (cy - 1, cy, cy + 1):
+                    for j, q in grid.get((x, y), ()):
+                        if(math.hypot(p[0] - q[0], p[1] - q[1]) <= tol):
+                            parent[find(i)] = find(j)
+            grid.setdefault((cx, cy), []).append((i, p))
+
+    groups = {}
+    for i, c in enumerate(items):
+        groups.setdefault(find(i), []).append(c)
+    return list(groups.values())
+
+
+def _contains(polygon, point):
+    x, y = point
+    inside = False
+    for i in range(len(polygon)):
+        x1, y1 = polygon[i - 1]
+        x2, y2 = polygon[i]
+        if((y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1):
+            inside = not inside
+    return inside
+
+
+def _groupPairs(text):
+    lines = text.splitlines()
+    return [(int(lines[i].strip()), lines[i + 1].strip()) for i in range(0, len(lines) - 1, 2)]
+
+
+def _units(pairs):
+    for i, (code, value) in enumerate(pairs):
+        if(code == 9 and value == "$INSUNITS" and i + 1 < len(pairs)):
+            return int(pairs[i + 1][1])
+        if(code == 0 and value == "ENDSEC"):
+            break
+    return None
+
+
+def _entities(pairs):
+    """Yields the type and group codes of every entity of the ENTITIES section"""
+
+    section = None
+    kind = None
+    values = []
+
+    for i, (code, value) in enumerate(pairs):
+        if(code == 2 and i > 0 and pairs[i - 1] == (0, "SECTION")):
+            section = value
+            continue
+
+        if(code != 0):
+            if kind is not None:
+                values.append((code, value))
+            continue
+
+        if kind is not None:
+            yield kind, values
+        kind = value if section == "ENTITIES" and value not in ("SECTION", "ENDSEC", "EOF") else None
+        values = []
+
+    if kind is not None:
+        yield kind, values
+
+
+def _float(values, code, default=0.0):
+    for c, v in values:
+        if(c == code):
+            return float(v)
+    return default
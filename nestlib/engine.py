@@ -0,0 +1,904 @@
+"""Headless nesting engine
+
+A Python port of the SVGnest strategy: parts are placed one after another
+at the best position on the boundary of their no-fit polygons, and a
+genetic algorithm searches over insertion order and rotation.
+
+No-fit polygons are built from convex decompositions of the parts, so
+they are exact for the outer contour of a part. Holes are treated as
+solid, so no part-in-part nesting is done.
+
+The individuals of a generation can be placed in worker processes, see
+ParallelEvaluator.
+"""
+
+import pickle
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import feasibility
+from . import geometry
+from . import svgpath
+
+
+# Number of candidate positions tested for overlaps at once, bounds memory use
+CANDIDATE_CHUNK_SIZE = 512
+
+# Number of random rotations checked against the sheet before a part falls back to no rotation
+ANGLE_ATTEMPTS = 16
+
+# Number of shared blocks of new no-fit polygons before they are merged into one
+NFP_BLOCKS_MAX = 32
+
+
+class NestResult(object):
+    """Placement of all parts for one individual
+
+    Attributes:
+        sheets: ([[(int, float, float, float)]]) Per sheet list of (id, x, y, rotation)
+        fitness: (float) Lower is better
+        unplaced: ([int]) Ids of parts that could not be placed
+        utilization: (float) Placed part area / used sheet area
+    """
+
+    def __init__(self, sheets, fitness, unplaced, utilization):
+        self.sheets = sheets
+        self.fitness = fitness
+        self.unplaced = unplaced
+        self.utilization = utilization
+
+
+class PlacementEvaluator(object):
+    """Places parts for a given insertion order and set of rotations
+
+    Args:
+        polygons: ([ndarray]) Part outlines in SVG units, indexed by part id
+        width: (float) Sheet width in SVG units
+        height: (float) Sheet height in SVG units
+        spacing: (float) Spacing between parts in SVG units
+        maxPieces: (int) Maximum number of convex pieces per part before falling back to the hull
+        shapes: ([int]) Shape of each part, copies of a shape share their no-fit polygons. Identity if None
+        fixed: ([[(int, float, float, float)]]) Per sheet list of parts that keep their place, as (id, x, y, rotation)
+    """
+
+    def __init__(self, polygons, width, height, spacing=0, maxPieces=12, shapes=None, fixed=None):
+        self.shapes = list(shapes) if shapes is not None else list(range(len(polygons)))
+
+        cleaned = {}
+        for id, shape in enumerate(self.shapes):
+            if shape not in cleaned:
+                cleaned[shape] = geometry.cleanPolygon(polygons[id])
+
+        self.polygons = [cleaned[shape] for shape in self.shapes]
+        self.areas = [abs(svgpath.polygonArea(p)) for p in self.polygons]
+        self.width = width
+        self.height = height
+        self.spacing = spacing
+        self.maxPieces = maxPieces
+        self.fixed = fixed or []
+
+        self.nfpCache = {}
+        self._covered = {}
+        self._pieces = {}
+        self._rotated = {}
+
+    def rotated(self, id, rotation):
+        """Convex pieces of a part grown by half the spacing
+
+        Args:
+            id: (int) Part id
+            rotation: (float) Rotation in degrees
+
+        Returns:
+            ([ndarray], ndarray): Pieces and their combined bounding box
+        """
+
+        shape = self.shapes[id]
+        key = (shape, rotation)
+        if key not in self._rotated:
+            if shape not in self._pieces:
+                self._pieces[shape] = geometry.convexDecomposition(self.polygons[id], self.maxPieces)
+
+            pieces = [
+                geometry.offsetConvex(geometry.rotatePolygon(p, rotation), self.spacing / 2)
+                for p in self._pieces[shape]
+            ]
+            bbox = geometry.boundingBox(np.concatenate(pieces))
+            self._rotated[key] = (pieces, bbox)
+
+        return self._rotated[key]
+
+    def fits(self, id, rotation):
+        """Checks if a part fits on an empty sheet
+
+        Args:
+            id: (int) Part id
+            rotation: (float) Rotation in degrees
+
+        Returns:
+            bool: True if it fits
+        """
+        return self.innerFit(self.rotated(id, rotation)[1]) is not None
+
+    def innerFit(self, bbox):
+        """Region of valid translations that keep a part on the sheet
+
+        Args:
+            bbox: (ndarray) Bounding box of the grown part
+
+        Returns:
+            ndarray: [minX, minY, maxX, maxY] or None if the part does not fit
+        """
+
+        inset = self.spacing / 2
+        ifp = np.array([
+            inset - bbox[0],
+            inset - bbox[1],
+            self.width - inset - bbox[2],
+            self.height - inset - bbox[3]
+        ])
+
+        if(ifp[2] < ifp[0] - geometry.EPSILON or ifp[3] < ifp[1] - geometry.EPSILON):
+            return None
+
+        ifp[2] = max(ifp[0], ifp[2])
+        ifp[3] = max(ifp[1], ifp[3])
+        return ifp
+
+    def nfp(self, idA, rotationA, idB, rotationB):
+        """No-fit polygon pieces of part B around part A
+
+        Args:
+            idA: (int) Id of the stationary part
+            rotationA: (float) Rotation of the stationary part
+            idB: (int) Id of the moving part
+            rotationB: (float) Rotation of the moving part
+
+        Returns:
+            [ndarray]: Convex pieces
+        """
+
+        key = (self.shapes[idA], rotationA, self.shapes[idB], rotationB)
+        nfp = self.nfpCache.get(key)
+        if nfp is None:
+            nfp = geometry.noFitPieces(self.rotated(idA, rotationA)[0], self.rotated(idB, rotationB)[0])
+            self.nfpCache[key] = nfp
+        return nfp
+
+    def coveredEdges(self, idA, rotationA, idB, rotationB):
+        """Edges and vertices of the no-fit polygon pieces that are inside another piece, see geometry.coveredEdges
+
+        Returns:
+            ([ndarray], [ndarray]): Boolean masks per piece for edges and vertices
+        """
+
+        key = (self.shapes[idA], rotationA, self.shapes[idB], rotationB)
+        covered = self._covered.get(key)
+        if covered is None:
+            covered = geometry.coveredEdges(self.nfp(idA, rotationA, idB, rotationB))
+            self._covered[key] = covered
+        return covered
+
+    def place(self, order, rotations):
+        """Places parts in the given order, opening new sheets as required
+
+        Sheets holding fixed parts are filled up first, the fixed parts are
+        part of the result.
+
+        Args:
+            order: ([int]) Part ids in order of insertion
+            rotations: ([float]) Rotation of each part in order
+
+        Returns:
+            NestResult: Placement and fitness
+        """
+
+        remaining = list(zip(order, rotations))
+        sheetArea = self.width * self.height
+
+        sheets = []
+        fitness = 0
+        placedArea = 0
+
+        while(remaining or len(sheets) < len(self.fixed)):
+            fixed = self.fixed[len(sheets)] if len(sheets) < len(self.fixed) else []
+            placed = list(fixed)
+            layoutBox = None
+            fitness += 1
+
+            for id, x, y, rotation in fixed:
+                layoutBox = _extendBox(layoutBox, self.rotated(id, rotation)[1] + np.array([x, y, x, y]))
+
+            for id, rotation in remaining:
+                pieces, bbox = self.rotated(id, rotation)
+                ifp = self.innerFit(bbox)
+
+                if ifp is None:
+                    continue
+
+                if not placed:
+                    position = ifp[:2]
+                else:
+                    position = self._bestPosition(id, rotation, bbox, ifp, placed, layoutBox)
+                    if position is None:
+                        continue
+
+                x, y = float(position[0]), float(position[1])
+                placed.append((id, x, y, rotation))
+                layoutBox = _extendBox(layoutBox, bbox + np.array([x, y, x, y]))
+
+            if not placed:
+                break
+
+            placedIds = set(p[0] for p in placed[len(fixed):])
+            remaining = [r for r in remaining if r[0] not in placedIds]
+            placedArea += sum(self.areas[p[0]] for p in placed)
+
+            fitness += (layoutBox[2] - layoutBox[0]) / sheetArea
+            sheets.append(placed)
+
+        fitness += 2 * len(remaining)
+
+        utilization = placedArea / (sheetArea * len(sheets)) if sheets else 0
+
+        return NestResult(sheets, fitness, [r[0] for r in remaining], utilization)
+
+    def _bestPosition(self, id, rotation, bbox, ifp, placed, layoutBox):
+        """Finds the best valid translation for a part next to already placed parts
+
+        Candidates are the vertices of the translated no-fit polygons, their
+        intersections with each other and with the inner fit rectangle.
+        """
+
+        nfps = []
+        covered = []
+        for pid, px, py, prot in placed:
+            offset = np.array([px, py])
+            edges, vertices = self.coveredEdges(pid, prot, id, rotation)
+            for piece, e, v in zip(self.nfp(pid, prot, id, rotation), edges, vertices):
+                nfps.append(piece + offset)
+                covered.append((e, v))
+
+        boxes = np.array([geometry.boundingBox(n) for n in nfps])
+
+        # Pieces that don't touch the inner fit rectangle can't constrain the placement
+        relevant = (boxes[:, 0] < ifp[2]) & (boxes[:, 2] > ifp[0]) & (boxes[:, 1] < ifp[3]) & (boxes[:, 3] > ifp[1])
+        nfps = [n for n, r in zip(nfps, relevant) if r]
+        covered = [c for c, r in zip(covered, relevant) if r]
+        boxes = boxes[relevant]
+
+        corners = np.array([[ifp[0], ifp[1]], [ifp[2], ifp[1]], [ifp[2], ifp[3]], [ifp[0], ifp[3]]])
+        if not nfps:
+            return corners[0]
+
+        starts, ends, pad = geometry.padPolygons(nfps)
+
+        # Only edges and vertices on the boundary of the union of pieces produce valid positions
+        hidden = pad.copy()
+        buried = pad.copy()
+        for i, (e, v) in enumerate(covered):
+            hidden[i, :len(e)] |= e
+            buried[i, :len(v)] |= v
+
+        candidates = [corners, starts[~buried]]
+
+        # Intersections with the inner fit rectangle
+        candidates.append(geometry.segmentIntersections(starts[~hidden], ends[~hidden], corners, np.roll(corners, -1, axis=0)))
+
+        # Intersections between pieces
+        if len(nfps) > 1:
+            candidates.append(geometry.crossingPoints(starts, ends, hidden))
+
+        points = np.concatenate(candidates)
+
+        tol = geometry.EPSILON * max(1.0, self.width, self.height)
+        valid = (
+            (points[:, 0] >= ifp[0] - tol) & (points[:, 0] <= ifp[2] + tol) &
+            (points[:, 1] >= ifp[1] - tol) & (points[:, 1] <= ifp[3] + tol)
+        )
+        points = points[valid]
+
+        if not len(points):
+            return None
+
+        clipped = np.empty_like(points)
+        clipped[:, 0] = np.clip(points[:, 0], ifp[0], ifp[2])
+        clipped[:, 1] = np.clip(points[:, 1], ifp[1], ifp[3])
+
+        # Smallest combined bounding box, weighing width more to compress towards x=0
+        minX = np.minimum(layoutBox[0], clipped[:, 0] + bbox[0])
+        minY = np.minimum(layoutBox[1], clipped[:, 1] + bbox[1])
+        maxX = np.maximum(layoutBox[2], clipped[:, 0] + bbox[2])
+        maxY = np.maximum(layoutBox[3], clipped[:, 1] + bbox[3])
+        score = np.round((maxX - minX) * 2 + (maxY - minY), 6)
+
+        # Candidates are tested best first, so the search stops at the first valid chunk
+        order = np.lexsort((clipped[:, 1], clipped[:, 0], score))
+        for i in range(0, len(order), CANDIDATE_CHUNK_SIZE):
+            chunk = order[i:i + CANDIDATE_CHUNK_SIZE]
+            inside = geometry.pointsStrictlyInsideAny(points[chunk], starts, ends, pad, boxes)
+            if not inside.all():
+                return clipped[chunk[np.argmin(inside)]]
+
+        return None
+
+
+def _extendBox(box, other):
+    if box is None:
+        return other
+    return np.concatenate((np.minimum(box[:2], other[:2]), np.maximum(box[2:], other[2:])))
+
+
+class ParallelEvaluator(object):
+    """Places individuals in worker processes
+
+    Every worker builds its own PlacementEvaluator from the polygons of the
+    parent's evaluator, which are read from a single shared memory block
+    instead of being pickled for every worker. No-fit polygons computed by
+    a worker are sent back with its result and merged into the parent's
+    cache. The ones that are new to the parent are written to a shared
+    memory block once per generation, which every worker loads once, so
+    each no-fit polygon is only computed by a few workers.
+
+    Args:
+        evaluator: (PlacementEvaluator) Evaluator of the parent, its nfpCache collects the no-fit polygons of all workers
+        workers: (int) Number of worker processes
+    """
+
+    def __init__(self, evaluator, workers):
+        self.evaluator = evaluator
+
+        # Cleaned outline of every shape, one after another
+        first = {}
+        for id, shape in enumerate(evaluator.shapes):
+            first.setdefault(shape, id)
+        shapes = sorted(first)
+        coords = np.concatenate([evaluator.polygons[first[s]] for s in shapes]).astype(np.float64)
+        lengths = [len(evaluator.polygons[first[s]]) for s in shapes]
+
+        self._polygons = shared_memory.SharedMemory(create=True, size=max(coords.nbytes, 1))
+        np.ndarray(coords.shape, coords.dtype, buffer=self._polygons.buf)[:] = coords
+
+        spec = {
+            "polygons": self._polygons.name,
+            "shape": coords.shape,
+            "shapes": shapes,
+            "lengths": lengths,
+            "ids": evaluator.shapes,
+            "width": evaluator.width,
+            "height": evaluator.height,
+            "spacing": evaluator.spacing,
+            "maxPieces": evaluator.maxPieces,
+            "fixed": evaluator.fixed,
+            "nfps": []
+        }
+
+        # No-fit polygons of earlier runs are handed over with the first generation
+        self._blocks = []
+        self._new = dict(evaluator.nfpCache)
+
+        self.pool = ProcessPoolExecutor(workers, initializer=_initWorker, initargs=(spec,))
+
+    def place(self, individuals):
+        """Places individuals, one task per individual
+
+        Args:
+            individuals: ([dict]) Individuals of the GA
+
+        Returns:
+            [NestResult]: Placement of every individual
+        """
+
+        self._publish()
+        blocks = [(b.name, size) for b, size in self._blocks]
+
+        futures = [self.pool.submit(_placeInWorker, i["placement"], i["rotation"], blocks) for i in individuals]
+
+        results = []
+        cache = self.evaluator.nfpCache
+        for f in futures:
+            result, nfps = f.result()
+            for key, nfp in nfps:
+                if key not in cache:
+                    cache[key] = nfp
+                    self._new[key] = nfp
+            results.append(result)
+
+        return results
+
+    def close(self):
+        """Stops the workers and frees the shared memory"""
+
+        self.pool.shutdown()
+        for block in [self._polygons] + [b for b, _ in self._blocks]:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def _publish(self):
+        if not self._new:
+            return
+
+        # Too many blocks are replaced by a single one holding the whole cache
+        if(len(self._blocks) >= NFP_BLOCKS_MAX):
+            for block, _ in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks = []
+            self._new = dict(self.evaluator.nfpCache)
+
+        data = pickle.dumps(list(self._new.items()), pickle.HIGHEST_PROTOCOL)
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        block.buf[:len(data)] = data
+        self._blocks.append((block, len(data)))
+        self._new = {}
+
+
+# State of a worker process of ParallelEvaluator
+_worker = None
+
+
+def _initWorker(spec):
+    global _worker
+
+    block = shared_memory.SharedMemory(name=spec["polygons"])
+    coords = np.ndarray(spec["shape"], np.float64, buffer=block.buf)
+
+    polygons = {}
+    start = 0
+    for shape, length in zip(spec["shapes"], spec["lengths"]):
+        polygons[shape] = coords[start:start + length]
+        start += length
+
+    evaluator = PlacementEvaluator(
+        [polygons[s] for s in spec["ids"]],
+        spec["width"],
+        spec["height"],
+        spec["spacing"],
+        spec["maxPieces"],
+        spec["ids"],
+        spec["fixed"]
+    )
+    _worker = {"evaluator": evaluator, "block": block, "loaded": set()}
+
+
+def _placeInWorker(order, rotations, blocks):
+    evaluator = _worker["evaluator"]
+    cache = evaluator.nfpCache
+
+    # No-fit polygons of the other workers
+    for name, size in blocks:
+        if name in _worker["loaded"]:
+            continue
+        block = shared_memory.SharedMemory(name=name)
+        for key, nfp in pickle.loads(bytes(block.buf[:size])):
+            cache.setdefault(key, nfp)
+        block.close()
+        _worker["loaded"].add(name)
+
+    known = len(cache)
+    result = evaluator.place(order, rotations)
+
+    # Entries are only ever added, so the new ones are at the end
+    return result, list(cache.items())[known:]
+
+
+class GeneticAlgorithm(object):
+    """Searches insertion order and rotations, mirrors the GA of SVGnest
+
+    Args:
+        ids: ([int]) Part ids, in the order of the first individual
+        rotations: (int) Number of evenly spaced rotations
+        allowed: ({int: [(int, int)]}) Ranges of rotation indices per part id, see feasibility.fittingRotations
+        fits: (callable) fits(id, angle) -> bool, used to skip angles that can't fit the sheet
+        populationSize: (int) Number of individuals
+        mutationRate: (int) Mutation rate in percent
+        rng: (random.Random) Random number generator
+    """
+
+    def __init__(self, ids, rotations, allowed, fits, populationSize=10, mutationRate=10, rng=None):
+        self.rotations = rotations
+        self.allowed = allowed
+        self.fits = fits
+        self.mutationRate = mutationRate
+        self.rng = rng or random.Random()
+
+        adam = {"placement": list(ids), "rotation": [self.randomAngle(i) for i in ids], "fitness": None}
+        self.population = [adam]
+
+        while(len(self.population) < populationSize):
+            self.population.append(self.mutate(adam))
+
+    def randomAngle(self, id):
+        """Picks a random rotation at which the part fits the sheet
+
+        Args:
+            id: (int) Part id
+
+        Returns:
+            float: Rotation in degrees
+        """
+
+        ranges = self.allowed[id]
+        count = feasibility.countRotations(ranges)
+
+        # Ranges are based on bounding boxes, the grown outline may still not fit
+        if(count <= ANGLE_ATTEMPTS):
+            indices = [feasibility.pickRotation(ranges, i) for i in range(count)]
+            self.rng.shuffle(indices)
+        else:
+            indices = [feasibility.pickRotation(ranges, self.rng.randrange(count)) for _ in range(ANGLE_ATTEMPTS)]
+
+        for i in indices:
+            a = feasibility.angle(i, self.rotations)
+            if self.fits(id, a):
+                return a
+        return 0
+
+    def mutate(self, individual):
+        """Swaps neighbouring parts and changes rotations at random
+
+        Args:
+            individual: (dict) Individual to mutate
+
+        Returns:
+            dict: Mutated copy
+        """
+
+        placement = list(individual["placement"])
+        rotation = list(individual["rotation"])
+
+        for i in range(len(placement)):
+            if(self.rng.random() < 0.01 * self.mutationRate and i + 1 < len(placement)):
+                placement[i], placement[i+1] = placement[i+1], placement[i]
+                rotation[i], rotation[i+1] = rotation[i+1], rotation[i]
+
+            if(self.rng.random() < 0.01 * self.mutationRate):
+                rotation[i] = self.randomAngle(placement[i])
+
+        return {"placement": placement, "rotation": rotation, "fitness": None}
+
+    def mate(self, male, female):
+        """Single point crossover
+
+        Args:
+            male: (dict) Parent
+            female: (dict) Parent
+
+        Returns:
+            (dict, dict): Children
+        """
+
+        cut = int(round(min(max(self.rng.random(), 0.1), 0.9) * (len(male["placement"]) - 1)))
+
+        def child(a, b):
+            placement = a["placement"][:cut]
+            rotation = a["rotation"][:cut]
+            taken = set(placement)
+            for p, r in zip(b["placement"], b["rotation"]):
+                if p not in taken:
+                    placement.append(p)
+                    rotation.append(r)
+            return {"placement": placement, "rotation": rotation, "fitness": None}
+
+        return child(male, female), child(female, male)
+
+    def generation(self):
+        """Breeds the next generation, keeping the fittest individual"""
+
+        self.population.sort(key=lambda i: i["fitness"])
+        newPopulation = [self.population[0]]
+
+        while(len(newPopulation) < len(self.population)):
+            male = self.randomWeightedIndividual()
+            female = self.randomWeightedIndividual(male)
+            children = self.mate(male, female)
+
+            newPopulation.append(self.mutate(children[0]))
+            if(len(newPopulation) < len(self.population)):
+                newPopulation.append(self.mutate(children[1]))
+
+        self.population = newPopulation
+
+    def randomWeightedIndividual(self, exclude=None):
+        """Picks an individual, weighted towards the fittest
+
+        Args:
+            exclude: (dict) Individual that may not be picked
+
+        Returns:
+            dict: Individual
+        """
+
+        pop = [i for i in self.population if i is not exclude]
+        rand = self.rng.random()
+
+        lower = 0
+        weight = 1 / len(pop)
+        upper = weight
+
+        for i, individual in enumerate(pop):
+            if(lower < rand < upper):
+                return individual
+            lower = upper
+            upper += 2 * weight * ((len(pop) - i) / len(pop))
+
+        return pop[0]
+
+
+class Nester(object):
+    """Nests polygons on rectangular sheets
+
+    Args:
+        polygons: ([ndarray]) Part outlines in SVG units, the index is the part id
+        width: (float) Sheet width in SVG units
+        height: (float) Sheet height in SVG units
+        spacing: (float) Spacing between parts in SVG units
+        rotations: (int) Number of rotations to try
+        populationSize: (int) GA population size
+        mutationRate: (int) GA mutation rate in percent
+        seed: (int) Random seed, for reproducible runs
+        shapes: ([int]) Shape of each part, see PlacementEvaluator
+        allowedRotations: ([[(int, int)]]) Ranges of rotation indices per part, computed if None.
+            See feasibility.fittingRotations
+        fixed: ([[(int, float, float, float)]]) Parts that keep their place, see PlacementEvaluator
+        workers: (int) Number of processes placing the individuals of a generation, 1 places them in this process.
+            The population grows to at least one individual per worker. If the processes fail, e.g. because
+            they can't import nestlib, the run goes on in this process. Call close once done
+    """
+
+    def __init__(self, polygons, width, height, spacing=0, rotations=4, populationSize=10, mutationRate=10, seed=None, shapes=None, allowedRotations=None, fixed=None, workers=1):
+        self.evaluator = PlacementEvaluator(polygons, width, height, spacing, shapes=shapes, fixed=fixed)
+        self.parallel = ParallelEvaluator(self.evaluator, workers) if workers > 1 else None
+        populationSize = max(populationSize, workers)
+
+        rotations = max(1, int(rotations))
+
+        if allowedRotations is None:
+            byShape = {}
+            for id, shape in enumerate(self.evaluator.shapes):
+                if shape not in byShape:
+                    byShape[shape] = feasibility.fittingRotations(polygons[id], rotations, width, height, spacing)
+            allowedRotations = [byShape[shape] for shape in self.evaluator.shapes]
+
+        # Seeds with decreasing area, fixed parts are not part of the search
+        fixedIds = set(p[0] for sheet in self.evaluator.fixed for p in sheet)
+        ids = sorted((i for i in range(len(polygons)) if i not in fixedIds), key=lambda i: -self.evaluator.areas[i])
+
+        self.ga = GeneticAlgorithm(ids, rotations, dict(enumerate(allowedRotations)), self.evaluator.fits, populationSize, mutationRate, random.Random(seed))
+
+        self.best = None
+        self.generations = 0
+        self.stalled = 0
+        self.stopped = None
+
+    def evaluate(self, individual):
+        """Places an individual and records its fitness
+
+        Args:
+            individual: (dict) Individual
+
+        Returns:
+            NestResult: Placement of the individual
+        """
+
+        return self._record(individual, self.evaluator.place(individual["placement"], individual["rotation"]))
+
+    def _record(self, individual, result):
+        individual["fitness"] = result.fitness
+
+        if(self.best is None or result.fitness < self.best.fitness):
+            self.best = result
+
+        return result
+
+    def step(self):
+        """Evaluates the current generation and breeds the next one
+
+        Returns:
+            bool: True if a better result was found
+        """
+
+        previous = self.best
+        pending = [i for i in self.ga.population if i["fitness"] is None]
+
+        if self.parallel is not None:
+            try:
+                for individual, result in zip(pending, self.parallel.place(pending)):
+                    self._record(individual, result)
+                pending = []
+            except (BrokenProcessPool, OSError) as e:
+                # E.g. the worker processes can't import nestlib, the run goes on in this process
+                print("Warning: Worker processes failed, placing in this process instead: {}".format(e))
+                self.close()
+
+        for individual in pending:
+            self.evaluate(individual)
+
+        self.ga.generation()
+        self.generations += 1
+        self.stalled = 0 if self.best is not previous else self.stalled + 1
+        return self.best is not previous
+
+    def run(self, generations=None, timeLimit=None, callback=None, stall=None):
+        """Runs the GA until the generation count or time limit is reached, or the result stops improving
+
+        The condition that ended the run is kept in stopped, one of
+        "callback", "generations", "time", "stall" or "once" if no
+        condition was given.
+
+        Args:
+            generations: (int) Maximum number of generations
+            timeLimit: (float) Maximum run time in seconds
+            callback: (callable) callback(nester) called after every generation, returning False stops the run
+            stall: (int) Maximum number of generations in a row without a better result
+
+        Returns:
+            NestResult: Best result found
+        """
+
+        start = time.time()
+        self.stopped = None
+        while(self.stopped is None):
+            self.step()
+
+            if callback is not None and callback(self) is False:
+                self.stopped = "callback"
+            elif generations is not None and self.generations >= generations:
+                self.stopped = "generations"
+            elif timeLimit is not None and time.time() - start >= timeLimit:
+                self.stopped = "time"
+            elif stall is not None and self.stalled >= stall:
+                self.stopped = "stall"
+            elif generations is None and timeLimit is None and stall is None:
+                self.stopped = "once"
+
+        return self.best
+
+    def close(self):
+        """Stops the worker processes, if any"""
+
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+
+
+def transformsFromResult(result, ids=None, unitFactor=1):
+    """Converts a NestResult into the transform data used by FuseNest
+
+    Args:
+        result: (NestResult) Placement
+        ids: ([int]) Maps part ids to body indices, identity if None. Parts mapped to None are left out
+        unitFactor: (float) SVG units per model unit
+
+    Returns:
+        [(int, [float, float, float, int])]: List of index and (x, y, rotation, sheet)
+    """
+
+    rtn = []
+    for sheetNumber, sheet in enumerate(result.sheets):
+        for id, x, y, rotation in sheet:
+            index = ids[id] if ids is not None else id
+            if index is None:
+                continue
+            rtn.append((index, [x / unitFactor, y / unitFactor, rotation, sheetNumber]))
+    return rtn
+
+
+def polygonsFromParts(parts, tolerance=0.3):
+    """Converts part outlines into outline polygons
+
+    Args:
+        parts: ([outline.Part]) Part outlines
+        tolerance: (float) Curve flattening tolerance in SVG units
+
+    Returns:
+        ([ndarray], [int]): Polygons and the body index of each polygon
+    """
+
+    polygons = []
+    ids = []
+    for part in parts:
+        outer = part.outerPolygon(tolerance)
+        if outer is None or len(outer) < 3 or abs(svgpath.polygonArea(outer)) <= tolerance * tolerance:
+            continue
+
+        polygons.append(geometry.toArray(outer))
+        ids.append(part.index)
+
+    return polygons, ids
+
+
+def nestParts(parts, width, height, spacing=0, rotations=4, unitFactor=100, generations=None, timeLimit=None, callback=None, seed=None, quantities=None, allowedRotations=None, fixed=None, stall=None, workers=1):
+    """Nests bodies given as part outlines
+
+    Args:
+        parts: ([outline.Part]) Part outlines, coordinates in SVG units
+        width: (float) Sheet width in model units
+        height: (float) Sheet height in model units
+        spacing: (float) Spacing between parts in model units
+        rotations: (int) Number of rotations to try
+        unitFactor: (float) SVG units per model unit
+        generations: (int) Maximum number of GA generations
+        timeLimit: (float) Maximum run time in seconds
+        callback: (callable) See Nester.run
+        seed: (int) Random seed
+        quantities: ({int: int}) Number of copies per part index, 1 if missing
+        allowedRotations: ({int: [(int, int)]}) Ranges of rotation indices per part index,
+            see feasibility.fittingRotations. Computed for parts that are missing
+        fixed: ([(outline.Part, [float, float, float, int])]) Parts that keep their place, with their
+            transform data (x, y, rotation, sheet) in model units. They are left out of the result
+        stall: (int) Maximum number of GA generations in a row without a better result
+        workers: (int) Number of processes placing individuals, see Nester. Inside Fusion360 more than 1 needs
+            multiprocessing.set_executable, Fusion360 itself can't be started as a Python process
+
+    Returns:
+        [(int, [float, float, float, int])]: List of body index and (x, y, rotation, sheet),
+            indices of parts with multiple copies appear once per copy
+    """
+
+    polygons, ids = polygonsFromParts(parts)
+
+    # Copies share the outline, so their no-fit polygons are only computed once
+    copies = []
+    copyIds = []
+    shapes = []
+    allowed = []
+    for shape, (polygon, index) in enumerate(zip(polygons, ids)):
+        ranges = allowedRotations.get(index) if allowedRotations else None
+        if ranges is None:
+            ranges = feasibility.fittingRotations(polygon, rotations, width * unitFactor, height * unitFactor, spacing * unitFactor)
+
+        for _ in range(quantities.get(index, 1) if quantities else 1):
+            copies.append(polygon)
+            copyIds.append(index)
+            shapes.append(shape)
+            allowed.append(ranges)
+
+    fixedSheets = []
+    for part, (x, y, rotation, sheet) in fixed or []:
+        outer, _ = polygonsFromParts([part])
+        if not outer:
+            continue
+
+        while(len(fixedSheets) <= sheet):
+            fixedSheets.append([])
+        fixedSheets[sheet].append((len(copies), x * unitFactor, y * unitFactor, rotation))
+
+        copies.append(outer[0])
+        copyIds.append(None)
+        shapes.append(len(polygons) + len(copies))
+        allowed.append([])
+
+    return nestPolygons(copies, copyIds, width, height, spacing, rotations, unitFactor, generations, timeLimit, callback, seed, shapes, allowed, fixedSheets, stall, workers)
+
+
+def nestPolygons(polygons, ids, width, height, spacing=0, rotations=4, unitFactor=100, generations=None, timeLimit=None, callback=None, seed=None, shapes=None, allowedRotations=None, fixed=None, stall=None, workers=1):
+    """Nests outline polygons, see nestParts for the arguments
+
+    Args:
+        polygons: ([ndarray]) Outline polygons in SVG units
+        ids: ([int]) Body index of each polygon, None for fixed polygons
+        shapes: ([int]) Shape of each polygon, see PlacementEvaluator
+        allowedRotations: ([[(int, int)]]) Ranges of rotation indices per polygon, computed if None
+        fixed: ([[(int, float, float, float)]]) Polygons that keep their place, see PlacementEvaluator
+
+    Returns:
+        [(int, [float, float, float, int])]: List of body index and (x, y, rotation, sheet)
+    """
+
+    if all(i is None for i in ids):
+        return []
+
+    nester = Nester(polygons, width * unitFactor, height * unitFactor, spacing * unitFactor, rotations, seed=seed, shapes=shapes, allowedRotations=allowedRotations, fixed=fixed, workers=workers)
+    try:
+        result = nester.run(generations, timeLimit, callback, stall)
+    finally:
+        nester.close()
+
+    return transformsFromResult(result, ids, unitFactor)
@@ -0,0 +1,168 @@
+"""Finds the rotations at which parts can fit a sheet at all
+
+Both engines pick rotations at random and only then check if the part
+fits the sheet, which wastes most of the evaluations when a lot of
+rotations are allowed. The bounding box of every part is computed for all
+rotations up front, so only rotations that can fit are ever tried and
+parts that fit at no rotation are known before nesting.
+
+NumPy is used if it is available, otherwise the same check runs in plain
+Python, which is a lot slower for large rotation counts.
+"""
+
+import math
+
+try:
+    import numpy as np
+
+    from . import geometry
+except ImportError:
+    np = None
+
+
+# Number of rotations checked at once, bounds memory use
+ANGLE_CHUNK_SIZE = 4096
+
+# Slack for rounding errors when comparing sizes, in SVG units
+FIT_TOLERANCE = 1e-6
+
+
+def angle(index, rotations):
+    """Rotation of an index, as used by both engines
+
+    Args:
+        index: (int) Rotation index
+        rotations: (int) Number of evenly spaced rotations
+
+    Returns:
+        float: Rotation in degrees
+    """
+    return index * 360 / rotations
+
+
+def fittingRotations(polygon, rotations, width, height, spacing=0):
+    """Finds the rotations at which the bounding box of a polygon fits a sheet
+
+    Rotations are only rejected if they can't fit, the engines still check
+    the exact grown outline when they place a part.
+
+    Args:
+        polygon: ([(float, float)]) Outline of the part
+        rotations: (int) Number of evenly spaced rotations
+        width: (float) Sheet width
+        height: (float) Sheet height
+        spacing: (float) Spacing between parts and to the sheet border
+
+    Returns:
+        [(int, int)]: Ranges of rotation indices that can fit, end exclusive.
+            Empty if the part fits at no rotation
+    """
+
+    rotations = max(1, int(rotations))
+    hull = _convexHull(polygon) if np is None else geometry.convexHull(geometry.toArray(polygon))
+    if(len(hull) == 0):
+        return [(0, rotations)]
+
+    # Parts are grown by half the spacing and the sheet shrinks by the same amount
+    maxWidth = width - 2 * spacing + FIT_TOLERANCE
+    maxHeight = height - 2 * spacing + FIT_TOLERANCE
+
+    if np is None:
+        fits = _fitsPython(hull, rotations, maxWidth, maxHeight)
+    else:
+        fits = _fitsNumpy(hull, rotations, maxWidth, maxHeight)
+
+    rtn = []
+    start = None
+    for i, f in enumerate(fits):
+        if(f and start is None):
+            start = i
+        elif(not f and start is not None):
+            rtn.append((start, i))
+            start = None
+    if start is not None:
+        rtn.append((start, rotations))
+
+    return rtn
+
+
+def countRotations(ranges):
+    """Number of rotations in a list of ranges
+
+    Args:
+        ranges: ([(int, int)]) Ranges, as returned by fittingRotations
+
+    Returns:
+        int: Number of rotation indices
+    """
+    return sum(end - start for start, end in ranges)
+
+
+def pickRotation(ranges, r):
+    """Maps a number to a rotation index in a list of ranges
+
+    Args:
+        ranges: ([(int, int)]) Ranges, as returned by fittingRotations
+        r: (int) Number between 0 and countRotations(ranges), exclusive
+
+    Returns:
+        int: Rotation index
+    """
+
+    for start, end in ranges:
+        if(r < end - start):
+            return start + r
+        r -= end - start
+    raise IndexError("Rotation out of range")
+
+
+def _fitsNumpy(hull, rotations, maxWidth, maxHeight):
+    points = np.array(hull, dtype=float)
+    fits = np.empty(rotations, dtype=bool)
+
+    for i in range(0, rotations, ANGLE_CHUNK_SIZE):
+        angles = np.radians(np.arange(i, min(i + ANGLE_CHUNK_SIZE, rotations)) * (360 / rotations))
+        cos = np.cos(angles)[:, None]
+        sin = np.sin(angles)[:, None]
+
+        x = cos * points[:, 0] - sin * points[:, 1]
+        y = sin * points[:, 0] + cos * points[:, 1]
+
+        fits[i:i + len(angles)] = (x.max(axis=1) - x.min(axis=1) <= maxWidth) & (y.max(axis=1) - y.min(axis=1) <= maxHeight)
+
+    return fits.tolist()
+
+
+def _fitsPython(hull, rotations, maxWidth, maxHeight):
+    fits = []
+
+    for i in range(rotations):
+        a = math.radians(angle(i, rotations))
+        cos, sin = math.cos(a), math.sin(a)
+
+        xs = [cos * x - sin * y for x, y in hull]
+        ys = [sin * x + cos * y for x, y in hull]
+
+        fits.append(max(xs) - min(xs) <= maxWidth and max(ys) - min(ys) <= maxHeight)
+
+    return fits
+
+
+def _convexHull(points):
+    # Andrew's monotone chain like geometry.convexHull, for when NumPy is missing.
+    # The bounding box of a polygon is the one of its hull
+    points = sorted(set((float(x), float(y)) for x, y in points))
+    if(len(points) < 3):
+        return points
+
+    def half(points):
+        hull = []
+        for p in points:
+            while(len(hull) > 1 and (hull[-1][0] - hull[-2][0]) * (p[1] - hull[-2][1]) - (hull[-1][1] - hull[-2][1]) * (p[0] - hull[-2][0]) <= 0):
+                hull.pop()
+            hull.append(p)
+        return hull
+
+    lower = half(points)
+    upper = half(reversed(points))
+    return lower[:-1] + upper[:-1]
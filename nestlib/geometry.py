@@ -0,0 +1,552 @@
+"""Polygon math for the Python nesting engine
+
+Polygons are NumPy arrays of shape (n, 2). All functions work on the raw
+coordinates, so "counterclockwise" refers to a y-up system even though
+the engine operates in SVG (y-down) coordinates.
+"""
+
+import math
+
+import numpy as np
+
+from . import svgpath
+
+
+# Tolerance for orientation and containment tests, in SVG units
+EPSILON = 1e-7
+
+
+def toArray(polygon):
+    """Converts a list of points into a float array
+
+    Args:
+        polygon: ((float, float)[]) Polygon
+
+    Returns:
+        ndarray: Array of shape (n, 2)
+    """
+    return np.asarray(polygon, dtype=float).reshape(-1, 2)
+
+
+def boundingBox(polygon):
+    """Axis aligned bounding box of a polygon
+
+    Args:
+        polygon: (ndarray) Polygon
+
+    Returns:
+        ndarray: [minX, minY, maxX, maxY]
+    """
+    return np.concatenate((polygon.min(axis=0), polygon.max(axis=0)))
+
+
+def rotatePolygon(polygon, degrees):
+    """Rotates a polygon around the origin
+
+    Uses the same convention as SVGnest and the SVG rotate() transform
+
+    Args:
+        polygon: (ndarray) Polygon
+        degrees: (float) Rotation angle
+
+    Returns:
+        ndarray: Rotated polygon
+    """
+    if(degrees == 0):
+        return polygon.copy()
+
+    a = math.radians(degrees)
+    c = math.cos(a)
+    s = math.sin(a)
+    return polygon @ np.array([[c, s], [-s, c]])
+
+
+def cleanPolygon(polygon, tol=EPSILON):
+    """Removes duplicate and collinear vertices and makes the polygon counterclockwise
+
+    Args:
+        polygon: (ndarray) Polygon
+        tol: (float) Tolerance for duplicate/collinear detection
+
+    Returns:
+        ndarray: Cleaned polygon
+    """
+
+    if(svgpath.polygonArea(polygon) < 0):
+        polygon = polygon[::-1]
+
+    pts = [p for p in polygon]
+    changed = True
+    while(changed and len(pts) > 3):
+        changed = False
+        i = 0
+        while(i < len(pts) and len(pts) > 3):
+            a = pts[i - 1]
+            b = pts[i]
+            c = pts[(i + 1) % len(pts)]
+            cross = (b[0]-a[0])*(c[1]-b[1]) - (b[1]-a[1])*(c[0]-b[0])
+            if(np.allclose(a, b, atol=tol) or abs(cross) <= tol * max(1.0, np.abs(c-a).max())):
+                del pts[i]
+                changed = True
+            else:
+                i += 1
+
+    return np.array(pts, dtype=float)
+
+
+def convexHull(points):
+    """Convex hull using Andrew's monotone chain
+
+    Args:
+        points: (ndarray) Points
+
+    Returns:
+        ndarray: Counterclockwise hull without collinear points
+    """
+
+    pts = np.unique(points, axis=0)
+    if(len(pts) < 3):
+        return pts
+
+    def half(seq):
+        hull = []
+        for p in seq:
+            while(len(hull) > 1 and _cross(hull[-2], hull[-1], p) <= EPSILON):
+                hull.pop()
+            hull.append(p)
+        return hull
+
+    lower = half(pts)
+    upper = half(pts[::-1])
+
+    return np.array(lower[:-1] + upper[:-1], dtype=float)
+
+
+def _cross(o, a, b):
+    return (a[0]-o[0])*(b[1]-o[1]) - (a[1]-o[1])*(b[0]-o[0])
+
+
+def isConvex(polygon):
+    """Checks if a counterclockwise polygon is convex
+
+    Args:
+        polygon: (ndarray) Polygon
+
+    Returns:
+        bool: True if convex
+    """
+    e = np.roll(polygon, -1, axis=0) - polygon
+    cross = e[:, 0] * np.roll(e[:, 1], -1) - e[:, 1] * np.roll(e[:, 0], -1)
+    return bool(np.all(cross >= -EPSILON))
+
+
+def triangulate(polygon):
+    """Ear clipping triangulation of a simple counterclockwise polygon
+
+    Args:
+        polygon: (ndarray) Polygon
+
+    Returns:
+        [(int, int, int)]: Vertex indices of triangles, or None if the polygon is not simple
+    """
+
+    idx = list(range(len(polygon)))
+    triangles = []
+
+    guard = 0
+    while(len(idx) > 3):
+        n = len(idx)
+        earFound = False
+        for k in range(n):
+            i0, i1, i2 = idx[k - 1], idx[k], idx[(k + 1) % n]
+            a, b, c = polygon[i0], polygon[i1], polygon[i2]
+
+            # Reflex or degenerate corner
+            if(_cross(a, b, c) <= EPSILON):
+                continue
+
+            # No other vertex may lie inside the ear
+            others = polygon[[j for j in idx if j not in (i0, i1, i2)]]
+            if(len(others) and np.any(_pointsInTriangle(others, a, b, c))):
+                continue
+
+            triangles.append((i0, i1, i2))
+            del idx[k]
+            earFound = True
+            break
+
+        if(not earFound):
+            guard += 1
+            if(guard > 1):
+                return None
+            # Drops a degenerate vertex and retries
+            for k in range(n):
+                if(abs(_cross(polygon[idx[k - 1]], polygon[idx[k]], polygon[idx[(k + 1) % n]])) <= EPSILON):
+                    del idx[k]
+                    guard = 0
+                    break
+        else:
+            guard = 0
+
+    if(len(idx) == 3):
+        triangles.append(tuple(idx))
+
+    return triangles
+
+
+def _pointsInTriangle(points, a, b, c):
+    d1 = (b[0]-a[0])*(points[:, 1]-a[1]) - (b[1]-a[1])*(points[:, 0]-a[0])
+    d2 = (c[0]-b[0])*(points[:, 1]-b[1]) - (c[1]-b[1])*(points[:, 0]-b[0])
+    d3 = (a[0]-c[0])*(points[:, 1]-c[1]) - (a[1]-c[1])*(points[:, 0]-c[0])
+    return (d1 >= -EPSILON) & (d2 >= -EPSILON) & (d3 >= -EPSILON)
+
+
+def convexDecomposition(polygon, maxPieces=12):
+    """Splits a simple polygon into convex pieces
+
+    Triangulates the polygon and merges triangles using Hertel-Mehlhorn.
+    Falls back to the convex hull if the polygon is not simple or needs
+    more than maxPieces pieces, which is conservative for nesting.
+
+    Args:
+        polygon: (ndarray) Counterclockwise polygon
+        maxPieces: (int) Maximum number of pieces
+
+    Returns:
+        [ndarray]: Counterclockwise convex polygons
+    """
+
+    if(isConvex(polygon)):
+        return [polygon]
+
+    triangles = triangulate(polygon)
+    if(triangles is None):
+        return [convexHull(polygon)]
+
+    pieces = [list(t) for t in triangles]
+
+    merged = True
+    while(merged):
+        merged = False
+        edges = {}
+        for n, piece in enumerate(pieces):
+            for k in range(len(piece)):
+                edges[(piece[k], piece[(k + 1) % len(piece)])] = n
+
+        for (a, b), n in edges.items():
+            m = edges.get((b, a))
+            if(m is None or m == n):
+                continue
+
+            candidate = _mergePieces(pieces[n], pieces[m], a, b)
+            if(isConvex(polygon[candidate])):
+                pieces[n] = candidate
+                del pieces[m]
+                merged = True
+                break
+
+    if(len(pieces) > maxPieces):
+        return [convexHull(polygon)]
+
+    return [cleanPolygon(polygon[p]) for p in pieces]
+
+
+def _mergePieces(p, q, a, b):
+    # p contains the edge a->b and q the edge b->a, so walking p from b to a
+    # and continuing along q back to b traces the union of both
+    i = p.index(b)
+    j = q.index(a)
+    rotatedP = p[i:] + p[:i]
+    rotatedQ = q[j:] + q[:j]
+    return rotatedP + rotatedQ[1:-1]
+
+
+def offsetConvex(polygon, distance):
+    """Offsets a counterclockwise convex polygon outwards using mitered corners
+
+    The result always contains the rounded offset, which keeps spacing conservative.
+
+    Args:
+        polygon: (ndarray) Convex polygon
+        distance: (float) Offset distance
+
+    Returns:
+        ndarray: Offset polygon
+    """
+
+    if(distance <= 0 or len(polygon) < 3):
+        return polygon
+
+    e = np.roll(polygon, -1, axis=0) - polygon
+    lengths = np.hypot(e[:, 0], e[:, 1])
+    normals = np.stack((e[:, 1], -e[:, 0]), axis=1) / lengths[:, None]
+
+    # Each vertex is moved along the bisector of its two adjacent edge normals
+    prev = np.roll(normals, 1, axis=0)
+    bisector = normals + prev
+    cosHalf = np.sum(normals * bisector, axis=1) / np.hypot(bisector[:, 0], bisector[:, 1])
+
+    # Very sharp corners get a double bevel tangent to the rounded offset
+    # instead of producing huge spikes
+    sharp = cosHalf < 0.25
+    if(np.any(sharp)):
+        pts = []
+        for k in range(len(polygon)):
+            b = bisector[k] / np.hypot(*bisector[k])
+            if(sharp[k]):
+                pts.append(polygon[k] + (prev[k] + b) * distance / (1 + np.dot(prev[k], b)))
+                pts.append(polygon[k] + (b + normals[k]) * distance / (1 + np.dot(b, normals[k])))
+            else:
+                pts.append(polygon[k] + b * distance / cosHalf[k])
+        return np.array(pts)
+
+    b = bisector / np.hypot(bisector[:, 0], bisector[:, 1])[:, None]
+    return polygon + b * (distance / cosHalf)[:, None]
+
+
+def minkowskiConvex(p, q):
+    """Minkowski sum of two counterclockwise convex polygons
+
+    Args:
+        p: (ndarray) Convex polygon
+        q: (ndarray) Convex polygon
+
+    Returns:
+        ndarray: Counterclockwise convex polygon
+    """
+
+    def edgesFromBottom(poly):
+        start = np.lexsort((poly[:, 0], poly[:, 1]))[0]
+        poly = np.roll(poly, -start, axis=0)
+        return poly[0], np.roll(poly, -1, axis=0) - poly
+
+    p0, pe = edgesFromBottom(p)
+    q0, qe = edgesFromBottom(q)
+
+    edges = np.concatenate((pe, qe))
+    angles = np.mod(np.arctan2(edges[:, 1], edges[:, 0]), 2 * math.pi)
+    order = np.argsort(angles, kind="stable")
+
+    pts = (p0 + q0) + np.concatenate(([[0, 0]], np.cumsum(edges[order], axis=0)[:-1]))
+    return pts
+
+
+def noFitPieces(piecesA, piecesB):
+    """Convex no-fit polygon pieces of B orbiting A
+
+    B translated by t overlaps A iff t lies strictly inside one of the pieces.
+
+    Args:
+        piecesA: ([ndarray]) Convex decomposition of the stationary polygon
+        piecesB: ([ndarray]) Convex decomposition of the moving polygon
+
+    Returns:
+        [ndarray]: Convex polygons
+    """
+    return [minkowskiConvex(a, -b) for a in piecesA for b in piecesB]
+
+
+def pointsStrictlyInside(points, convex):
+    """Checks which points lie strictly inside a counterclockwise convex polygon
+
+    Args:
+        points: (ndarray) Points of shape (k, 2)
+        convex: (ndarray) Convex polygon
+
+    Returns:
+        ndarray: Boolean mask of length k
+    """
+    e = np.roll(convex, -1, axis=0) - convex
+    rel = points[:, None, :] - convex[None, :, :]
+    cross = e[None, :, 0] * rel[:, :, 1] - e[None, :, 1] * rel[:, :, 0]
+    return np.all(cross > EPSILON * np.maximum(1.0, np.abs(e).max()), axis=1)
+
+
+def segmentIntersections(a1, a2, b1, b2):
+    """Intersection points of two sets of segments
+
+    Args:
+        a1, a2: (ndarray) Start and end points of the first set (n, 2)
+        b1, b2: (ndarray) Start and end points of the second set (m, 2)
+
+    Returns:
+        ndarray: Intersection points (k, 2)
+    """
+
+    da = (a2 - a1)[:, None, :]
+    db = (b2 - b1)[None, :, :]
+    diff = b1[None, :, :] - a1[:, None, :]
+
+    den = da[..., 0] * db[..., 1] - da[..., 1] * db[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (diff[..., 0] * db[..., 1] - diff[..., 1] * db[..., 0]) / den
+        u = (diff[..., 0] * da[..., 1] - diff[..., 1] * da[..., 0]) / den
+
+    mask = (np.abs(den) > EPSILON) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    if(not np.any(mask)):
+        return np.empty((0, 2))
+
+    ia, ib = np.nonzero(mask)
+    return a1[ia] + (a2[ia] - a1[ia]) * t[ia, ib][:, None]
+
+
+def padPolygons(polygons):
+    """Stacks polygons of different lengths into padded edge arrays
+
+    Padding edges have zero length and are flagged, so batched tests can ignore them.
+
+    Args:
+        polygons: ([ndarray]) Polygons
+
+    Returns:
+        (ndarray, ndarray, ndarray): Edge start points (n, k, 2), edge end points (n, k, 2) and padding mask (n, k)
+    """
+
+    k = max(len(p) for p in polygons)
+    starts = np.empty((len(polygons), k, 2))
+    ends = np.empty((len(polygons), k, 2))
+    pad = np.zeros((len(polygons), k), dtype=bool)
+
+    for i, p in enumerate(polygons):
+        n = len(p)
+        starts[i, :n] = p
+        ends[i, :n - 1] = p[1:]
+        ends[i, n - 1] = p[0]
+        starts[i, n:] = p[0]
+        ends[i, n:] = p[0]
+        pad[i, n:] = True
+
+    return starts, ends, pad
+
+
+def crossingPoints(starts, ends, pad):
+    """Intersection points between edges of different padded polygons
+
+    Uses a sweep over the x extents of the edges, so only edges whose
+    bounding boxes overlap are intersected.
+
+    Args:
+        starts: (ndarray) Edge start points (n, k, 2), see padPolygons
+        ends: (ndarray) Edge end points (n, k, 2)
+        pad: (ndarray) Padding mask (n, k)
+
+    Returns:
+        ndarray: Intersection points (m, 2)
+    """
+
+    owner = np.nonzero(~pad)[0]
+    a = starts[~pad]
+    b = ends[~pad]
+
+    lo = np.minimum(a, b)
+    hi = np.maximum(a, b)
+
+    order = np.argsort(lo[:, 0], kind="stable")
+    owner, a, b, lo, hi = owner[order], a[order], b[order], lo[order], hi[order]
+
+    # Each edge is paired with the following edges that start before it ends in x
+    last = np.searchsorted(lo[:, 0], hi[:, 0], side="right")
+    counts = np.maximum(0, last - np.arange(len(a)) - 1)
+    if(not counts.sum()):
+        return np.empty((0, 2))
+
+    i = np.repeat(np.arange(len(a)), counts)
+    j = i + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    keep = (owner[i] != owner[j]) & (lo[j, 1] <= hi[i, 1]) & (hi[j, 1] >= lo[i, 1])
+    i = i[keep]
+    j = j[keep]
+
+    da = b[i] - a[i]
+    db = b[j] - a[j]
+    diff = a[j] - a[i]
+
+    den = da[:, 0] * db[:, 1] - da[:, 1] * db[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (diff[:, 0] * db[:, 1] - diff[:, 1] * db[:, 0]) / den
+        u = (diff[:, 0] * da[:, 1] - diff[:, 1] * da[:, 0]) / den
+
+    mask = (np.abs(den) > EPSILON) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+    return a[i[mask]] + da[mask] * t[mask][:, None]
+
+
+def coveredEdges(pieces):
+    """Finds edges and vertices of convex pieces that lie inside another piece of the same set
+
+    Covered edges and vertices are not on the boundary of the union of the
+    pieces, so they can't produce valid positions. Skipping them keeps the
+    number of candidates of heavily overlapping no-fit pieces manageable.
+
+    Args:
+        pieces: ([ndarray]) Counterclockwise convex polygons
+
+    Returns:
+        ([ndarray], [ndarray]): Boolean masks per piece, True for covered edges and for covered vertices
+    """
+
+    starts, ends, pad = padPolygons(pieces)
+    owner = np.nonzero(~pad)[0]
+    a = starts[~pad]
+    b = ends[~pad]
+    mid = (a + b) / 2
+
+    edges = np.zeros(len(a), dtype=bool)
+    vertices = np.zeros(len(a), dtype=bool)
+
+    for i, p in enumerate(pieces):
+        e = np.roll(p, -1, axis=0) - p
+        tol = EPSILON * max(1.0, np.abs(e).max())
+
+        def side(q):
+            return e[None, :, 0] * (q[:, None, 1] - p[None, :, 1]) - e[None, :, 1] * (q[:, None, 0] - p[None, :, 0])
+
+        other = owner != i
+
+        candidates = np.nonzero(other & ~vertices)[0]
+        vertices[candidates[np.all(side(a[candidates]) > tol, axis=1)]] = True
+
+        # The midpoint has to be strictly inside, the end points may touch the boundary
+        candidates = np.nonzero(other & ~edges)[0]
+        candidates = candidates[np.all(side(mid[candidates]) > tol, axis=1)]
+        inside = np.all(side(a[candidates]) >= -tol, axis=1) & np.all(side(b[candidates]) >= -tol, axis=1)
+        edges[candidates[inside]] = True
+
+    split = np.cumsum([len(p) for p in pieces])[:-1]
+    return np.split(edges, split), np.split(vertices, split)
+
+
+def pointsStrictlyInsideAny(points, starts, ends, pad, boxes):
+    """Checks which points lie strictly inside any of a set of padded convex polygons
+
+    Args:
+        points: (ndarray) Points (m, 2)
+        starts: (ndarray) Edge start points (n, k, 2), see padPolygons
+        ends: (ndarray) Edge end points (n, k, 2)
+        pad: (ndarray) Padding mask (n, k)
+        boxes: (ndarray) Bounding boxes of the polygons (n, 4)
+
+    Returns:
+        ndarray: Boolean mask of length m
+    """
+
+    rtn = np.zeros(len(points), dtype=bool)
+    if(not len(points)):
+        return rtn
+
+    near = (
+        (points[:, None, 0] > boxes[None, :, 0]) & (points[:, None, 0] < boxes[None, :, 2]) &
+        (points[:, None, 1] > boxes[None, :, 1]) & (points[:, None, 1] < boxes[None, :, 3])
+    )
+    p, n = np.nonzero(near)
+    if(not len(p)):
+        return rtn
+
+    e = ends - starts
+    tol = EPSILON * np.maximum(1.0, np.abs(e).max(axis=(1, 2)))
+
+    rel = points[p][:, None, :] - starts[n]
+    cross = e[n, :, 0] * rel[..., 1] - e[n, :, 1] * rel[..., 0]
+    inside = np.all((cross > tol[n][:, None]) | pad[n], axis=1)
+
+    rtn[p[inside]] = True
+    return rtn
@@ -0,0 +1,256 @@
+"""Lattice nesting of many copies of a single part
+
+Copies of one part pack best in a repeating pattern. Instead of searching
+with the genetic algorithm, the densest lattice is computed from the no-fit
+polygon of the part with itself: rows are as tight as the no-fit polygon
+allows and every row is shifted against the previous one to sit as close
+as possible. The motif of the lattice is either a single copy or a pair of
+copies turned by 180 degrees against each other. Sheets are filled row by
+row.
+"""
+
+import math
+
+import numpy as np
+
+from . import engine
+from . import feasibility
+from . import geometry
+
+
+# Number of evenly spaced rotations of the part that are tried
+MAX_ROTATIONS = 8
+
+# Number of evenly spaced row offsets tried, in addition to those at no-fit polygon vertices
+ROW_OFFSET_SAMPLES = 32
+
+# Number of positions of the turned copy tried for pairs, those with the smallest bounding box first
+PAIR_CANDIDATES = 4
+
+
+class Lattice(object):
+    """Repeating pattern of a motif
+
+    Attributes:
+        motif: ([(float, float, float)]) Rotation and offset of every copy in the motif
+        box: (ndarray) Bounding box of the motif, grown by half the spacing
+        dx: (float) Distance of neighbouring motifs in a row
+        bx: (float) Horizontal shift of every row against the previous one
+        by: (float) Distance of neighbouring rows
+    """
+
+    def __init__(self, motif, box, dx, bx, by):
+        self.motif = motif
+        self.box = box
+        self.dx = dx
+        self.bx = bx
+        self.by = by
+
+    def positions(self, ifp):
+        """Translations of all motifs that fit on a sheet, row by row
+
+        Args:
+            ifp: (ndarray) Valid translations of the motif, see PlacementEvaluator.innerFit
+
+        Returns:
+            [(float, float)]: Translations
+        """
+
+        rtn = []
+        eps = geometry.EPSILON * max(1.0, self.dx, self.by)
+
+        j = 0
+        while(ifp[1] + j * self.by <= ifp[3] + eps):
+            x = ifp[0] + math.fmod(j * self.bx, self.dx)
+            while(x <= ifp[2] + eps):
+                rtn.append((x, ifp[1] + j * self.by))
+                x += self.dx
+            j += 1
+
+        return rtn
+
+
+def nestLattice(part, count, width, height, spacing=0, rotations=4, unitFactor=100, tolerance=0.3, allowedRotations=None):
+    """Nests copies of a single part in the densest lattice found
+
+    Args:
+        part: (outline.Part) Part outline, coordinates in SVG units
+        count: (int) Number of copies
+        width: (float) Sheet width in model units
+        height: (float) Sheet height in model units
+        spacing: (float) Spacing between parts in model units
+        rotations: (int) Number of rotations
+        unitFactor: (float) SVG units per model unit
+        tolerance: (float) Curve flattening tolerance in SVG units
+        allowedRotations: ([(int, int)]) Ranges of rotation indices, see feasibility.fittingRotations
+
+    Returns:
+        [(int, [float, float, float, int])]: Part index and (x, y, rotation, sheet) per placed copy,
+            like engine.nestParts. None if the part fits no sheet
+    """
+
+    polygons, _ = engine.polygonsFromParts([part], tolerance)
+    if not polygons:
+        return None
+
+    rotations = max(1, int(rotations))
+    evaluator = engine.PlacementEvaluator(polygons, width * unitFactor, height * unitFactor, spacing * unitFactor)
+
+    if allowedRotations is None:
+        allowedRotations = feasibility.fittingRotations(polygons[0], rotations, width * unitFactor, height * unitFactor, spacing * unitFactor)
+
+    total = feasibility.countRotations(allowedRotations)
+    if not total:
+        return None
+
+    step = max(1, total // MAX_ROTATIONS)
+    angles = [feasibility.angle(feasibility.pickRotation(allowedRotations, i), rotations) for i in range(0, total, step)]
+
+    best = None
+    for angle in angles:
+        motifs = [[(angle, 0.0, 0.0)]]
+
+        # Turning by 180 degrees has to be one of the rotations
+        if(rotations % 2 == 0):
+            motifs.extend(_pairMotifs(evaluator, angle, (angle + 180) % 360))
+
+        for motif in motifs:
+            lattice = _densestLattice(evaluator, motif)
+            if lattice is None:
+                continue
+
+            ifp = evaluator.innerFit(lattice.box)
+            if ifp is None:
+                continue
+
+            perSheet = len(lattice.positions(ifp)) * len(motif)
+            score = (-perSheet, lattice.dx * lattice.by / len(motif))
+            if best is None or score < best[0]:
+                best = (score, lattice, ifp)
+
+    if best is None:
+        return None
+
+    _, lattice, ifp = best
+
+    rtn = []
+    positions = lattice.positions(ifp)
+    sheet = 0
+    while(len(rtn) < count):
+        for x, y in positions:
+            for rotation, ox, oy in lattice.motif:
+                if(len(rtn) < count):
+                    rtn.append((part.index, [(x + ox) / unitFactor, (y + oy) / unitFactor, rotation, sheet]))
+        sheet += 1
+
+    return rtn
+
+
+def _pairMotifs(evaluator, angle, turned):
+    # The turned copy is put where the bounding box of the pair is the smallest
+    pieces = evaluator.nfp(0, angle, 0, turned)
+    starts, ends, pad = geometry.padPolygons(pieces)
+    boxes = np.array([geometry.boundingBox(p) for p in pieces])
+
+    candidates = np.concatenate(pieces)
+    candidates = candidates[~geometry.pointsStrictlyInsideAny(candidates, starts, ends, pad, boxes)]
+
+    a = evaluator.rotated(0, angle)[1]
+    b = evaluator.rotated(0, turned)[1]
+
+    minX = np.minimum(a[0], b[0] + candidates[:, 0])
+    minY = np.minimum(a[1], b[1] + candidates[:, 1])
+    maxX = np.maximum(a[2], b[2] + candidates[:, 0])
+    maxY = np.maximum(a[3], b[3] + candidates[:, 1])
+
+    areas = np.round((maxX - minX) * (maxY - minY), 6)
+    return [
+        [(angle, 0.0, 0.0), (turned, float(candidates[i, 0]), float(candidates[i, 1]))]
+        for i in np.argsort(areas, kind="stable")[:PAIR_CANDIDATES]
+    ]
+
+
+def _densestLattice(evaluator, motif):
+    # Translations of the whole motif that make it overlap itself
+    pieces = []
+    for ra, ax, ay in motif:
+        for rb, bx, by in motif:
+            offset = np.array([ax - bx, ay - by])
+            pieces.extend(p + offset for p in evaluator.nfp(0, ra, 0, rb))
+
+    starts, ends, pad = geometry.padPolygons(pieces)
+    boxes = np.array([geometry.boundingBox(p) for p in pieces])
+    extent = np.abs(boxes).max(axis=0)
+    eps = geometry.EPSILON * max(1.0, float(extent.max()))
+
+    def valid(points):
+        return not geometry.pointsStrictlyInsideAny(np.asarray(points, dtype=float), starts, ends, pad, boxes).any()
+
+    # Shortest distance of motifs in a row, all multiples have to be free as well
+    dx = None
+    _, hi = _lineIntervals(starts, ends, pad, np.array([0.0]), 1)
+    for c in np.unique(hi[hi > eps]):
+        if valid([(k * c, 0) for k in range(1, int(extent[2] / c) + 2)]):
+            dx = float(c)
+            break
+    if dx is None:
+        return None
+
+    # Row offsets at the vertices of the no-fit polygon are where rows interlock
+    offsets = np.concatenate((np.linspace(0, dx, ROW_OFFSET_SAMPLES, endpoint=False), np.mod(np.concatenate(pieces)[:, 0], dx)))
+    offsets = np.unique(np.round(offsets, 9))
+
+    k = np.arange(-int(extent[2] / dx) - 1, int(extent[2] / dx) + 2)
+
+    best = None
+    for bx in offsets:
+        lo, hi = _lineIntervals(starts, ends, pad, bx + k * dx, 0)
+        lo, hi = lo.ravel(), hi.ravel()
+        hit = ~np.isnan(lo)
+        lo, hi = lo[hit], hi[hit]
+
+        for by in np.unique(hi[hi > eps]):
+            if best is not None and by >= best[1]:
+                break
+            if np.any((lo < by - eps) & (hi > by + eps)):
+                continue
+
+            # Rows further apart can still collide for concave parts
+            rows = range(2, int(extent[3] / by) + 2)
+            if not valid([(j * bx + i * dx, j * by) for j in rows for i in k]):
+                continue
+
+            best = (float(bx), float(by))
+            break
+
+    if best is None:
+        return None
+
+    box = None
+    for rotation, ox, oy in motif:
+        b = evaluator.rotated(0, rotation)[1] + np.array([ox, oy, ox, oy])
+        box = b if box is None else np.concatenate((np.minimum(box[:2], b[:2]), np.maximum(box[2:], b[2:])))
+
+    return Lattice(motif, box, dx, best[0], best[1])
+
+
+def _lineIntervals(starts, ends, pad, values, axis):
+    # Intervals covered by every convex polygon on the lines where coordinate `axis` equals each value
+    other = 1 - axis
+
+    s = starts[None, :, :, axis] - values[:, None, None]
+    e = ends[None, :, :, axis] - values[:, None, None]
+
+    crossing = (s * e <= 0) & (s != e) & ~pad[None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = s / (s - e)
+    coords = starts[None, :, :, other] + t * (ends[None, :, :, other] - starts[None, :, :, other])
+
+    lo = np.where(crossing, coords, np.inf).min(axis=2)
+    hi = np.where(crossing, coords, -np.inf).max(axis=2)
+
+    empty = ~(lo < hi)
+    lo[empty] = np.nan
+    hi[empty] = np.nan
+
+    return lo, hi
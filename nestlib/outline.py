@@ -0,0 +1,393 @@
+"""Compact representation of part outlines
+
+Outlines are extracted once into flat arrays and everything downstream
+(SVG output, caching, flattening for the engines) works from them. Text
+is only produced by the writers at the very end.
+
+Coordinates are stored in SVG units with the y-axis pointing down, exactly
+as they end up in the SVG.
+"""
+
+import base64
+import hashlib
+import io
+import sys
+from array import array
+
+from . import svgpath
+
+
+# Segment types
+MOVE = 0
+LINE = 1
+ARC = 2
+
+# Number of coordinates per segment type
+ARG_COUNT = (2, 2, 7)
+
+# Bumped whenever the serialized format or the conversion changes, so stale cache entries are ignored
+FORMAT_VERSION = 2
+
+_PATH_TEMPLATES = (
+    "M%.4f %.4f ",
+    "L%.4f %.4f ",
+    "A %.4f %.4f %.4f %d %d %.4f %.4f "
+)
+
+
+class Loop(object):
+    """A closed contour made of lines and elliptical arcs
+
+    Attributes:
+        ops: (array('B')) Segment types
+        coords: (array('d')) Arguments of all segments, see ARG_COUNT
+        isOuter: (bool) True for the outer contour of a part
+    """
+
+    __slots__ = ("ops", "coords", "isOuter")
+
+    def __init__(self, isOuter=True):
+        self.ops = array("B")
+        self.coords = array("d")
+        self.isOuter = isOuter
+
+    def moveTo(self, x, y):
+        self.ops.append(MOVE)
+        self.coords.append(x)
+        self.coords.append(y)
+
+    def lineTo(self, x, y):
+        self.ops.append(LINE)
+        self.coords.append(x)
+        self.coords.append(y)
+
+    def arcTo(self, rx, ry, rotation, largeArc, sweep, x, y):
+        self.ops.append(ARC)
+        self.coords.extend((rx, ry, rotation, float(largeArc), float(sweep), x, y))
+
+    def __len__(self):
+        return len(self.ops)
+
+    def segments(self):
+        """Iterates over the segments
+
+        Yields:
+            (int, array('d')): Segment type and its arguments
+        """
+
+        j = 0
+        for op in self.ops:
+            n = ARG_COUNT[op]
+            yield op, self.coords[j:j+n]
+            j += n
+
+    def flatten(self, tolerance=0.3):
+        """Approximates the loop with a polygon
+
+        Args:
+            tolerance: (float) Maximum deviation from arcs in SVG units
+
+        Returns:
+            array('d'): Flat x, y coordinates, without a closing point
+        """
+
+        rtn = array("d")
+        x = y = 0
+
+        for op, args in self.segments():
+            if(op == ARC):
+                for px, py in svgpath.flattenArc(x, y, *args, tolerance=tolerance):
+                    rtn.append(px)
+                    rtn.append(py)
+                x, y = args[5], args[6]
+            else:
+                x, y = args
+                rtn.append(x)
+                rtn.append(y)
+
+        # Closing points are implicit
+        while(len(rtn) > 4 and rtn[0] == rtn[-2] and rtn[1] == rtn[-1]):
+            del rtn[-2:]
+
+        return rtn
+
+    def toPathData(self):
+        """Writes the loop as SVG path data
+
+        Returns:
+            str: SVG path data
+        """
+
+        out = io.StringIO()
+        write = out.write
+        coords = self.coords
+
+        j = 0
+        for op in self.ops:
+            n = ARG_COUNT[op]
+            write(_PATH_TEMPLATES[op] % tuple(coords[j:j+n]))
+            j += n
+
+        return out.getvalue()
+
+    def toDict(self):
+        return {"ops": self.ops.tolist(), "coords": self.coords.tolist(), "isOuter": self.isOuter}
+
+    @classmethod
+    def fromDict(cls, d):
+        loop = cls(d["isOuter"])
+        loop.ops.extend(d["ops"])
+        loop.coords.extend(d["coords"])
+        return loop
+
+
+class Part(object):
+    """Outline of a single body
+
+    Attributes:
+        index: (int) Index of the body in the selection
+        loops: ([Loop]) Contours of the part
+    """
+
+    __slots__ = ("index", "loops")
+
+    def __init__(self, index=0, loops=None):
+        self.index = index
+        self.loops = loops if loops is not None else []
+
+    def outer(self):
+        """Outer contour of the part
+
+        Returns:
+            Loop: The outer loop, None if the part is empty
+        """
+
+        for l in self.loops:
+            if l.isOuter:
+                return l
+        return self.loops[0] if self.loops else None
+
+    def outerPolygon(self, tolerance=0.3):
+        """Outer contour approximated with a polygon
+
+        Args:
+            tolerance: (float) Maximum deviation from arcs in SVG units
+
+        Returns:
+            [(float, float)]: Polygon, None if the part is empty
+        """
+
+        loop = self.outer()
+        if loop is None:
+            return None
+
+        flat = loop.flatten(tolerance)
+        return list(zip(flat[0::2], flat[1::2]))
+
+    def shapeHash(self, salt=""):
+        """Identifies the shape of the part independent of its position
+
+        Args:
+            salt: (str) Additional data the hash depends on, e.g. the flattening tolerance
+
+        Returns:
+            str: Hex digest, None if the part is empty
+        """
+
+        outer = self.outer()
+        if outer is None or not len(outer):
+            return None
+
+        ox, oy = outer.coords[0], outer.coords[1]
+
+        h = hashlib.sha1(salt.encode())
+        for l in self.loops:
+            values = [l.isOuter]
+            for op, args in l.segments():
+                args = list(args)
+                args[-2] -= ox
+                args[-1] -= oy
+                values.append(op)
+                # Adding zero turns -0.0 into 0.0
+                values.extend(round(v, 4) + 0.0 for v in args)
+            h.update(repr(values).encode())
+
+        return h.hexdigest()[:16]
+
+    def toPathData(self):
+        """Writes all loops as a single SVG path
+
+        Returns:
+            str: SVG path data
+        """
+        return "".join(l.toPathData() for l in self.loops)
+
+    def toDict(self):
+        return {"index": self.index, "loops": [l.toDict() for l in self.loops]}
+
+    @classmethod
+    def fromDict(cls, d, index=None):
+        return cls(d["index"] if index is None else index, [Loop.fromDict(l) for l in d["loops"]])
+
+
+def partFromPathData(d, index=0):
+    """Reads a part from SVG path data
+
+    Every subpath becomes a loop, the one with the largest area is the outer loop
+
+    Args:
+        d: (str) SVG path data
+        index: (int) Index of the part
+
+    Returns:
+        Part: The part
+    """
+
+    loops = []
+    loop = None
+
+    for command, args in svgpath.tokenizePath(d):
+        c = command.upper()
+        if(command.islower() and c != "Z"):
+            raise ValueError("Relative path commands are not supported: {}".format(command))
+
+        if(c == "M"):
+            loop = Loop(False)
+            loops.append(loop)
+            loop.moveTo(*args)
+        elif(c == "L"):
+            loop.lineTo(*args)
+        elif(c == "A"):
+            loop.arcTo(*args)
+        elif(c != "Z"):
+            raise ValueError("Unsupported path command: {}".format(command))
+
+    part = Part(index, loops)
+
+    if loops:
+        areas = [abs(svgpath.polygonArea(_pairs(l.flatten()))) for l in loops]
+        loops[areas.index(max(areas))].isOuter = True
+
+    return part
+
+
+def _pairs(flat):
+    return list(zip(flat[0::2], flat[1::2]))
+
+
+def buildSVG(parts, width, height, unitFactor=1, quantities=None, hashes=None, rotations=None):
+    """Constructs a full svg file from parts
+
+    Args:
+        parts: ([Part]) Parts, their index is used as the path id
+        width: (float) Width of the bounding rectangle in model units
+        height: (float) Height of the bounding rectangle in model units
+        unitFactor: (float) SVG units per model unit
+        quantities: ({int: int}) Number of copies per part index, 1 if missing
+        hashes: ({int: str}) Shape hash per part index, see Part.shapeHash
+        rotations: ({int: [(int, int)]}) Ranges of rotation indices per part index,
+            see feasibility.fittingRotations. All rotations if missing
+
+    Returns:
+        str: full svg
+    """
+
+    out = io.StringIO()
+    write = out.write
+
+    write("<svg version='1.1' xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {0} {1}' width='{0}px' height='{1}px'> ".format(width*unitFactor, height*unitFactor))
+    write("<rect width='{}' height='{}' stroke='black' stroke-width='2' fill-opacity='0'/> ".format(width*unitFactor, height*unitFactor))
+
+    for p in parts:
+        d = p.toPathData()
+        ranges = _formatRanges(rotations.get(p.index)) if rotations else None
+        for copy in range(quantities.get(p.index, 1) if quantities else 1):
+            write("<path d='")
+            write(d)
+            write("' id='{}' data-copy='{}' ".format(p.index, copy))
+            if hashes and hashes.get(p.index):
+                write("data-hash='{}' ".format(hashes[p.index]))
+            if ranges is not None:
+                write("data-rotations='{}' ".format(ranges))
+            write("stroke='black' fill='green' stroke-width='2' fill-opacity='0.5'/> ")
+
+    write("</svg>")
+
+    return out.getvalue()
+
+
+def _formatRanges(ranges):
+    # Written as "start-end start-end", the palette reads them back in getRotationRanges
+    if ranges is None:
+        return None
+    return " ".join("{}-{}".format(start, end) for start, end in ranges)
+
+
+def encodeFloats(values):
+    """Packs numbers into a base64 string of little endian float32 values
+
+    Args:
+        values: (float[]) Numbers to pack
+
+    Returns:
+        str: Base64 encoded bytes, readable with a JavaScript Float32Array
+    """
+
+    packed = array("f", values)
+    if(sys.byteorder == "big"):
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def decodeFloats(data):
+    """Unpacks a string written by encodeFloats
+
+    Args:
+        data: (str) Base64 encoded little endian float32 values
+
+    Returns:
+        array('f'): Numbers
+    """
+
+    packed = array("f")
+    packed.frombytes(base64.b64decode(data))
+    if(sys.byteorder == "big"):
+        packed.byteswap()
+    return packed
+
+
+def buildPolygonPayload(parts, width, height, unitFactor=1, tolerance=0.3, quantities=None, hashes=None, rotations=None):
+    """Flattens parts into packed polygons, as an alternative to buildSVG
+
+    The palette loads the polygons directly, so neither side has to write or
+    parse SVG path data.
+
+    Args:
+        parts: ([Part]) Parts, their index is used as the part id
+        width: (float) Width of the bounding rectangle in model units
+        height: (float) Height of the bounding rectangle in model units
+        unitFactor: (float) SVG units per model unit
+        tolerance: (float) Maximum deviation from arcs in SVG units
+        quantities: ({int: int}) Number of copies per part index, 1 if missing
+        hashes: ({int: str}) Shape hash per part index, see Part.shapeHash
+        rotations: ({int: [(int, int)]}) Ranges of rotation indices per part index,
+            see feasibility.fittingRotations. All rotations if missing
+
+    Returns:
+        dict: JSON serializable payload with the sheet size and per part id, quantity,
+            shape hash, rotation ranges and one packed x, y array per loop
+    """
+
+    return {
+        "width": width*unitFactor,
+        "height": height*unitFactor,
+        "parts": [
+            {
+                "id": p.index,
+                "quantity": quantities.get(p.index, 1) if quantities else 1,
+                "hash": hashes.get(p.index) if hashes else None,
+                "rotations": _formatRanges(rotations.get(p.index)) if rotations else None,
+                "polygons": [encodeFloats(l.flatten(tolerance)) for l in p.loops]
+            } for p in parts
+        ]
+    }
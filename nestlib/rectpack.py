@@ -0,0 +1,214 @@
+"""Fast path for nesting rectangular parts
+
+Rectangular panels don't need no-fit polygons or a genetic algorithm.
+If every part is close enough to its bounding box, the boxes are packed
+with MaxRects (best short side fit) across as many sheets as needed,
+which takes milliseconds instead of minutes.
+"""
+
+from . import svgpath
+
+
+# Slack for rounding errors when comparing sizes, in SVG units
+EPSILON = 1e-9
+
+
+class MaxRectsSheet(object):
+    """Free space of a single sheet, kept as a list of maximal free rectangles
+
+    Args:
+        width: (float) Sheet width
+        height: (float) Sheet height
+    """
+
+    def __init__(self, width, height):
+        self.free = [(0, 0, width, height)]
+
+    def find(self, width, height):
+        """Finds the best short side fit for a rectangle
+
+        Args:
+            width: (float) Rectangle width
+            height: (float) Rectangle height
+
+        Returns:
+            ((float, float, float, float), float, float): Score, x and y, None if it does not fit
+        """
+
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if(width > fw + EPSILON or height > fh + EPSILON):
+                continue
+
+            # Ties are broken towards the top left, so sheets fill up compactly
+            score = (min(fw - width, fh - height), max(fw - width, fh - height), fy, fx)
+            if best is None or score < best[0]:
+                best = (score, fx, fy)
+
+        return best
+
+    def place(self, x, y, width, height):
+        """Marks a rectangle as used
+
+        Args:
+            x: (float) Left edge
+            y: (float) Top edge
+            width: (float) Rectangle width
+            height: (float) Rectangle height
+        """
+
+        split = []
+        for f in self.free:
+            fx, fy, fw, fh = f
+            if(x >= fx + fw or x + width <= fx or y >= fy + fh or y + height <= fy):
+                split.append(f)
+                continue
+
+            if(x > fx):
+                split.append((fx, fy, x - fx, fh))
+            if(x + width < fx + fw):
+                split.append((x + width, fy, fx + fw - x - width, fh))
+            if(y > fy):
+                split.append((fx, fy, fw, y - fy))
+            if(y + height < fy + fh):
+                split.append((fx, y + height, fw, fy + fh - y - height))
+
+        # Free rectangles contained in others are redundant, of equal ones the first is kept
+        self.free = [
+            a for i, a in enumerate(split)
+            if not any(j != i and _contains(b, a) and (j < i or not _contains(a, b)) for j, b in enumerate(split))
+        ]
+
+
+def packRectangles(sizes, width, height, allowRotation=True):
+    """Packs rectangles onto as few sheets as possible
+
+    Rectangles are placed in the given order, each one on the first sheet it fits.
+
+    Args:
+        sizes: ([(float, float)]) Width and height of each rectangle
+        width: (float) Sheet width
+        height: (float) Sheet height
+        allowRotation: (bool) True if rectangles may be turned by 90 degrees
+
+    Returns:
+        [(int, float, float, bool)]: Sheet, x, y and whether the rectangle is turned per rectangle,
+            None for rectangles that don't fit an empty sheet
+    """
+
+    sheets = []
+    rtn = []
+
+    for w, h in sizes:
+        orientations = [(w, h, False)]
+        if(allowRotation and w != h):
+            orientations.append((h, w, True))
+
+        orientations = [o for o in orientations if o[0] <= width + EPSILON and o[1] <= height + EPSILON]
+        if not orientations:
+            rtn.append(None)
+            continue
+
+        for index, sheet in enumerate(sheets + [None]):
+            if sheet is None:
+                sheet = MaxRectsSheet(width, height)
+                sheets.append(sheet)
+
+            best = None
+            for ow, oh, turned in orientations:
+                found = sheet.find(ow, oh)
+                if found is not None and (best is None or found[0] < best[0][0]):
+                    best = (found, ow, oh, turned)
+
+            if best is not None:
+                (_, x, y), ow, oh, turned = best
+                sheet.place(x, y, ow, oh)
+                rtn.append((index, x, y, turned))
+                break
+
+    return rtn
+
+
+def rectangleRatio(polygon):
+    """Fraction of its bounding box a polygon covers
+
+    Args:
+        polygon: ([(float, float)]) Polygon
+
+    Returns:
+        float: Area ratio, 1 for axis aligned rectangles
+    """
+
+    xs = [p[0] for p in polygon]
+    ys = [p[1] for p in polygon]
+    box = (max(xs) - min(xs)) * (max(ys) - min(ys))
+    if(box <= 0):
+        return 0
+    return abs(svgpath.polygonArea(polygon)) / box
+
+
+def nestRectangles(parts, width, height, spacing=0, rotations=4, unitFactor=100, quantities=None, tolerance=0.3, areaRatio=0.97):
+    """Nests parts as their bounding boxes if all of them are rectangles
+
+    Args:
+        parts: ([outline.Part]) Part outlines, coordinates in SVG units
+        width: (float) Sheet width in model units
+        height: (float) Sheet height in model units
+        spacing: (float) Spacing between parts and to the sheet border in model units
+        rotations: (int) Number of rotations, parts are only turned by 90 degrees if that is one of them
+        unitFactor: (float) SVG units per model unit
+        quantities: ({int: int}) Number of copies per part index, 1 if missing
+        tolerance: (float) Curve flattening tolerance in SVG units
+        areaRatio: (float) Minimum fraction of its bounding box a part has to cover to count as a rectangle
+
+    Returns:
+        [(int, [float, float, float, int])]: List of body index and (x, y, rotation, sheet) like
+            engine.nestParts, None if not all parts are rectangles
+    """
+
+    boxes = []
+    for part in parts:
+        polygon = part.outerPolygon(tolerance)
+        if not polygon or len(polygon) < 3 or rectangleRatio(polygon) < areaRatio:
+            return None
+
+        xs = [p[0] for p in polygon]
+        ys = [p[1] for p in polygon]
+        boxes.append((part.index, min(xs), min(ys), max(xs), max(ys)))
+
+    # Large parts first, the small ones fill the gaps
+    copies = []
+    for box in boxes:
+        copies.extend([box] * (quantities.get(box[0], 1) if quantities else 1))
+    copies.sort(key=lambda b: (-(b[3] - b[1]) * (b[4] - b[2]), -max(b[3] - b[1], b[4] - b[2])))
+
+    s = spacing * unitFactor
+
+    # Boxes grow by the spacing and the sheet shrinks by it, so the spacing applies to the border as well
+    placements = packRectangles(
+        [(b[3] - b[1] + s, b[4] - b[2] + s) for b in copies],
+        width * unitFactor - s,
+        height * unitFactor - s,
+        int(rotations) % 4 == 0
+    )
+
+    rtn = []
+    for (index, minX, minY, maxX, maxY), placement in zip(copies, placements):
+        if placement is None:
+            continue
+
+        sheet, x, y, turned = placement
+
+        # Turning by 90 degrees maps (x, y) to (-y, x)
+        if turned:
+            rotation, left, top = 90, -maxY, minX
+        else:
+            rotation, left, top = 0, minX, minY
+
+        rtn.append((index, [(x + s - left) / unitFactor, (y + s - top) / unitFactor, rotation, sheet]))
+
+    return rtn
+
+
+def _contains(a, b):
+    return a[0] <= b[0] and a[1] <= b[1] and a[0] + a[2] >= b[0] + b[2] and a[1] + a[3] >= b[1] + b[3]
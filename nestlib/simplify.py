@@ -0,0 +1,173 @@
+"""Removes redundant vertices from part outlines before nesting
+
+Outlines of imported bodies often consist of thousands of short line
+segments, and the cost of every no-fit polygon grows with their number.
+Runs of line segments are simplified with a one sided Douglas-Peucker:
+a vertex is only dropped if it lies within the tolerance on the material
+side of the new segment, so simplified outlines always contain the
+original part and holes only shrink. The spacing between parts absorbs the
+growth, parts never overlap. Arcs are kept as they are.
+"""
+
+import math
+
+from . import outline, svgpath
+
+
+# Vertices closer than this to a segment are collinear and removed on either side, in SVG units
+COLLINEAR_TOLERANCE = 1e-6
+
+
+def vertexCount(parts):
+    """Counts the segments of all loops of parts
+
+    Args:
+        parts: ([outline.Part]) Parts
+
+    Returns:
+        int: Number of vertices
+    """
+    return sum(len(l) for p in parts for l in p.loops)
+
+
+def simplifyPart(part, tolerance):
+    """Simplifies all loops of a part
+
+    Args:
+        part: (outline.Part) Part to simplify, it is not modified
+        tolerance: (float) Maximum growth of the outline in SVG units
+
+    Returns:
+        outline.Part: Simplified part
+    """
+    return outline.Part(part.index, [simplifyLoop(l, tolerance) for l in part.loops])
+
+
+def simplifyLoop(loop, tolerance):
+    """Simplifies the runs of line segments of a loop
+
+    Args:
+        loop: (outline.Loop) Loop to simplify, it is not modified
+        tolerance: (float) Maximum growth of the loop in SVG units
+
+    Returns:
+        outline.Loop: Simplified loop
+    """
+
+    segments = list(loop.segments())
+    if(len(segments) < 4 or segments[0][0] != outline.MOVE or any(op == outline.MOVE for op, _ in segments[1:])):
+        return loop
+
+    start = (segments[0][1][0], segments[0][1][1])
+    end = tuple(segments[-1][1][-2:])
+
+    # The implicit closing segment is simplified along with the last run
+    closing = segments[-1][0] == outline.LINE and end != start
+
+    # Material lies left of the segments for counterclockwise outer loops and clockwise holes
+    flat = loop.flatten(max(tolerance, 1e-3))
+    area = svgpath.polygonArea(list(zip(flat[0::2], flat[1::2])))
+    side = 1 if (area > 0) == loop.isOuter else -1
+
+    rtn = outline.Loop(loop.isOuter)
+    rtn.moveTo(*start)
+
+    if all(op == outline.LINE for op, _ in segments[1:]):
+        points = [start] + [(a[0], a[1]) for _, a in segments[1:]]
+        if closing:
+            points.append(start)
+
+        # A closed chain is split at the vertex farthest from its start
+        far = max(range(len(points)), key=lambda i: math.dist(start, points[i]))
+        kept = simplifyChain(points[:far + 1], tolerance, side) + simplifyChain(points[far:], tolerance, side)[1:]
+
+        for p in kept[1:-1 if closing else None]:
+            rtn.lineTo(*p)
+        return rtn
+
+    run = [start]
+
+    def flush():
+        for p in simplifyChain(run, tolerance, side)[1:]:
+            rtn.lineTo(*p)
+        del run[1:]
+
+    for op, args in segments[1:]:
+        if(op == outline.LINE):
+            run.append((args[0], args[1]))
+            continue
+
+        flush()
+        rtn.arcTo(*args)
+        run[0] = (args[5], args[6])
+
+    if closing:
+        run.append(start)
+        flush()
+        # The closing point stays implicit
+        del rtn.ops[-1]
+        del rtn.coords[-2:]
+    else:
+        flush()
+
+    return rtn
+
+
+def simplifyChain(points, tolerance, side=1):
+    """One sided Douglas-Peucker simplification of an open polyline
+
+    Args:
+        points: ([(float, float)]) Polyline, its end points are always kept
+        tolerance: (float) Maximum distance of removed vertices in SVG units
+        side: (int) 1 if removed vertices may lie left of the new segments, -1 for right
+
+    Returns:
+        [(float, float)]: Kept vertices
+    """
+
+    n = len(points)
+    if(n < 3):
+        return list(points)
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if(j - i < 2):
+            continue
+
+        (ax, ay), (bx, by) = points[i], points[j]
+        dx, dy = bx - ax, by - ay
+        lengthSq = dx * dx + dy * dy
+
+        worst = 0
+        split = None
+
+        for k in range(i + 1, j):
+            px, py = points[k]
+
+            # Distance to the segment, not the line, so spikes past its ends are kept
+            if(lengthSq > 0):
+                t = min(max(((px - ax) * dx + (py - ay) * dy) / lengthSq, 0), 1)
+                distance = math.hypot(px - ax - t * dx, py - ay - t * dy)
+                cross = side * (dx * (py - ay) - dy * (px - ax)) / math.sqrt(lengthSq)
+            else:
+                distance = math.hypot(px - ax, py - ay)
+                cross = -distance
+
+            # Vertices outside of the new segment would be cut off
+            if(cross < -COLLINEAR_TOLERANCE):
+                distance += tolerance
+
+            if(distance > worst):
+                worst = distance
+                split = k
+
+        if(worst > tolerance):
+            keep[split] = True
+            stack.append((i, split))
+            stack.append((split, j))
+
+    return [p for p, k in zip(points, keep) if k]
@@ -0,0 +1,174 @@
+"""Reads SVG path data and flattens its arcs into polygons"""
+
+import math
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_TOKEN_RE = re.compile(r"[MmLlHhVvAaCcQqZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# Number of arguments consumed by each path command
+_ARG_COUNT = {
+    "M": 2, "L": 2, "H": 1, "V": 1, "A": 7, "C": 6, "Q": 4, "Z": 0
+}
+
+
+def tokenizePath(d):
+    """Splits SVG path data into commands and their arguments
+
+    Implicit repetitions of a command (e.g. "L 1 2 3 4") are expanded and
+    an implicit LineTo after a MoveTo is made explicit.
+
+    Args:
+        d: (str) SVG path data
+
+    Returns:
+        [(str, float[])]: List of commands and their arguments
+    """
+
+    rtn = []
+    command = None
+    args = []
+
+    for token in _TOKEN_RE.findall(d):
+        if token.isalpha():
+            command = token
+            args = []
+            if(command in "Zz"):
+                rtn.append((command, []))
+                command = None
+            continue
+
+        if command is None:
+            raise ValueError("Coordinates without a command in path data: {}".format(d[:40]))
+
+        args.append(float(token))
+        if(len(args) == _ARG_COUNT[command.upper()]):
+            rtn.append((command, args))
+            args = []
+            # Additional coordinate pairs after a MoveTo are LineTos
+            if(command == "M"):
+                command = "L"
+            elif(command == "m"):
+                command = "l"
+
+    return rtn
+
+
+def flattenArc(x1, y1, rx, ry, angle, largeArc, sweep, x2, y2, tolerance=0.5):
+    """Approximates an SVG elliptical arc with line segments
+
+    Implements the endpoint to center parameterization from the SVG spec (F.6.5)
+
+    Args:
+        x1, y1: (float) Start point
+        rx, ry: (float) Radii
+        angle: (float) Rotation of the x-axis of the ellipse in degrees
+        largeArc: (float) Large arc flag
+        sweep: (float) Sweep flag
+        x2, y2: (float) End point
+        tolerance: (float) Maximum deviation of line segments from the arc
+
+    Returns:
+        [(float, float)]: Points along the arc, excluding the start point
+    """
+
+    rx = abs(rx)
+    ry = abs(ry)
+
+    if(rx == 0 or ry == 0 or (x1 == x2 and y1 == y2)):
+        return [(x2, y2)]
+
+    phi = math.radians(angle)
+    cosPhi = math.cos(phi)
+    sinPhi = math.sin(phi)
+
+    dx = (x1 - x2) / 2
+    dy = (y1 - y2) / 2
+    x1p = cosPhi * dx + sinPhi * dy
+    y1p = -sinPhi * dx + cosPhi * dy
+
+    # Scales up radii that are too small to span the endpoints
+    lam = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if(lam > 1):
+        rx *= math.sqrt(lam)
+        ry *= math.sqrt(lam)
+
+    num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(0, num / den))
+    if(bool(largeArc) == bool(sweep)):
+        coef = -coef
+
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+
+    cx = cosPhi * cxp - sinPhi * cyp + (x1 + x2) / 2
+    cy = sinPhi * cxp + cosPhi * cyp + (y1 + y2) / 2
+
+    theta1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    theta2 = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx)
+    dTheta = theta2 - theta1
+
+    if(sweep and dTheta < 0):
+        dTheta += 2 * math.pi
+    elif(not sweep and dTheta > 0):
+        dTheta -= 2 * math.pi
+
+    segments = arcSegmentCount(max(rx, ry), dTheta, tolerance)
+
+    rtn = []
+    for i in range(1, segments):
+        t = theta1 + dTheta * i / segments
+        ex = rx * math.cos(t)
+        ey = ry * math.sin(t)
+        rtn.append((cosPhi * ex - sinPhi * ey + cx, sinPhi * ex + cosPhi * ey + cy))
+    rtn.append((x2, y2))
+
+    return rtn
+
+
+def arcSegmentCount(radius, sweepAngle, tolerance):
+    """Number of line segments needed to stay within tolerance of an arc
+
+    Args:
+        radius: (float) Radius of the arc
+        sweepAngle: (float) Angle spanned by the arc in radians
+        tolerance: (float) Maximum chord deviation
+
+    Returns:
+        int: Number of segments
+    """
+
+    if(tolerance <= 0 or tolerance >= radius):
+        return max(1, int(math.ceil(abs(sweepAngle) / (math.pi / 2))))
+
+    maxStep = 2 * math.acos(1 - tolerance / radius)
+    return max(1, int(math.ceil(abs(sweepAngle) / maxStep)))
+
+
+def polygonArea(polygon):
+    """Signed area of a polygon
+
+    Args:
+        polygon: ((float, float)[]) Polygon, or an ndarray of shape (n, 2)
+
+    Returns:
+        float: Area, positive for counterclockwise polygons in a y-up system
+    """
+
+    # Arrays of the Python engine are summed up by NumPy, reading their rows one by one is slow
+    if np is not None and isinstance(polygon, np.ndarray):
+        x = polygon[:, 0]
+        y = polygon[:, 1]
+        return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+    area = 0
+    for i in range(len(polygon)):
+        (x1, y1), (x2, y2) = polygon[i - 1], polygon[i]
+        area += x1 * y2 - x2 * y1
+    return float(area) / 2
@@ -0,0 +1,144 @@
+"""Reads placements from the SVG exported by SVGnest
+
+The export can contain thousands of parts, so it is parsed as a stream
+and elements are discarded as soon as they have been read.
+"""
+
+import math
+import re
+import xml.etree.ElementTree as ET
+
+
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+# Elements that carry a part outline
+_PART_TAGS = ("path", "polygon", "polyline")
+
+# Size of the pieces the SVG is fed to the parser in
+_FEED_SIZE = 64 * 1024
+
+
+def parseTransform(transform):
+    """Converts an SVG transform attribute into an affine matrix
+
+    Args:
+        transform: (str) Transform attribute, e.g. "translate(10 20) rotate(90)"
+
+    Returns:
+        (float, float, float, float, float, float): Matrix (a, b, c, d, e, f) as defined by SVG
+    """
+
+    a, b, c, d, e, f = 1.0, 0.0, 0.0, 1.0, 0.0, 0.0
+
+    for name, args in _TRANSFORM_RE.findall(transform or ""):
+        v = [float(i) for i in _NUMBER_RE.findall(args)]
+
+        if(name == "matrix" and len(v) == 6):
+            m = v
+        elif(name == "translate" and v):
+            m = (1, 0, 0, 1, v[0], v[1] if len(v) > 1 else 0)
+        elif(name == "scale" and v):
+            m = (v[0], 0, 0, v[1] if len(v) > 1 else v[0], 0, 0)
+        elif(name == "rotate" and v):
+            r = math.radians(v[0])
+            cx, cy = (v[1], v[2]) if len(v) > 2 else (0, 0)
+            cos, sin = math.cos(r), math.sin(r)
+            m = (cos, sin, -sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+        elif(name == "skewX" and v):
+            m = (1, 0, math.tan(math.radians(v[0])), 1, 0, 0)
+        elif(name == "skewY" and v):
+            m = (1, math.tan(math.radians(v[0])), 0, 1, 0, 0)
+        else:
+            raise ValueError("Invalid transform: {}".format(transform))
+
+        # Transforms in a list are applied right to left
+        a, b, c, d, e, f = (
+            a * m[0] + c * m[1],
+            b * m[0] + d * m[1],
+            a * m[2] + c * m[3],
+            b * m[2] + d * m[3],
+            a * m[4] + c * m[5] + e,
+            b * m[4] + d * m[5] + f
+        )
+
+    return a, b, c, d, e, f
+
+
+def readPlacements(svg, unitFactor=1):
+    """Extracts the placement of every part from an SVGnest export
+
+    Every top level group of the export is a sheet. A part is identified
+    by the id of its outline, copies of a part by their data-copy attribute.
+    The transform of the group around the outline is its placement.
+
+    Only the first outline of a group is read, the others are its holes.
+    Copies of a part are stacked on top of each other before nesting, so
+    SVGnest puts the holes of every copy into the group of the first one.
+
+    Args:
+        svg: (str) Inner SVG of the export
+        unitFactor: (float) SVG units per model unit
+
+    Returns:
+        [(int, [float, float, float, int])]: List of id and (x, y, rotation, sheet),
+            ids of parts with multiple copies appear once per copy
+    """
+
+    rtn = []
+    seen = set()
+
+    parser = ET.XMLPullParser(("start", "end"))
+
+    # Transform attribute of every open element, whether a part was read from it, and the element
+    stack = []
+    sheet = -1
+
+    def drain():
+        nonlocal sheet
+
+        for event, element in parser.read_events():
+            if(event == "end"):
+                stack.pop()
+                # Parts are read on start, nothing needs to be kept. Cleared elements stay
+                # children of their parent until they are removed from it
+                element.clear()
+                if stack:
+                    stack[-1][2].remove(element)
+                continue
+
+            stack.append([element.get("transform"), False, element])
+
+            if(len(stack) == 2):
+                sheet += 1
+                continue
+
+            tag = element.tag.rpartition("}")[2]
+            if(tag not in _PART_TAGS or element.get("id") is None):
+                continue
+
+            group = stack[-2]
+            if(group[1]):
+                continue
+            group[1] = True
+
+            key = (int(element.get("id")), element.get("data-copy", "0"))
+            if(key in seen):
+                continue
+            seen.add(key)
+
+            a, b, c, d, e, f = parseTransform(group[0])
+            rotation = round(math.degrees(math.atan2(b, a)), 9) % 360
+
+            rtn.append((key[0], [e / unitFactor, f / unitFactor, rotation, sheet]))
+
+    # Wraps svg data into single root node
+    parser.feed("<g>")
+    for i in range(0, len(svg), _FEED_SIZE):
+        parser.feed(svg[i:i + _FEED_SIZE])
+        drain()
+    parser.feed("</g>")
+    parser.close()
+    drain()
+
+    return rtn
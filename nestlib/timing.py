@@ -0,0 +1,122 @@
+"""Timing of the stages of a nesting run
+
+Every stage is recorded as a span with its start, duration and any extra
+fields, e.g. the body it worked on. Records are appended to a JSON lines
+file, one object per line, so runs can be compared and analysed later.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+class RunLog(object):
+    """Records timing spans of nesting runs
+
+    Args:
+        path: (str) JSON lines file, None to only keep records in memory
+        maxBytes: (int) Size at which the file is moved to <path>.old and started over
+    """
+
+    def __init__(self, path=None, maxBytes=5 * 1024 * 1024):
+        self.path = path
+        self.maxBytes = maxBytes
+
+        self.run = None
+        self.records = []
+        self._start = time.perf_counter()
+
+    def start(self, **fields):
+        """Starts a new run, records of earlier runs are only kept in the file
+
+        Args:
+            fields: Values describing the run, e.g. its settings
+        """
+
+        self.run = time.strftime("%Y%m%d-%H%M%S")
+        self.records = []
+        self._start = time.perf_counter()
+
+        if self.path is not None and os.path.exists(self.path) and os.path.getsize(self.path) > self.maxBytes:
+            os.replace(self.path, self.path + ".old")
+
+        self.event("run", **fields)
+
+    def elapsed(self):
+        """Seconds since the run started"""
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """Times a block of code
+
+        Args:
+            stage: (str) Name of the stage
+            fields: Additional values of the record
+
+        Yields:
+            dict: The record, values added to it before the block ends are written as well
+        """
+
+        record = {"stage": stage}
+        record.update(fields)
+
+        start = self.elapsed()
+        try:
+            yield record
+        finally:
+            record["start"] = round(start, 6)
+            record["duration"] = round(self.elapsed() - start, 6)
+            self._write(record)
+
+    def event(self, stage, **fields):
+        """Records a point in time, e.g. a message from the palette
+
+        Args:
+            stage: (str) Name of the stage
+            fields: Additional values of the record
+        """
+
+        record = {"stage": stage, "start": round(self.elapsed(), 6)}
+        record.update(fields)
+        self._write(record)
+
+    def first(self, stage):
+        """First record of a stage in the current run
+
+        Args:
+            stage: (str) Name of the stage
+
+        Returns:
+            dict: The record, None if there is none
+        """
+        return next((r for r in self.records if r["stage"] == stage), None)
+
+    def slowest(self, stage, count=5):
+        """Slowest spans of a stage in the current run
+
+        Args:
+            stage: (str) Name of the stage
+            count: (int) Maximum number of spans
+
+        Returns:
+            [dict]: Records, slowest first
+        """
+
+        spans = [r for r in self.records if r["stage"] == stage and "duration" in r]
+        return sorted(spans, key=lambda r: -r["duration"])[:count]
+
+    def _write(self, record):
+        record["run"] = self.run
+        self.records.append(record)
+
+        if self.path is None:
+            return
+
+        try:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError:
+            # Timing is not worth failing a nest for
+            pass
@@ -0,0 +1,29 @@
+"""Makes nestlib and the fake adsk module of the benchmarks importable
+
+    python -m pytest tests
+"""
+
+import importlib
+import os
+import sys
+import types
+
+import pytest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "fakeadsk"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def addin():
+    """The add-in module, imported as part of a package as Fusion360 does"""
+
+    package = types.ModuleType("FuseNestTest")
+    package.__path__ = [ROOT]
+    sys.modules["FuseNestTest"] = package
+    return importlib.import_module("FuseNestTest.FuseNest")
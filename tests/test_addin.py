@@ -0,0 +1,219 @@
+import json
+import queue
+import types
+
+import pytest
+
+from nestlib import outline
+
+
+class Value(object):
+    def __init__(self, value):
+        self.value = value
+        self.text = ""
+        self.isVisible = False
+
+
+class Inputs(object):
+    def __init__(self, **values):
+        self.values = {
+            "VISheetWidth": 50,
+            "VISheetHeight": 30,
+            "VISpacing": 0.1,
+            "VISheetOffsetX": 0,
+            "VISheetOffsetY": 5,
+            "ISRotations": 4,
+            "ISTimeLimit": 0,
+            "ISGenerations": 0,
+            "ISStall": 0,
+            "TBStatus": None
+        }
+        self.values.update(values)
+        self.items = {k: Value(v) for k, v in self.values.items()}
+
+    def itemById(self, id):
+        return self.items[id]
+
+
+def _body(token, size=1):
+    point = lambda *v: types.SimpleNamespace(asArray=lambda: list(v))
+    return types.SimpleNamespace(
+        entityToken=token,
+        volume=size,
+        boundingBox=types.SimpleNamespace(minPoint=point(0, 0, 0), maxPoint=point(size, size, 1)),
+        faces=types.SimpleNamespace(count=6),
+        isValid=True
+    )
+
+
+@pytest.fixture
+def session(addin, monkeypatch):
+    monkeypatch.setattr(addin, "nest_session", None)
+    monkeypatch.setattr(addin, "applied_nest", None)
+    return addin
+
+
+def _start(addin, bodies, inputs):
+    # What BVNest records of a run before nesting
+    addin.nest_session = {"settings": addin.getNestSettings(inputs), "tokens": [b.entityToken for b in bodies]}
+
+
+def testSameBodiesPendingNestAgain(session):
+    bodies = [_body("a"), _body("b")]
+    inputs = Inputs()
+    fingerprints = [session.getBodyFingerprint(b) for b in bodies]
+
+    _start(session, bodies, inputs)
+    pending = [(0, [1, 2, 0, 0]), (1, [3, 4, 90, 0])]
+
+    assert session.getKeptPlacements(bodies, fingerprints, inputs, pending) == {}
+
+
+def testAddedBodyKeepsPending(session):
+    bodies = [_body("a"), _body("b")]
+    inputs = Inputs()
+
+    _start(session, bodies, inputs)
+    pending = [(0, [1, 2, 0, 0]), (1, [3, 4, 90, 0])]
+
+    selection = [_body("c")] + bodies
+    fingerprints = [session.getBodyFingerprint(b) for b in selection]
+
+    assert session.getKeptPlacements(selection, fingerprints, inputs, pending) == {
+        1: ([1, 2, 0, 0], False),
+        2: ([3, 4, 90, 0], False)
+    }
+
+
+def testSameBodiesAppliedNestAgain(session):
+    bodies = [_body("a"), _body("b")]
+    inputs = Inputs()
+    fingerprints = [session.getBodyFingerprint(b) for b in bodies]
+
+    session.rememberPlacements(bodies, [(0, [1, 2, 0, 0]), (1, [3, 4, 90, 1])], session.getNestSettings(inputs))
+
+    assert session.getKeptPlacements(bodies, fingerprints, inputs) == {}
+
+
+def testChangedBodyKeepsApplied(session):
+    bodies = [_body("a"), _body("b")]
+    inputs = Inputs()
+
+    session.rememberPlacements(bodies, [(0, [1, 2, 0, 0]), (1, [3, 4, 90, 1])], session.getNestSettings(inputs))
+
+    bodies[0] = _body("a", 2)
+    fingerprints = [session.getBodyFingerprint(b) for b in bodies]
+
+    # The second sheet lies above the first one
+    assert session.getKeptPlacements(bodies, fingerprints, inputs) == {1: ([0, -35, 0, 1], True)}
+
+
+def testChangedSettingsNestAgain(session):
+    bodies = [_body("a"), _body("b")]
+
+    session.rememberPlacements(bodies[:1], [(0, [1, 2, 0, 0])], session.getNestSettings(Inputs()))
+
+    fingerprints = [session.getBodyFingerprint(b) for b in bodies]
+    assert session.getKeptPlacements(bodies, fingerprints, Inputs(VISpacing=0.2)) == {}
+
+
+@pytest.fixture
+def job(addin, monkeypatch):
+    pytest.importorskip("numpy")
+
+    # Custom events are queued until they are handled, as Fusion360 does on the UI thread
+    events = queue.Queue()
+    app = types.SimpleNamespace(fireCustomEvent=lambda id, info: events.put(info))
+    monkeypatch.setattr(addin.adsk.core, "Application", types.SimpleNamespace(get=lambda: app), raising=False)
+
+    applied = []
+    monkeypatch.setattr(addin, "applyPlacements", lambda transforms, selections, offsets: applied.append(transforms))
+    monkeypatch.setattr(addin, "nest_job", None)
+    monkeypatch.setattr(addin, "nest_command", None)
+    monkeypatch.setattr(addin, "transform_data", None)
+    monkeypatch.setattr(addin, "applied_nest", None)
+    monkeypatch.setattr(addin.run_log, "path", None)
+    addin.run_log.start()
+
+    def start(inputs):
+        parts = [outline.partFromPathData("M0 0 L{0} 0 L{0} 500 L0 500 Z".format(300 + 100 * i), i) for i in range(4)]
+        bodies = [_body(str(i)) for i in range(4)]
+        addin.nest_job = addin.nestHeadless(parts, inputs, selections=bodies)
+        return addin.nest_job
+
+    def handle():
+        handler = addin.NestEventHandler()
+        while True:
+            info = events.get(timeout=30)
+            handler.notify(types.SimpleNamespace(additionalInfo=info))
+            if(json.loads(info).get("done")):
+                return
+
+    return types.SimpleNamespace(start=start, handle=handle, applied=applied)
+
+
+def testOkAppliesAfterTheDialogClosed(addin, job):
+    running = job.start(Inputs())
+
+    # OK returns right away, the job stops after its current generation
+    addin.CommandExecuteHandler().notify(None)
+    addin.CommandDestroyHandler().notify(None)
+    assert addin.nest_job is running and running.inputs is None
+
+    job.handle()
+    running.thread.join()
+
+    assert addin.nest_job is None
+    assert addin.transform_data is None
+    assert len(job.applied) == 1 and len(job.applied[0]) == 4
+    assert len(addin.applied_nest["bodies"]) == 4
+
+
+def testStopConditionKeepsRunningAfterTheDialogClosed(addin, job):
+    running = job.start(Inputs(ISGenerations=3))
+
+    addin.CommandDestroyHandler().notify(None)
+    assert not running.cancelled
+
+    job.handle()
+
+    assert running.stopped == "generations"
+    assert len(job.applied) == 1
+
+
+def testCancelStopsTheJob(addin, job):
+    running = job.start(Inputs())
+
+    addin.CommandDestroyHandler().notify(None)
+    assert running.cancelled and addin.nest_job is None
+
+    running.thread.join()
+    assert not job.applied
+
+
+def testGenerationsAreLoggedOnTheUIThread(addin, job):
+    running = job.start(Inputs(ISGenerations=3))
+
+    running.thread.join()
+    assert not addin.run_log.first("generation")
+
+    job.handle()
+    assert [r["generation"] for r in addin.run_log.records if r["stage"] == "generation"] == [1, 2, 3]
+    assert addin.transform_data is not None
+
+
+def testWorkersNeedAPythonExecutable(addin, job, monkeypatch):
+    executables = []
+    monkeypatch.setattr(addin.multiprocessing, "set_executable", executables.append)
+    monkeypatch.setattr(addin, "NEST_WORKERS", 2)
+    running = job.start(Inputs(ISGenerations=1))
+    running.thread.join()
+
+    # Fusion360 can't start the processes itself
+    addin.setWorkerExecutable()
+    assert running.workers() == 1 and not executables
+
+    # The executable is set once when the add-in starts, not per job
+    monkeypatch.setattr(addin, "NEST_PYTHON", "python")
+    addin.setWorkerExecutable()
+    assert running.workers() == 2 and running.workers() == 2 and executables == ["python"]
@@ -0,0 +1,48 @@
+import corpus
+from nestlib import apiprofile
+
+
+def testBodiesWithTheSameName(addin):
+    profiler = apiprofile.ApiProfiler()
+
+    # Two bodies called the same, their calls are kept apart by their index
+    for i, n in enumerate((16, 128)):
+        with profiler.body(i, "Body1"):
+            addin.sketchToPart(profiler.wrap(corpus.sketch(n)))
+
+    first, second = profiler.calls(0), profiler.calls(1)
+    assert 0 < first < second
+    assert first + second == profiler.calls()
+
+    rows = profiler.rows(("body",), "body")
+    assert [(r["body"], r["calls"]) for r in rows] == [("Body1 (0)", first), ("Body1 (1)", second)]
+    assert "Body1 (0)" in profiler.report() and "Body1 (1)" in profiler.report()
+
+
+def testCallsPerFunctionAndMember(addin):
+    profiler = apiprofile.ApiProfiler()
+    with profiler.body("sketch"):
+        addin.sketchToPart(profiler.wrap(corpus.sketch(16)))
+
+    rows = profiler.rows()
+    assert sum(r["calls"] for r in rows) == profiler.calls("sketch")
+    assert all(set(r) == {"function", "member", "calls", "seconds"} for r in rows)
+    assert [r["calls"] for r in rows] == sorted((r["calls"] for r in rows), reverse=True)
+
+    # Bodies without a name are shown by their key
+    assert profiler.rows(("body",))[0]["body"] == "sketch"
+
+    profiler.reset()
+    assert profiler.calls() == 0 and profiler.rows() == []
+
+
+def testProfilingKeepsTheResult(addin):
+    sketch = corpus.sketch(64)
+    profiled = addin.sketchToPart(apiprofile.ApiProfiler().wrap(sketch))
+    assert profiled.toDict() == addin.sketchToPart(sketch).toDict()
+
+
+def testDisabled():
+    profiler = apiprofile.ApiProfiler(False)
+    sketch = corpus.sketch(16)
+    assert profiler.wrap(sketch) is sketch
@@ -0,0 +1,145 @@
+import json
+import math
+import os
+import shutil
+
+import pytest
+
+from nestlib import batch, dxf, svgpath
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SVG = os.path.join(FIXTURES, "parts.svg")
+DXF = os.path.join(FIXTURES, "parts.dxf")
+
+
+def _areas(part):
+    return [abs(svgpath.polygonArea(list(zip(l.flatten(0.1)[0::2], l.flatten(0.1)[1::2])))) for l in part.loops]
+
+
+def testReadSVG():
+    parts, quantities, sources, sheet = batch.readJob(SVG)
+
+    # Paths sharing an id are copies of one part, the rect is the sheet
+    assert [p.index for p in parts] == [0, 1]
+    assert quantities == {0: 2}
+    assert sources == [SVG + "#plate", SVG + "#gusset"]
+    assert sheet == (30, 20)
+
+
+def testReadSVGReleasesElements(tmp_path, monkeypatch):
+    path = tmp_path / "many.svg"
+    path.write_text("<svg>{}</svg>".format("".join("<path d='M0 0 L1 0 L1 1 Z' id='{}'/>".format(i) for i in range(2000))))
+
+    # Records how many children the svg element still holds whenever a path ends
+    sizes = []
+    iterparse = batch.ET.iterparse
+
+    def recording(source, events=("end",)):
+        root = None
+        for event, element in iterparse(source, ("start", "end")):
+            if root is None:
+                root = element
+            elif(event == "end"):
+                sizes.append(len(root))
+            if event in events:
+                yield event, element
+
+    monkeypatch.setattr(batch.ET, "iterparse", recording)
+
+    assert len(batch.readSVG(str(path))[0]) == 2000
+    # Only the paths of the current read buffer stay attached
+    assert max(sizes) < 1000
+
+def testReadDXF():
+    parts = dxf.readDXF(DXF, 5)
+
+    # Millimeters, read as 100 SVG units per cm. Largest part first, loops inside a part are its holes
+    assert [p.index for p in parts] == [5, 6, 7]
+    assert [len(p.loops) for p in parts] == [2, 1, 1]
+    assert _areas(parts[0]) == pytest.approx([1000 * 1000, math.pi * 200 ** 2], rel=1e-2)
+    assert _areas(parts[1]) == pytest.approx([1000 * 800 / 2])
+    assert _areas(parts[2]) == pytest.approx([math.pi * 500 ** 2 / 2], rel=1e-2)
+    assert [l.isOuter for l in parts[0].loops] == [True, False]
+
+
+def testReadDirectory(tmp_path):
+    shutil.copy(SVG, str(tmp_path))
+    shutil.copy(DXF, str(tmp_path))
+
+    parts, quantities, sources, sheet = batch.readJob(str(tmp_path))
+
+    # Parts of all files are numbered consecutively
+    assert [p.index for p in parts] == list(range(5))
+    assert quantities == {3: 2}
+    assert [s.rpartition("#")[0] for s in sources] == [str(tmp_path / "parts.dxf")] * 3 + [str(tmp_path / "parts.svg")] * 2
+    assert sheet == (30, 20)
+
+
+def testExpandCopies():
+    # Part 0 has two copies of its path, part 2 is a rotated duplicate of it
+    groups = [[(0, 0.0, 0.0, 0.0), (2, 90.0, 0.0, 0.0)], [(1, 0.0, 0.0, 0.0)]]
+    transforms = [(0, [1, 1, 0, 0]), (1, [2, 2, 0, 0]), (0, [3, 3, 0, 0]), (0, [4, 4, 0, 0])]
+
+    expanded = batch.expandCopies(transforms, groups, {0: 2})
+    assert [i for i, _ in expanded] == [0, 1, 0, 2]
+    assert expanded[3][1][2] == 270
+
+
+def testMain(tmp_path, capsys):
+    pytest.importorskip("numpy")
+    output = str(tmp_path / "out")
+
+    status = batch.main([SVG, DXF, "--generations", "2", "--seed", "1", "--spacing", "0.1", "--width", "30", "--height", "20", "--workers", "2", "--output", output])
+
+    assert status == 0
+    assert sorted(os.listdir(output)) == ["parts-2.json", "parts.json", "summary.json"]
+
+    with open(os.path.join(output, "parts.json")) as f:
+        result = json.load(f)
+    assert result["status"] == "ok" and result["name"] == "parts" and result["path"] == SVG
+    assert result["parts"] == result["placed"] == 3 and result["sheets"] == 1
+    assert 0 < result["utilization"] <= 1
+    assert sorted(i for i, _ in result["transforms"]) == [0, 0, 1]
+    assert all(len(t) == 4 for _, t in result["transforms"])
+    assert result["sources"] == [SVG + "#plate", SVG + "#gusset"]
+    assert "traceback" not in result
+
+    with open(os.path.join(output, "summary.json")) as f:
+        summary = json.load(f)
+    assert [r["name"] for r in summary] == ["parts", "parts-2"]
+    assert all(set(r) >= {"name", "path", "status", "parts", "placed", "sheets", "utilization", "seconds"} for r in summary)
+    assert not any({"transforms", "sources", "traceback"} & set(r) for r in summary)
+    assert summary[1]["parts"] == summary[1]["placed"] == 3
+
+    # The table lists every job
+    out = capsys.readouterr().out.strip()
+    assert out.splitlines()[0].split() == ["job", "parts", "placed", "sheets", "utilization", "seconds", "status"]
+    assert len(out.splitlines()) == 3
+
+
+def testFailedJob(tmp_path):
+    broken = tmp_path / "broken.svg"
+    broken.write_text("<svg><path d='M0 0 C1 1 2 2 3 3 Z'/></svg>")
+
+    job = {"name": "broken", "path": str(broken), "width": 10, "height": 10, "spacing": 0, "rotations": 4, "timeout": 5, "generations": 1, "stall": None, "seed": 1}
+    result = batch.runJobs([job], 1)[0]
+
+    assert result["status"] == "failed"
+    assert result["error"].startswith("ValueError")
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def testKilledJob(tmp_path, monkeypatch):
+    # Reading a pipe nobody writes to never finishes
+    pipe = str(tmp_path / "pipe.svg")
+    os.mkfifo(pipe)
+    monkeypatch.setattr(batch, "TIMEOUT_GRACE", 0)
+
+    job = {"name": "pipe", "path": pipe, "width": 10, "height": 10, "spacing": 0, "rotations": 4, "timeout": 0.2, "generations": None, "stall": None, "seed": 1}
+    results = []
+    batch.runJobs([job], 1, results.append)
+
+    assert len(results) == 1
+    assert results[0]["status"] == "killed" and results[0]["error"] == "Time limit exceeded"
+    assert results[0]["placed"] == 0
@@ -0,0 +1,74 @@
+import json
+import os
+
+from nestlib import cache
+
+
+def _entry(a, b):
+    return {"shapes": [a, b], "nfp": [[0, 0, 1, 0, 1, 1]]}
+
+
+def _writes(store, monkeypatch):
+    # Counts the writes of the store file
+    count = []
+    replace = os.replace
+    monkeypatch.setattr(cache.os, "replace", lambda src, dst: count.append(dst) or replace(src, dst))
+    return count
+
+
+def testSelectDoesNotWrite(tmp_path, monkeypatch):
+    path = str(tmp_path / "nfp.json")
+    store = cache.NfpStore(path)
+    store.update({"ab": _entry("a", "b"), "ac": _entry("a", "c")})
+    store.save()
+
+    store = cache.NfpStore(path)
+    writes = _writes(store, monkeypatch)
+
+    assert set(store.select({"a", "b"})) == {"ab"}
+    store.save()
+    assert writes == []
+
+
+def testKnownEntriesDoNotWrite(tmp_path, monkeypatch):
+    path = str(tmp_path / "nfp.json")
+    store = cache.NfpStore(path)
+    store.update({"ab": _entry("a", "b")})
+    store.save()
+
+    writes = _writes(store, monkeypatch)
+    store.update({"ab": _entry("a", "b")})
+    store.save()
+    assert writes == []
+
+    store.update({"ac": _entry("a", "c")})
+    store.save()
+    assert writes == [path]
+
+
+def testUsedTimesAreWrittenWithNewEntries(tmp_path, monkeypatch):
+    path = str(tmp_path / "nfp.json")
+    store = cache.NfpStore(path)
+    store.update({"ab": _entry("a", "b")})
+    store.save()
+
+    monkeypatch.setattr(cache.time, "time", lambda: 1e10)
+    store.select({"a", "b"})
+    store.update({"cd": _entry("c", "d")})
+    store.save()
+    assert json.load(open(path))["ab"]["used"] == 1e10
+
+
+def testOversizedStoreIsEvicted(tmp_path, monkeypatch):
+    path = str(tmp_path / "nfp.json")
+    store = cache.NfpStore(path)
+    store.update({str(i): _entry(str(i), "x") for i in range(5)})
+    store.save()
+
+    store = cache.NfpStore(path, maxStoredEntries=3)
+    writes = _writes(store, monkeypatch)
+    store.select({"x"})
+    store.save()
+
+    assert writes == [path]
+    assert len(json.load(open(path))) == 3
@@ -0,0 +1,180 @@
+import math
+import random
+
+import pytest
+
+import corpus
+from nestlib import curves, svgpath
+
+
+def _lines(points):
+    return [curves.Curve(curves.LINE, points[i - 1], points[i]) for i in range(len(points))]
+
+
+def _flip(curve):
+    return curves.Curve(curve.kind, curve.end, curve.start)
+
+
+def _connected(chain, tol=curves.POINT_TOLERANCE):
+    ends = [(c.end, c.start) if backwards else (c.start, c.end) for c, backwards in chain]
+    return all(math.dist(ends[i - 1][1], ends[i][0]) <= tol for i in range(len(ends)))
+
+
+def _circle(count):
+    return [(10 * math.cos(2 * math.pi * i / count), 10 * math.sin(2 * math.pi * i / count)) for i in range(count)]
+
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+
+def testChainInOrder(capsys):
+    chain, area = curves.chainCurves(_lines(SQUARE))
+
+    assert [backwards for _, backwards in chain] == [False] * 4
+    assert area == pytest.approx(100)
+    assert capsys.readouterr().out == ""
+
+
+def testChainReversedAndShuffled(capsys):
+    rng = random.Random(0)
+    lines = _lines(_circle(40))
+    shuffled = [_flip(c) if rng.random() < 0.5 else c for c in lines]
+    rng.shuffle(shuffled)
+
+    chain, area = curves.chainCurves(shuffled)
+
+    assert len(chain) == len(lines)
+    assert {id(c) for c, _ in chain} == {id(c) for c in shuffled}
+    assert _connected(chain)
+    assert abs(area) == pytest.approx(abs(svgpath.polygonArea(_circle(40))))
+    assert capsys.readouterr().out == ""
+
+
+def testChainDirection():
+    # The area is signed by the direction of the first curve
+    chain, area = curves.chainCurves([_flip(c) for c in _lines(SQUARE)][::-1])
+    assert area == pytest.approx(-100)
+    assert [backwards for _, backwards in chain] == [False] * 4
+
+
+def testTolerance(capsys):
+    # End points are off by less than the tolerance, on either side of a cell of the grid
+    tol = curves.POINT_TOLERANCE
+    lines = [
+        curves.Curve(curves.LINE, (0, 0), (10 - 0.4 * tol, 0)),
+        curves.Curve(curves.LINE, (10 + 0.4 * tol, 10), (10, 0.4 * tol)),
+        curves.Curve(curves.LINE, (10, 10), (0, 10 - 0.6 * tol)),
+        curves.Curve(curves.LINE, (0, 10), (0.9 * tol, 0))
+    ]
+
+    chain, area = curves.chainCurves(lines)
+
+    assert [backwards for _, backwards in chain] == [False, True, False, False]
+    assert area == pytest.approx(100, abs=1e-2)
+    assert capsys.readouterr().out == ""
+
+
+def testNearestWithinTolerance():
+    # Two candidates are within the tolerance, the closer one is taken
+    tol = curves.POINT_TOLERANCE
+    lines = [
+        curves.Curve(curves.LINE, (0, 0), (1, 0)),
+        curves.Curve(curves.LINE, (1 + 0.8 * tol, 0), (1, 1)),
+        curves.Curve(curves.LINE, (1 + 0.1 * tol, 0), (0, 1)),
+        curves.Curve(curves.LINE, (1, 1), (0, 1)),
+        curves.Curve(curves.LINE, (1, 1), (0, 0))
+    ]
+
+    chain, _ = curves.chainCurves(lines)
+    assert chain[1][0] is lines[2]
+
+
+def testGapIsBridged(capsys):
+    # The third curve starts further away than the tolerance
+    lines = _lines(SQUARE)
+    lines[2] = curves.Curve(curves.LINE, (10, 0.01), (10, 10))
+
+    chain, area = curves.chainCurves(lines)
+
+    assert [c for c, _ in chain] == lines
+    assert area == pytest.approx(100, abs=0.1)
+    assert "not closed, bridged 1 gap" in capsys.readouterr().out
+
+
+def testOpenLoop(capsys):
+    chain, area = curves.chainCurves(_lines(SQUARE)[:3])
+
+    assert len(chain) == 3
+    assert "not closed, bridged 1 gap" in capsys.readouterr().out
+
+
+def testEmpty():
+    assert curves.chainCurves([]) == ([], 0.0)
+
+
+def testArcArea():
+    # Counterclockwise quarter circle closed by two lines through the center
+    arc = curves.Curve(curves.ARC, (1, 0), (0, 1), (1, 1), sweep=math.pi / 2)
+    chain, area = curves.chainCurves([arc, curves.Curve(curves.LINE, (0, 1), (0, 0)), curves.Curve(curves.LINE, (0, 0), (1, 0))])
+
+    assert area == pytest.approx(math.pi / 4)
+
+
+def testLoopToOutline():
+    outer = curves.loopToOutline(curves.CurveLoop(_lines(SQUARE), True))
+    hole = curves.loopToOutline(curves.CurveLoop([_flip(c) for c in _lines([(2, 2), (4, 2), (4, 4), (2, 4)])], False))
+
+    outerArea = svgpath.polygonArea(list(zip(*[iter(outer.flatten())] * 2)))
+    holeArea = svgpath.polygonArea(list(zip(*[iter(hole.flatten())] * 2)))
+
+    # Outer loops and holes run in opposite directions, whatever order they were read in
+    assert abs(outerArea) == pytest.approx(100)
+    assert abs(holeArea) == pytest.approx(4)
+    assert outerArea * holeArea < 0
+
+
+def testReadLoop(addin):
+    loop = addin.readLoop(corpus.roundedRectangleLoop(6, 4, 1))
+
+    assert loop.isOuter
+    assert [c.kind for c in loop.curves] == [curves.ARC, curves.LINE] * 4
+
+    chain, area = curves.chainCurves(loop.curves)
+    assert _connected(chain)
+    assert abs(area) == pytest.approx(6 * 4 - (4 - math.pi))
+
+
+def testReadCircle(addin):
+    circle = addin.readLoop(corpus.circleLoop(2, (1, 1))).curves[0]
+
+    assert circle.kind == curves.CIRCLE
+    assert circle.radii == (2, 2)
+    assert circle.start == circle.end == (3, 1)
+    assert circle.points == [(1, 3)]
+
+
+def testReadSpline(addin):
+    loop = addin.readLoop(corpus.splineLoop(4, 3), 0.01)
+
+    assert [c.kind for c in loop.curves] == [curves.POLYLINE] * 4
+    for c in loop.curves:
+        assert c.points[0] == c.start and c.points[-1] == c.end
+        # Every point lies on the curve within the chord tolerance of its radius
+        assert all(2.5 < math.hypot(*p) < 3.5 for p in c.points)
+
+
+def testReadEllipticalArc(addin):
+    loop = addin.readLoop(corpus.ellipticalArcLoop(2, 1))
+
+    assert [c.kind for c in loop.curves] == [curves.ELLIPTICAL_ARC, curves.LINE]
+    chain, area = curves.chainCurves(loop.curves)
+    assert abs(area) == pytest.approx(math.pi, rel=1e-3)
+
+
+def testSnapshotIsPlainPython(addin):
+    # Snapshots hold no references into the adsk module
+    for loop in corpus.sketch(32).profiles[0].profileLoops:
+        for c in addin.readLoop(loop).curves:
+            values = [c.start, c.end, c.radii, c.points]
+            assert all(v is None or isinstance(v, (tuple, list)) for v in values)
+            assert all(isinstance(x, float) or isinstance(x, int) for v in (c.start, c.end) for x in v)
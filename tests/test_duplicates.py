@@ -0,0 +1,108 @@
+import math
+import random
+
+import pytest
+
+from nestlib import duplicates, outline
+
+
+# Asymmetric outline with a hole off its center
+OUTER = [(0, 0), (300, 0), (300, 80), (120, 80), (120, 200), (0, 200)]
+HOLE = [(30, 30), (30, 60), (60, 60), (60, 30)]
+
+
+def _transform(points, rotation, dx, dy):
+    a = math.radians(rotation)
+    return [(x * math.cos(a) - y * math.sin(a) + dx, x * math.sin(a) + y * math.cos(a) + dy) for x, y in points]
+
+
+def _mirror(points):
+    return [(-x, y) for x, y in points[::-1]]
+
+
+def _part(index, loops):
+    d = " ".join("M" + " L".join("{} {}".format(x, y) for x, y in loop) + " Z" for loop in loops)
+    return outline.partFromPathData(d, index)
+
+
+def _copy(index, rotation, dx, dy, noise=0, rng=None):
+    loops = [_transform(OUTER, rotation, dx, dy), _transform(HOLE, rotation, dx, dy)]
+    if noise:
+        loops = [[(x + rng.uniform(-noise, noise), y + rng.uniform(-noise, noise)) for x, y in loop] for loop in loops]
+    return _part(index, loops)
+
+
+COPIES = [(0, 0, 0), (90, 500, 100), (217.5, -40, 900), (180, 1000, 1000)]
+
+
+def testRotatedCopiesAreGrouped():
+    parts = [_copy(i, *c) for i, c in enumerate(COPIES)]
+
+    groups = duplicates.findDuplicates(parts)
+
+    assert len(groups) == 1
+    assert [m[0] for m in groups[0]] == [0, 1, 2, 3]
+    for (index, rotation, dx, dy), (r, x, y) in zip(groups[0], COPIES):
+        assert rotation % 360 == pytest.approx(r % 360)
+        assert (dx, dy) == pytest.approx((x, y))
+
+
+def testNearDuplicates():
+    rng = random.Random(2)
+    parts = [_copy(0, 0, 0, 0), _copy(1, 90, 500, 100, 0.003, rng), _copy(2, 180, 0, 900, 0.5, rng)]
+
+    # Vertices off by less than the tolerance still match, further off they don't
+    groups = duplicates.findDuplicates(parts, tolerance=0.01)
+    assert sorted([m[0] for m in g] for g in groups) == [[0, 1], [2]]
+
+
+def testMirroredCopiesAreNotGrouped():
+    # A mirrored copy can't be placed by rotating the part
+    parts = [_copy(0, 0, 0, 0), _part(1, [_mirror(OUTER), _mirror(HOLE)]), _part(2, [_transform(_mirror(OUTER), 90, 50, 50), _transform(_mirror(HOLE), 90, 50, 50)])]
+
+    groups = duplicates.findDuplicates(parts)
+    assert sorted([m[0] for m in g] for g in groups) == [[0], [1, 2]]
+
+
+def testMirrorSymmetricPartsAreGrouped():
+    # The mirror image of a symmetric part is a rotated copy of it
+    tee = [(0, 0), (300, 0), (300, 50), (175, 50), (175, 200), (125, 200), (125, 50), (0, 50)]
+    parts = [_part(0, [tee]), _part(1, [_mirror(tee)])]
+
+    assert len(duplicates.findDuplicates(parts)) == 1
+
+
+def testHolesAreCompared():
+    moved = [(x + 100, y) for x, y in HOLE]
+    parts = [_copy(0, 0, 0, 0), _part(1, [OUTER, moved]), _part(2, [OUTER])]
+
+    assert len(duplicates.findDuplicates(parts)) == 3
+
+
+@pytest.mark.parametrize("unitFactor", [1, 100])
+def testExpandedTransformsReproduceEveryCopy(unitFactor):
+    parts = [_copy(i, *c) for i, c in enumerate(COPIES)]
+    groups = duplicates.findDuplicates(parts)
+
+    # Placements of the representative, one per copy, as returned by an engine
+    placements = [(0, [1.5, 2, 0, 0]), (0, [7, 3.25, 90, 0]), (0, [4, 4, 270, 1]), (0, [-2, 8, 33, 1])]
+    expanded = duplicates.expandPlacements(placements, groups, unitFactor)
+
+    assert [i for i, _ in expanded] == [0, 1, 2, 3]
+
+    # Every copy ends up exactly where the engine placed the representative
+    for (_, t), (index, e) in zip(placements, expanded):
+        x, y, rotation, sheet = t
+        placed = _transform(OUTER, rotation, x * unitFactor, y * unitFactor)
+        copy = _transform(OUTER, *COPIES[index])
+        assert e[3] == sheet
+        moved = _transform(copy, e[2], e[0] * unitFactor, e[1] * unitFactor)
+        assert [c for p in moved for c in p] == pytest.approx([c for p in placed for c in p])
+
+
+def testExpandPlacementsWithoutGroups():
+    # Parts that are not in a group keep their placement, surplus copies are dropped
+    groups = [[(0, 0.0, 0.0, 0.0), (1, 90.0, 10.0, 0.0)]]
+    placements = [(5, [1, 2, 0, 0]), (0, [0, 0, 0, 0]), (0, [1, 1, 0, 0]), (0, [2, 2, 0, 0])]
+
+    assert [i for i, _ in duplicates.expandPlacements(placements, groups)] == [5, 0, 1]
@@ -0,0 +1,171 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nestlib import engine, geometry, outline  # noqa: E402
+
+
+SHAPES = [
+    [(0, 0), (300, 0), (300, 100), (100, 100), (100, 300), (0, 300)],
+    [(0, 0), (300, 0), (300, 300), (200, 300), (200, 100), (100, 100), (100, 300), (0, 300)],
+    [(0, 0), (250, 0), (0, 150)],
+    [(0, 0), (200, 0), (200, 120), (0, 120)],
+    [(0, 0), (80, 0), (80, 400), (0, 400)]
+]
+
+
+def _placed(polygon, x, y, rotation):
+    return geometry.rotatePolygon(geometry.toArray(polygon), rotation) + [x, y]
+
+
+def _segmentDistance(p, a, b):
+    ab = b - a
+    t = np.clip(np.dot(p - a, ab) / np.dot(ab, ab), 0, 1)
+    return math.hypot(*(a + t * ab - p))
+
+
+def _inside(point, polygon):
+    inside = False
+    for a, b in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if((a[1] > point[1]) != (b[1] > point[1]) and point[0] < (b[0] - a[0]) * (point[1] - a[1]) / (b[1] - a[1]) + a[0]):
+            inside = not inside
+    return inside
+
+
+def _overlaps(p, q, tol=1e-6):
+    # Separating axis test of every pair of convex pieces, touching is not overlapping
+    for a in geometry.convexDecomposition(geometry.cleanPolygon(p)):
+        for b in geometry.convexDecomposition(geometry.cleanPolygon(q)):
+            separated = False
+            for poly in (a, b):
+                for u, v in zip(poly, np.roll(poly, -1, axis=0)):
+                    normal = np.array([v[1] - u[1], u[0] - v[0]])
+                    if(np.max(a @ normal) <= np.min(b @ normal) + tol or np.max(b @ normal) <= np.min(a @ normal) + tol):
+                        separated = True
+            if not separated:
+                return True
+    return False
+
+
+def _distance(p, q):
+    # Distance between two polygons, 0 if they overlap
+    if(_inside(p[0], q) or _inside(q[0], p)):
+        return 0
+    if(len(geometry.segmentIntersections(p, np.roll(p, -1, axis=0), q, np.roll(q, -1, axis=0)))):
+        return 0
+    return min(
+        min(_segmentDistance(v, a, b) for v in p for a, b in zip(q, np.roll(q, -1, axis=0))),
+        min(_segmentDistance(v, a, b) for v in q for a, b in zip(p, np.roll(p, -1, axis=0)))
+    )
+
+
+def _nest(shapes, width, height, spacing, rotations=4, **kwargs):
+    polygons = [geometry.toArray(s) for s in shapes]
+    transforms = engine.nestPolygons(polygons, list(range(len(polygons))), width, height, spacing, rotations, unitFactor=1, generations=3, seed=1, **kwargs)
+
+    sheets = {}
+    for index, (x, y, rotation, sheet) in transforms:
+        sheets.setdefault(sheet, []).append(_placed(shapes[index], x, y, rotation))
+    return transforms, sheets
+
+
+@pytest.mark.parametrize("spacing", [0, 10])
+def testPlacementsDontOverlap(spacing):
+    transforms, sheets = _nest(SHAPES * 2, 700, 500, spacing)
+
+    assert sorted(i for i, _ in transforms) == list(range(len(SHAPES) * 2))
+
+    for placed in sheets.values():
+        for i, p in enumerate(placed):
+            assert p.min() >= -1e-6
+            assert p[:, 0].max() <= 700 + 1e-6 and p[:, 1].max() <= 500 + 1e-6
+
+            for q in placed[i + 1:]:
+                assert not _overlaps(p, q)
+                assert _distance(p, q) >= spacing - 1e-6
+
+
+def testPartsArePacked():
+    # Two L shapes fit into one 400 x 300 sheet only if they interlock
+    l = SHAPES[0]
+    transforms, sheets = _nest([l, l], 400, 300, 0)
+
+    assert len(sheets) == 1
+    assert not _overlaps(*sheets[0])
+
+
+def testRotations():
+    transforms, sheets = _nest(SHAPES, 1000, 1000, 5, rotations=4)
+    assert {t[2] for _, t in transforms} <= {0, 90, 180, 270}
+
+    transforms, sheets = _nest(SHAPES, 1000, 1000, 5, rotations=1)
+    assert {t[2] for _, t in transforms} == {0}
+
+
+def testPartFitsOnlyRotated():
+    # 400 tall, on a sheet that is only 300 tall
+    transforms, sheets = _nest([SHAPES[4]], 1000, 300, 0)
+
+    assert len(transforms) == 1
+    assert transforms[0][1][2] in (90, 270)
+    assert sheets[0][0][:, 1].max() <= 300 + 1e-6
+
+
+def testAllowedRotations():
+    # Rotation index 2 of 4 only, i.e. 180 degrees
+    polygons = [geometry.toArray(s) for s in SHAPES[:3]]
+    transforms = engine.nestPolygons(polygons, [0, 1, 2], 1000, 1000, 0, 4, unitFactor=1, generations=2, seed=1, allowedRotations=[[(2, 3)]] * 3)
+
+    assert {t[2] for _, t in transforms} == {180}
+
+
+def testUnplacedParts():
+    transforms, sheets = _nest([SHAPES[3], [(0, 0), (2000, 0), (2000, 10), (0, 10)]], 500, 500, 0)
+    assert [i for i, _ in transforms] == [0]
+
+
+def testFixedParts():
+    # A part that keeps its place in the corner, the other one is nested around it
+    square = outline.partFromPathData("M0 0 L200 0 L200 200 L0 200 Z", 0)
+    other = outline.partFromPathData("M0 0 L200 0 L200 200 L0 200 Z", 1)
+
+    transforms = engine.nestParts([other], 4, 2, 0, 4, 100, generations=2, seed=1, fixed=[(square, [0, 0, 0, 0])])
+
+    assert len(transforms) == 1
+    index, (x, y, rotation, sheet) = transforms[0]
+    assert index == 1 and sheet == 0
+    square = [(0, 0), (200, 0), (200, 200), (0, 200)]
+    assert not _overlaps(_placed(square, x * 100, y * 100, rotation), _placed(square, 0, 0, 0))
+
+
+def testQuantities():
+    part = outline.partFromPathData("M0 0 L100 0 L100 50 L0 50 Z", 7)
+    transforms = engine.nestParts([part], 10, 10, 0.1, 4, 100, generations=2, seed=1, quantities={7: 5})
+
+    assert [i for i, _ in transforms] == [7] * 5
+
+
+def testSeedIsReproducible():
+    first, _ = _nest(SHAPES, 700, 500, 5)
+    second, _ = _nest(SHAPES, 700, 500, 5)
+    assert first == second
+
+
+def testTransformsFromResult():
+    result = engine.NestResult([[(0, 100, 200, 90)], [(1, 300, 0, 0)]], 0, [], 0.5)
+    assert engine.transformsFromResult(result, [4, None], 100) == [(4, [1, 2, 90, 0])]
+
+
+def testFailedWorkersPlaceInThisProcess(monkeypatch, capsys):
+    def failing(spec):
+        raise ImportError("No module named 'nestlib'")
+
+    # Forked workers run the patched initializer
+    monkeypatch.setattr(engine, "_initWorker", failing)
+    transforms, _ = _nest(SHAPES, 700, 500, 5, workers=2)
+
+    # The whole run went on in this process, as without workers
+    assert "Warning: Worker processes failed" in capsys.readouterr().out
+    assert transforms == _nest(SHAPES, 700, 500, 5)[0]
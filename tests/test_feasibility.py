@@ -0,0 +1,68 @@
+import math
+import random
+
+import pytest
+
+from nestlib import feasibility
+
+
+def _polygon(rng, count=12):
+    # Random star shaped polygon, stretched so only some rotations fit
+    return [(rng.uniform(60, 100) * 3 * math.cos(2 * math.pi * i / count), rng.uniform(60, 100) * math.sin(2 * math.pi * i / count)) for i in range(count)]
+
+
+def _python(monkeypatch):
+    monkeypatch.setattr(feasibility, "np", None)
+
+
+def testFittingRotations():
+    # 200 x 50 fits a 100 x 300 sheet only close to upright
+    rectangle = [(0, 0), (200, 0), (200, 50), (0, 50)]
+
+    assert feasibility.fittingRotations(rectangle, 4, 300, 100) == [(0, 1), (2, 3)]
+    assert feasibility.fittingRotations(rectangle, 4, 100, 300) == [(1, 2), (3, 4)]
+    assert feasibility.fittingRotations(rectangle, 4, 100, 100) == []
+    assert feasibility.fittingRotations(rectangle, 4, 1000, 1000) == [(0, 4)]
+
+    # Spacing applies to the border as well
+    assert feasibility.fittingRotations(rectangle, 4, 220, 100, 5) == [(0, 1), (2, 3)]
+    assert feasibility.fittingRotations(rectangle, 4, 220, 100, 15) == []
+
+
+def testFittingRotationsWithoutPoints():
+    assert feasibility.fittingRotations([], 8, 10, 10) == [(0, 8)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("rotations", [1, 4, 36, 360, 5000])
+def testNumpyMatchesPython(monkeypatch, seed, rotations):
+    pytest.importorskip("numpy")
+    polygon = _polygon(random.Random(seed))
+
+    ranges = feasibility.fittingRotations(polygon, rotations, 500, 400, 10)
+    hull = feasibility._convexHull(polygon)
+    fits = feasibility._fitsNumpy(hull, rotations, 480, 380)
+
+    _python(monkeypatch)
+    assert feasibility.fittingRotations(polygon, rotations, 500, 400, 10) == ranges
+    assert feasibility._fitsPython(hull, rotations, 480, 380) == fits
+
+
+def testHullMatchesGeometry():
+    pytest.importorskip("numpy")
+    from nestlib import geometry
+
+    rng = random.Random(3)
+    points = [(rng.uniform(-50, 50), rng.uniform(-20, 20)) for _ in range(200)]
+
+    hull = geometry.convexHull(geometry.toArray(points))
+    assert sorted(feasibility._convexHull(points)) == sorted(map(tuple, hull.tolist()))
+
+
+def testPickRotation():
+    ranges = [(2, 4), (7, 8), (10, 13)]
+
+    assert feasibility.countRotations(ranges) == 6
+    assert [feasibility.pickRotation(ranges, r) for r in range(6)] == [2, 3, 7, 10, 11, 12]
+    with pytest.raises(IndexError):
+        feasibility.pickRotation(ranges, 6)
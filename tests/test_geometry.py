@@ -0,0 +1,148 @@
+import math
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nestlib import geometry, svgpath  # noqa: E402
+
+
+L_SHAPE = [(0, 0), (30, 0), (30, 10), (10, 10), (10, 30), (0, 30)]
+U_SHAPE = [(0, 0), (30, 0), (30, 30), (20, 30), (20, 10), (10, 10), (10, 30), (0, 30)]
+COMB = [(0, 0), (50, 0), (50, 20)] + [p for x in range(40, 0, -10) for p in ((x + 5, 20), (x + 5, 5), (x, 5), (x, 20))] + [(0, 20)]
+
+
+def _separated(p, q, tol=1e-6):
+    # Separating axis test of two convex polygons, touching counts as separated
+    for poly in (p, q):
+        for a, b in zip(poly, np.roll(poly, -1, axis=0)):
+            normal = np.array([b[1] - a[1], a[0] - b[0]])
+            if(np.max(p @ normal) <= np.min(q @ normal) + tol or np.max(q @ normal) <= np.min(p @ normal) + tol):
+                return True
+    return False
+
+
+def testRotatePolygon():
+    # Same direction as the SVG rotate() transform
+    rotated = geometry.rotatePolygon(geometry.toArray([(1, 0), (0, 1)]), 90)
+    assert np.allclose(rotated, [(0, 1), (-1, 0)])
+
+
+def testCleanPolygon():
+    polygon = geometry.toArray([(0, 0), (0, 10), (0, 10), (10, 10), (10, 5), (10, 0), (5, 0)])
+    clean = geometry.cleanPolygon(polygon)
+
+    assert len(clean) == 4
+    assert svgpath.polygonArea(clean) == pytest.approx(100)
+
+
+def testConvexHull():
+    rng = random.Random(1)
+    points = geometry.toArray([(rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(50)] + [(-10, -10), (10, -10), (10, 10), (-10, 10), (0, 10)])
+
+    hull = geometry.convexHull(points)
+    assert len(hull) == 4
+    assert geometry.isConvex(hull)
+    assert svgpath.polygonArea(hull) == pytest.approx(400)
+
+
+@pytest.mark.parametrize("shape", [L_SHAPE, U_SHAPE, COMB])
+def testConvexDecomposition(shape):
+    polygon = geometry.cleanPolygon(geometry.toArray(shape))
+    pieces = geometry.convexDecomposition(polygon)
+
+    assert len(pieces) > 1
+    assert all(geometry.isConvex(p) and svgpath.polygonArea(p) > 0 for p in pieces)
+    assert sum(svgpath.polygonArea(p) for p in pieces) == pytest.approx(svgpath.polygonArea(polygon))
+
+    # The pieces tile the polygon without overlapping each other
+    for i, p in enumerate(pieces):
+        for q in pieces[i + 1:]:
+            assert _separated(p, q)
+
+
+def testConvexDecompositionFallsBackToHull():
+    polygon = geometry.cleanPolygon(geometry.toArray(COMB))
+    pieces = geometry.convexDecomposition(polygon, maxPieces=2)
+
+    assert len(pieces) == 1
+    assert svgpath.polygonArea(pieces[0]) == pytest.approx(50 * 20)
+
+
+def testOffsetConvex():
+    triangle = geometry.toArray([(0, 0), (100, 0), (50, 5)])
+    grown = geometry.offsetConvex(triangle, 2)
+
+    assert geometry.isConvex(grown)
+
+    # Every point of the original is at least the offset away from every edge
+    for a, b in zip(grown, np.roll(grown, -1, axis=0)):
+        e = b - a
+        for p in triangle:
+            assert (e[0] * (p[1] - a[1]) - e[1] * (p[0] - a[0])) / math.hypot(*e) >= 2 - 1e-9
+
+
+def testMinkowskiConvex():
+    square = geometry.toArray([(0, 0), (2, 0), (2, 2), (0, 2)])
+    triangle = geometry.toArray([(0, 0), (1, 0), (0, 1)])
+
+    total = geometry.minkowskiConvex(square, triangle)
+    assert geometry.isConvex(total)
+    assert svgpath.polygonArea(total) == pytest.approx(4 + 0.5 + 2 * 2)
+
+
+@pytest.mark.parametrize("shapes", [(L_SHAPE, U_SHAPE), (U_SHAPE, U_SHAPE), (COMB, L_SHAPE)])
+def testNoFitPieces(shapes):
+    a, b = (geometry.cleanPolygon(geometry.toArray(s)) for s in shapes)
+    piecesA = geometry.convexDecomposition(a)
+    piecesB = geometry.convexDecomposition(b)
+    nfp = geometry.noFitPieces(piecesA, piecesB)
+
+    # B moved by t overlaps A exactly if t is strictly inside a piece of the no-fit polygon
+    rng = random.Random(2)
+    seen = set()
+    for _ in range(300):
+        t = np.array([rng.uniform(-60, 60), rng.uniform(-40, 40)])
+        overlaps = any(not _separated(p, q + t) for p in piecesA for q in piecesB)
+        inside = bool(geometry.pointsStrictlyInsideAny(t[None], *geometry.padPolygons(nfp), np.array([geometry.boundingBox(n) for n in nfp]))[0])
+        assert overlaps == inside
+        seen.add(overlaps)
+    assert seen == {True, False}
+
+    # B right next to A touches it without overlapping
+    t = np.array([a[:, 0].max() - b[:, 0].min(), 0])
+    assert not geometry.pointsStrictlyInsideAny(t[None], *geometry.padPolygons(nfp), np.array([geometry.boundingBox(n) for n in nfp]))[0]
+    assert geometry.pointsStrictlyInsideAny(t[None] - [1, 0], *geometry.padPolygons(nfp), np.array([geometry.boundingBox(n) for n in nfp]))[0]
+
+
+def testPointsStrictlyInside():
+    square = geometry.toArray([(0, 0), (2, 0), (2, 2), (0, 2)])
+    points = geometry.toArray([(1, 1), (0, 1), (2, 2), (3, 1)])
+    assert list(geometry.pointsStrictlyInside(points, square)) == [True, False, False, False]
+
+
+def testCrossingPoints():
+    rng = random.Random(3)
+    polygons = [geometry.toArray([(rng.uniform(0, 10), rng.uniform(0, 10)) for _ in range(5)]) for _ in range(4)]
+    starts, ends, pad = geometry.padPolygons(polygons)
+
+    found = geometry.crossingPoints(starts, ends, pad)
+
+    expected = []
+    for i, p in enumerate(polygons):
+        for q in polygons[i + 1:]:
+            points = geometry.segmentIntersections(p, np.roll(p, -1, axis=0), q, np.roll(q, -1, axis=0))
+            expected.extend(points)
+
+    assert len(found) == len(expected)
+    assert np.allclose(np.sort(found, axis=0), np.sort(np.array(expected), axis=0))
+
+
+def testCoveredEdges():
+    big = geometry.toArray([(0, 0), (10, 0), (10, 10), (0, 10)])
+    small = geometry.toArray([(2, 2), (4, 2), (4, 4), (2, 4)])
+    edges, vertices = geometry.coveredEdges([big, small])
+
+    assert not edges[0].any() and not vertices[0].any()
+    assert edges[1].all() and vertices[1].all()
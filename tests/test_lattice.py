@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nestlib import geometry, lattice, outline  # noqa: E402
+
+
+L_SHAPE = "M0 0 L300 0 L300 100 L100 100 L100 300 L0 300 Z"
+TRIANGLE = "M0 0 L250 0 L0 150 Z"
+
+
+def _placed(part, transform, unitFactor):
+    x, y, rotation, _ = transform
+    polygon = geometry.toArray(part.outerPolygon(0.3))
+    return geometry.rotatePolygon(polygon, rotation) + [x * unitFactor, y * unitFactor]
+
+
+def _gap(p, q):
+    # Largest gap between two convex polygons along the normals of their edges, negative if they overlap
+    gap = -np.inf
+    for poly in (p, q):
+        for a, b in zip(poly, np.roll(poly, -1, axis=0)):
+            normal = np.array([b[1] - a[1], a[0] - b[0]]) / np.hypot(*(b - a))
+            gap = max(gap, np.min(q @ normal) - np.max(p @ normal), np.min(p @ normal) - np.max(q @ normal))
+    return gap
+
+
+def _distance(p, q):
+    # Gap between the convex pieces of two polygons, at most their true distance
+    return min(
+        _gap(a, b)
+        for a in geometry.convexDecomposition(geometry.cleanPolygon(p))
+        for b in geometry.convexDecomposition(geometry.cleanPolygon(q))
+    )
+
+
+@pytest.mark.parametrize("path", [L_SHAPE, TRIANGLE])
+@pytest.mark.parametrize("spacing", [0, 0.2])
+def testLatticeCopiesDontOverlap(path, spacing):
+    part = outline.partFromPathData(path, 3)
+
+    transforms = lattice.nestLattice(part, 40, 20, 12, spacing, 4, 100)
+
+    assert len(transforms) == 40
+    assert all(i == 3 for i, _ in transforms)
+
+    sheets = {}
+    for _, t in transforms:
+        placed = _placed(part, t, 100)
+        assert placed.min() >= -1e-6
+        assert placed[:, 0].max() <= 2000 + 1e-6 and placed[:, 1].max() <= 1200 + 1e-6
+        sheets.setdefault(t[3], []).append(placed)
+
+    # Copies are packed, so every sheet holds more than one
+    assert len(sheets) < 40
+
+    for placed in sheets.values():
+        for i, p in enumerate(placed):
+            for q in placed[i + 1:]:
+                assert _distance(p, q) >= spacing * 100 - 1e-6
+
+
+def testLatticeIsDenserThanBoundingBoxes():
+    # Turned pairs of triangles fill their bounding box, single copies only half of it
+    part = outline.partFromPathData(TRIANGLE, 0)
+    transforms = lattice.nestLattice(part, 150, 20, 12, 0, 4, 100)
+
+    perSheet = max(sum(1 for _, t in transforms if t[3] == s) for s in {t[3] for _, t in transforms})
+    assert perSheet > (2000 // 250) * (1200 // 150)
+
+
+def testPartThatFitsNoSheet():
+    part = outline.partFromPathData("M0 0 L5000 0 L5000 10 L0 10 Z", 0)
+    assert lattice.nestLattice(part, 4, 20, 12, 0, 4, 100) is None
@@ -0,0 +1,97 @@
+import math
+import random
+
+import pytest
+
+from nestlib import outline, rectpack
+
+
+def _overlap(a, b):
+    # Overlap of two boxes (x, y, width, height) along both axes, touching is not overlapping
+    return min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]), min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+
+
+def _rectangle(w, h, x=0, y=0, index=0):
+    return outline.partFromPathData("M{0} {1} L{2} {1} L{2} {3} L{0} {3} Z".format(x, y, x + w, y + h), index)
+
+
+def _placedBox(polygon, transform, unitFactor):
+    # Rotates the outline, then moves it, as the add-in applies transform data
+    x, y, rotation, _ = transform
+    a = math.radians(rotation)
+    points = [(px * math.cos(a) - py * math.sin(a) + x * unitFactor, px * math.sin(a) + py * math.cos(a) + y * unitFactor) for px, py in polygon]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+@pytest.mark.parametrize("allowRotation", [True, False])
+def testPackedRectanglesDontOverlap(allowRotation):
+    rng = random.Random(4)
+    sizes = [(rng.uniform(5, 120), rng.uniform(5, 80)) for _ in range(200)]
+
+    placements = rectpack.packRectangles(sizes, 300, 200, allowRotation)
+
+    assert len(placements) == len(sizes) and None not in placements
+    assert allowRotation or not any(turned for _, _, _, turned in placements)
+
+    sheets = {}
+    for (w, h), (sheet, x, y, turned) in zip(sizes, placements):
+        box = (x, y, h, w) if turned else (x, y, w, h)
+        assert x >= 0 and y >= 0 and x + box[2] <= 300 + 1e-9 and y + box[3] <= 200 + 1e-9
+        sheets.setdefault(sheet, []).append(box)
+
+    for boxes in sheets.values():
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1:]:
+                assert min(_overlap(a, b)) <= 1e-9
+
+
+def testRectangleThatFitsNowhere():
+    assert rectpack.packRectangles([(50, 50), (400, 10), (10, 400)], 300, 200, False) == [(0, 0, 0, False), None, None]
+
+    # Turned it fits
+    assert rectpack.packRectangles([(10, 250)], 300, 200)[0][3]
+
+
+@pytest.mark.parametrize("spacing", [0, 0.5])
+def testNestRectanglesKeepsTheSpacing(spacing):
+    rng = random.Random(6)
+    parts = [_rectangle(rng.uniform(50, 400), rng.uniform(50, 300), rng.uniform(-100, 100), rng.uniform(-100, 100), i) for i in range(40)]
+    polygons = {p.index: p.outerPolygon(0.3) for p in parts}
+
+    transforms = rectpack.nestRectangles(parts, 20, 15, spacing, 4, 100, quantities={0: 3})
+
+    assert sorted(i for i, _ in transforms) == [0, 0] + list(range(40))
+
+    s = spacing * 100
+    sheets = {}
+    for index, transform in transforms:
+        box = _placedBox(polygons[index], transform, 100)
+        assert transform[2] in (0, 90)
+        assert box[0] >= s - 1e-6 and box[1] >= s - 1e-6
+        assert box[0] + box[2] <= 2000 - s + 1e-6 and box[1] + box[3] <= 1500 - s + 1e-6
+        sheets.setdefault(transform[3], []).append(box)
+
+    for boxes in sheets.values():
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1:]:
+                # Apart by at least the spacing along one of the axes
+                assert min(_overlap(a, b)) <= -s + 1e-6
+
+
+@pytest.mark.parametrize("rotations, turns", [(4, True), (8, True), (2, False), (3, False), (1, False)])
+def testNestRectanglesTurnsOnlyByMultiplesOf90(rotations, turns):
+    # Tall parts on a wide, low sheet only fit turned
+    parts = [_rectangle(100, 1000, index=i) for i in range(3)]
+    transforms = rectpack.nestRectangles(parts, 20, 5, 0, rotations, 100)
+
+    if turns:
+        assert [t[2] for _, t in transforms] == [90] * 3
+    else:
+        assert transforms == []
+
+
+def testNestRectanglesNeedsRectangles():
+    triangle = outline.partFromPathData("M0 0 L100 0 L0 100 Z", 1)
+    assert rectpack.nestRectangles([_rectangle(10, 10), triangle], 20, 20) is None
@@ -0,0 +1,143 @@
+import math
+import random
+
+import pytest
+
+from nestlib import outline, simplify
+
+
+TOLERANCE = 2
+
+
+def _star(rng, count=300, radius=100, noise=1.5):
+    return [
+        ((radius + rng.uniform(-noise, noise)) * math.cos(2 * math.pi * i / count), (radius + rng.uniform(-noise, noise)) * math.sin(2 * math.pi * i / count))
+        for i in range(count)
+    ]
+
+
+def _loop(points, isOuter):
+    loop = outline.Loop(isOuter)
+    loop.moveTo(*points[0])
+    for p in points[1:]:
+        loop.lineTo(*p)
+    return loop
+
+
+def _polygon(loop):
+    flat = loop.flatten(0.01)
+    return list(zip(flat[0::2], flat[1::2]))
+
+
+def _segmentDistance(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    t = max(0, min(1, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(a[0] + t * dx - p[0], a[1] + t * dy - p[1])
+
+
+def _boundaryDistance(p, polygon):
+    return min(_segmentDistance(p, polygon[i - 1], polygon[i]) for i in range(len(polygon)))
+
+
+def _inside(p, polygon):
+    inside = False
+    for i in range(len(polygon)):
+        (ax, ay), (bx, by) = polygon[i - 1], polygon[i]
+        if((ay > p[1]) != (by > p[1]) and p[0] < (bx - ax) * (p[1] - ay) / (by - ay) + ax):
+            inside = not inside
+    return inside
+
+
+def _samples(polygon):
+    # Vertices and points along every edge
+    return [(a[0] + (b[0] - a[0]) * k / 4, a[1] + (b[1] - a[1]) * k / 4) for a, b in zip(polygon, polygon[1:] + polygon[:1]) for k in range(4)]
+
+
+def _contains(outer, inner, eps=1e-6):
+    # Every point of the boundary of inner lies inside or on outer, and the other way round outside or on it
+    return (
+        all(_inside(p, outer) or _boundaryDistance(p, outer) <= eps for p in _samples(inner)) and
+        all(not _inside(p, inner) or _boundaryDistance(p, inner) <= eps for p in _samples(outer))
+    )
+
+
+@pytest.mark.parametrize("isOuter", [True, False])
+@pytest.mark.parametrize("clockwise", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def testOneSided(isOuter, clockwise, seed):
+    points = _star(random.Random(seed))
+    if clockwise:
+        points = points[::-1]
+    loop = _loop(points, isOuter)
+
+    simplified = simplify.simplifyLoop(loop, TOLERANCE)
+    before = _polygon(loop)
+    after = _polygon(simplified)
+
+    assert len(simplified) < len(loop) * 3 / 4
+
+    # Outer loops only grow and holes only shrink, so parts never overlap
+    if isOuter:
+        assert _contains(after, before)
+    else:
+        assert _contains(before, after)
+
+    # By no more than the tolerance
+    assert all(_boundaryDistance(p, after) <= TOLERANCE + 1e-9 for p in before)
+
+
+def testMixedArcsAndLines():
+    rng = random.Random(7)
+    loop = outline.Loop(True)
+    loop.moveTo(0, 0)
+    for x in range(5, 200, 5):
+        loop.lineTo(x, rng.uniform(-0.5, 0.5))
+    loop.lineTo(200, 0)
+    loop.arcTo(50, 50, 0, 0, 1, 250, 50)
+    for y in range(55, 200, 5):
+        loop.lineTo(250 + rng.uniform(-0.5, 0.5), y)
+    loop.lineTo(250, 200)
+    loop.arcTo(50, 50, 0, 0, 1, 200, 250)
+    loop.lineTo(0, 250)
+
+    simplified = simplify.simplifyLoop(loop, TOLERANCE)
+
+    # Arcs are kept as they are, the runs of lines between them are simplified
+    arcs = [list(args) for op, args in loop.segments() if op == outline.ARC]
+    assert [list(args) for op, args in simplified.segments() if op == outline.ARC] == arcs
+    assert len(simplified) < len(loop) / 4
+
+    before = _polygon(loop)
+    after = _polygon(simplified)
+    assert _contains(after, before)
+    assert all(_boundaryDistance(p, after) <= TOLERANCE + 1e-9 for p in before)
+
+
+@pytest.mark.parametrize("arc", [False, True])
+def testImplicitClosingSegment(arc):
+    # The last vertices lie on the implicit segment back to the start
+    loop = outline.Loop(True)
+    loop.moveTo(0, 0)
+    loop.lineTo(100, 0)
+    if arc:
+        loop.arcTo(50, 50, 0, 0, 1, 100, 100)
+    else:
+        loop.lineTo(100, 100)
+    loop.lineTo(0, 100)
+    for y in range(90, 0, -10):
+        loop.lineTo(0, y)
+
+    simplified = simplify.simplifyLoop(loop, TOLERANCE)
+    segments = list(simplified.segments())
+
+    # They are removed, and the loop still closes implicitly
+    assert len(segments) == 4
+    assert tuple(segments[-1][1][-2:]) == (0, 100)
+    assert _contains(_polygon(simplified), _polygon(loop))
+
+
+def testSimplifyChainIsOneSided():
+    # The middle vertex lies right of the segment between the ends
+    points = [(0, 0), (10, -1), (20, 0)]
+    assert simplify.simplifyChain(points, TOLERANCE, 1) == points
+    assert simplify.simplifyChain(points, TOLERANCE, -1) == [(0, 0), (20, 0)]
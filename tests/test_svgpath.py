@@ -0,0 +1,37 @@
+import math
+
+import pytest
+
+from nestlib import svgpath
+
+
+def testPolygonArea():
+    square = [(0, 0), (2, 0), (2, 2), (0, 2)]
+    assert svgpath.polygonArea(square) == 4
+    assert svgpath.polygonArea(square[::-1]) == -4
+
+
+def testPolygonAreaOfArray():
+    np = pytest.importorskip("numpy")
+    assert svgpath.polygonArea(np.array([(0, 0), (2, 0), (2, 2), (0, 2)], dtype=float)) == 4
+
+    # Arrays take the NumPy path, which matches the one for sequences
+    polygon = np.random.default_rng(1).uniform(-10, 10, (50, 2))
+    assert svgpath.polygonArea(polygon) == pytest.approx(svgpath.polygonArea([tuple(p) for p in polygon]))
+
+
+def testTokenizePath():
+    # Implicit LineTos after a MoveTo and repeated commands are made explicit
+    assert svgpath.tokenizePath("M0 0 10 0 L10 10 0 10Z") == [
+        ("M", [0, 0]), ("L", [10, 0]), ("L", [10, 10]), ("L", [0, 10]), ("Z", [])
+    ]
+    with pytest.raises(ValueError):
+        svgpath.tokenizePath("0 0 L1 1")
+
+
+def testFlattenArc():
+    # Half circle of radius 10, every point on the circle and the last one at the end
+    points = svgpath.flattenArc(-10, 0, 10, 10, 0, 0, 1, 10, 0, 0.01)
+
+    assert points[-1] == pytest.approx((10, 0))
+    assert all(math.hypot(*p) == pytest.approx(10) for p in points)
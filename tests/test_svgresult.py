@@ -0,0 +1,111 @@
+import xml.etree.ElementTree as ET
+
+from nestlib import outline, svgresult
+
+
+def _export(groups):
+    return "<svg><rect width='1000' height='1000'/>{}</svg>".format("".join(groups))
+
+
+def testParseTransform():
+    a, b, c, d, e, f = svgresult.parseTransform("translate(10 20) rotate(90)")
+    assert (round(a, 9), round(b, 9), round(c, 9), round(d, 9)) == (0, 1, -1, 0)
+    assert (e, f) == (10, 20)
+
+
+def testReadPlacements():
+    svg = _export([
+        "<g transform='translate(100 50) rotate(90)'><path d='M0 0' id='3' data-copy='0'/></g>",
+        "<g transform='translate(20 30)'><polygon points='0,0' id='4'/></g>"
+    ]) + _export([
+        "<g transform='translate(5 6)'><path d='M0 0' id='5' data-copy='0'/></g>"
+    ])
+
+    assert svgresult.readPlacements(svg, 10) == [
+        (3, [10, 5, 90, 0]),
+        (4, [2, 3, 0, 0]),
+        (5, [0.5, 0.6, 0, 1])
+    ]
+
+
+def _inside(point, polygon):
+    # Points on a vertex are neither inside nor outside, as in SVGnest
+    if(point in polygon):
+        return False
+    x, y = point
+    inside = False
+    for (ax, ay), (bx, by) in zip(polygon, polygon[-1:] + polygon[:-1]):
+        if((ay > y) != (by > y) and x < (bx - ax) * (y - ay) / (by - ay) + ax):
+            inside = not inside
+    return inside
+
+
+def _nest(payload, positions):
+    # Builds the export of SVGnest for the given positions per id and copy.
+    # Like its toTree, a polygon is the child of the first other polygon that
+    # contains its first point, and groups hold a part with all its children
+    polygons = []
+    for part in payload["parts"]:
+        for copy in range(part["quantity"]):
+            for data in part["polygons"]:
+                flat = list(outline.decodeFloats(data))
+                polygons.append((part["id"], copy, list(zip(flat[0::2], flat[1::2]))))
+
+    parents = {}
+    for i, (_, _, p) in enumerate(polygons):
+        for j, (_, _, q) in enumerate(polygons):
+            if(i != j and _inside(p[0], q)):
+                parents[i] = j
+                break
+
+    def root(i):
+        while i in parents:
+            i = parents[i]
+        return i
+
+    groups = []
+    for i, (index, copy, _) in enumerate(polygons):
+        if(i in parents):
+            continue
+        children = [polygons[j] for j in range(len(polygons)) if j != i and root(j) == i]
+        x, y = positions[index, copy]
+        groups.append("<g transform='translate({} {})'>".format(x, y) + "".join(
+            "<polygon points='0,0' id='{}' data-copy='{}'/>".format(c[0], c[1]) for c in [polygons[i]] + children
+        ) + "</g>")
+    return _export(groups)
+
+
+def testCopiesWithHoles():
+    part = outline.partFromPathData("M0 0 L100 0 L100 100 L0 100 Z M25 25 L75 25 L75 75 L25 75 Z", 7)
+    payload = outline.buildPolygonPayload([part], 10, 10, 100, quantities={7: 2})
+
+    svg = _nest(payload, {(7, 0): (0, 0), (7, 1): (500, 200)})
+
+    # Both holes end up in the group of the first copy
+    assert svg.count("data-copy='1'") == 2
+    assert svgresult.readPlacements(svg) == [(7, [0, 0, 0, 0]), (7, [500, 200, 0, 0])]
+
+
+def testReadElementsAreReleased(monkeypatch):
+    # Records how many children the parent of each started element still holds
+    sizes = []
+    opened = []
+
+    class Parser(ET.XMLPullParser):
+        def read_events(self):
+            for event, element in super().read_events():
+                if(event == "start"):
+                    if opened:
+                        sizes.append(len(opened[-1]))
+                    opened.append(element)
+                elif opened:
+                    opened.pop()
+                yield event, element
+
+    monkeypatch.setattr(svgresult.ET, "XMLPullParser", Parser)
+    monkeypatch.setattr(svgresult, "_FEED_SIZE", 64)
+    svg = _export(["<g transform='translate({} 0)'><path d='M0 0' id='{}'/></g>".format(i, i) for i in range(500)])
+
+    assert len(svgresult.readPlacements(svg)) == 500
+    # Only the groups of the current chunk stay attached to the sheet
+    assert max(sizes) < 5
@@ -0,0 +1,74 @@
+import math
+import types
+
+import pytest
+
+
+class Evaluator(object):
+    """Curve evaluator of a parametric function, recording every evaluated parameter"""
+
+    def __init__(self, function, start, end):
+        self.function = function
+        self.start = start
+        self.end = end
+        self.evaluated = []
+
+    def getParameterExtents(self):
+        return True, self.start, self.end
+
+    def getPointsAtParameters(self, params):
+        self.evaluated.extend(params)
+        return True, [types.SimpleNamespace(x=x, y=y) for x, y in map(self.function, params)]
+
+
+CURVES = {
+    "arc": (lambda t: (5 * math.cos(t), 5 * math.sin(t)), 0, 3),
+    "ellipse": (lambda t: (8 * math.cos(t), 2 * math.sin(t)), 0, 2 * math.pi),
+    "parabola": (lambda t: (t, t * t / 4), -6, 6)
+}
+
+
+def _deviation(a, b, p):
+    ab = (b[0] - a[0], b[1] - a[1])
+    t = max(0, min(1, ((p[0] - a[0]) * ab[0] + (p[1] - a[1]) * ab[1]) / (ab[0] ** 2 + ab[1] ** 2)))
+    return math.hypot(a[0] + t * ab[0] - p[0], a[1] + t * ab[1] - p[1])
+
+
+@pytest.mark.parametrize("name", sorted(CURVES))
+@pytest.mark.parametrize("tolerance", [0.002, 0.02, 0.5])
+def testChordErrorIsBounded(addin, name, tolerance):
+    function, start, end = CURVES[name]
+    evaluator = Evaluator(function, start, end)
+
+    points = addin.tessellateCurve(evaluator, tolerance)
+
+    assert points[0] == pytest.approx(function(start)) and points[-1] == pytest.approx(function(end))
+
+    # Every parameter is evaluated once, midpoints close enough to their chord are not kept
+    assert len(set(evaluator.evaluated)) == len(evaluator.evaluated)
+    params = {function(t): t for t in evaluator.evaluated}
+    params = [params[p] for p in points]
+    assert params == sorted(params)
+
+    # The curve between the parameters of two points stays within the tolerance of their chord
+    for i in range(len(points) - 1):
+        for k in range(1, 20):
+            p = function(params[i] + (params[i + 1] - params[i]) * k / 20)
+            assert _deviation(points[i], points[i + 1], p) <= tolerance
+
+
+def testTighterToleranceNeedsMorePoints(addin):
+    counts = [len(addin.tessellateCurve(Evaluator(*CURVES["ellipse"]), t)) for t in (0.5, 0.02, 0.002)]
+    assert counts == sorted(counts) and counts[0] < counts[-1]
+
+
+def testStraightCurveIsNotRefined(addin):
+    evaluator = Evaluator(lambda t: (t, 2 * t), 0, 10)
+    assert len(addin.tessellateCurve(evaluator, 0.002, initialSegments=4)) == 5
+
+
+def testChordTolerance(addin):
+    # Follows the spacing between parts, within CHORD_TOLERANCE and CHORD_TOLERANCE_MAX
+    assert addin.getChordTolerance(0) == addin.CHORD_TOLERANCE
+    assert addin.getChordTolerance(0.1) == pytest.approx(0.1 * addin.CHORD_TOLERANCE_SPACING_FACTOR)
+    assert addin.getChordTolerance(100) == addin.CHORD_TOLERANCE_MAX
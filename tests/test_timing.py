@@ -0,0 +1,110 @@
+import json
+import time
+import types
+
+import pytest
+
+from nestlib import timing
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Every reading of the clock advances it by a second
+    now = [0.0]
+
+    def perfCounter():
+        now[0] += 1
+        return now[0]
+
+    monkeypatch.setattr(timing, "time", types.SimpleNamespace(perf_counter=perfCounter, strftime=time.strftime))
+    return now
+
+
+def testSpans(clock):
+    log = timing.RunLog()
+    log.start(engine="python")
+
+    with log.span("body", index=0, name="a") as record:
+        record["vertices"] = 12
+        with log.span("sketch"):
+            pass
+    log.event("done", placed=3)
+
+    run, sketch, body, done = log.records
+    assert run == {"stage": "run", "start": 1.0, "engine": "python", "run": log.run}
+
+    # Spans are written when they end, with their start and duration
+    assert sketch["stage"] == "sketch" and sketch["duration"] == 1.0
+    assert body == {"stage": "body", "index": 0, "name": "a", "vertices": 12, "start": 2.0, "duration": 3.0, "run": log.run}
+    assert done == {"stage": "done", "start": 6.0, "placed": 3, "run": log.run}
+
+
+def testSpanIsWrittenOnError():
+    log = timing.RunLog()
+    log.start()
+
+    with pytest.raises(ValueError):
+        with log.span("body", index=1):
+            raise ValueError()
+
+    assert log.first("body")["index"] == 1 and "duration" in log.first("body")
+
+
+def testSlowestAndFirst(clock):
+    log = timing.RunLog()
+    log.start()
+
+    for i, ticks in enumerate([1, 4, 2, 3]):
+        with log.span("body", index=i):
+            clock[0] += ticks - 1
+    log.event("body", index=9)
+
+    # Events have no duration and are left out
+    assert [r["index"] for r in log.slowest("body", 3)] == [1, 3, 2]
+    assert [r["duration"] for r in log.slowest("body")] == [4, 3, 2, 1]
+    assert log.first("body")["index"] == 0
+    assert log.first("missing") is None
+
+
+def testNewRunDropsRecords():
+    log = timing.RunLog()
+    log.start()
+    log.event("a")
+    log.start()
+
+    assert [r["stage"] for r in log.records] == ["run"]
+
+
+def testFileFormat(tmp_path):
+    path = str(tmp_path / "nest_log.jsonl")
+    log = timing.RunLog(path)
+    log.start(bodies=2)
+    with log.span("body", name="a"):
+        pass
+
+    # One compact JSON object per line, the same as the records
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert [json.loads(l) for l in lines] == log.records
+    assert all(" " not in l for l in lines)
+
+
+def testFileIsRotated(tmp_path):
+    path = str(tmp_path / "nest_log.jsonl")
+    log = timing.RunLog(path, maxBytes=100)
+    for i in range(5):
+        log.start(index=i, padding="x" * 50)
+
+    # Runs start a new file once it grows past the limit, the previous one is kept as .old
+    with open(path) as f:
+        assert [json.loads(l)["index"] for l in f] == [4]
+    with open(path + ".old") as f:
+        assert [json.loads(l)["index"] for l in f] == [3]
+
+
+def testUnwritableFile(tmp_path):
+    log = timing.RunLog(str(tmp_path / "missing" / "nest_log.jsonl"))
+    log.start()
+    log.event("a")
+
+    assert [r["stage"] for r in log.records] == ["run", "a"]